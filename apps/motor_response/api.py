@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import os
 import os
 import logging
 import time
@@ -8,20 +7,28 @@ from datetime import timedelta
 from typing import Any, Dict, List, Optional
 
 from django.core.cache import cache
-from django.db import transaction
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from ninja import Router
 
 from whatsapp_inbound.models import (
     Tenant,
     Contact,
-    MemoryRecord,
+    MotorJob,
     TenantEvent,
     Template,
 )
+from whatsapp_inbound.catalog_cache import get_catalog
+from whatsapp_inbound import fastjson
 
-from .schemas import MotorRespondIn, MotorRespondOut
-from .llm_classifier import build_classifier_input, classify_with_openai
+from .schemas import DraftStreamIn, MotorJobOut, MotorRespondIn, MotorRespondOut
+from .jobs import enqueue_motor_job, response_cache_key
+from .deadline import deadline_scope
+from .decision_log import record_decision
+from .llm_classifier import SentenceChunker, astream_draft, build_classifier_input, classify_with_openai, stream_draft
+from .memory_repository import MemoryRepository
 
 
 logger = logging.getLogger(__name__)
@@ -29,6 +36,9 @@ router = Router()
 
 OFFENSIVE = ["puta", "mierda", "idiota", "estafa"]
 
+# sync: el request espera los LLM. async: 202 + job id; el resultado llega a n8n como OutboxEvent MOTOR_DECIDED.
+MOTOR_DEFAULT_MODE = os.getenv("MOTOR_DEFAULT_MODE", "sync")
+
 
 def _get_or_create_tenant(tenant_id: str) -> Tenant:
     t = Tenant.objects.filter(tenant_key=tenant_id).first()
@@ -59,44 +69,38 @@ def _iso(dt) -> Optional[str]:
 
 
 def _load_tenant_events(tenant: Tenant) -> List[Dict[str, Any]]:
-    cache_key = f"tenant:{tenant.tenant_key}:events:v1"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        return cached
-
-    qs = TenantEvent.objects.filter(tenant=tenant, is_active=True).order_by("name")
-    out = []
-    for ev in qs:
-        out.append(
-            {
-                "name": ev.name,
-                "max_points": ev.max_points,
-                "triggers": ev.triggers or [],
-                "template_key": ev.template_key or "",
-                "is_active": ev.is_active,
-            }
-        )
-    cache.set(cache_key, out, timeout=300)
-    return out
+    def load():
+        qs = TenantEvent.objects.filter(tenant=tenant, is_active=True).order_by("name")
+        out = []
+        for ev in qs:
+            out.append(
+                {
+                    "name": ev.name,
+                    "max_points": ev.max_points,
+                    "triggers": ev.triggers or [],
+                    "template_key": ev.template_key or "",
+                    "is_active": ev.is_active,
+                }
+            )
+        return out
+
+    return get_catalog("events", tenant.pk, load)
 
 
 def _load_available_templates(tenant: Tenant) -> List[Dict[str, Any]]:
-    cache_key = f"tenant:{tenant.tenant_key}:templates:v1"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        return cached
-
-    qs = Template.objects.filter(tenant=tenant, active=True).order_by("name")
-    out = []
-    for t in qs:
-        out.append({
-            "name": t.name,
-            "category": t.category,
-            "language": t.language,
-            "components": t.components_json
-        })
-    cache.set(cache_key, out, timeout=300)
-    return out
+    def load():
+        qs = Template.objects.filter(tenant=tenant, active=True).order_by("name")
+        out = []
+        for t in qs:
+            out.append({
+                "name": t.name,
+                "category": t.category,
+                "language": t.language,
+                "components": t.components_json
+            })
+        return out
+
+    return get_catalog("templates", tenant.pk, load)
 
 
 def _default_actions_call_text_ai(payload: MotorRespondIn, primary_event: str, secondary_events: List[str], confidence: float):
@@ -122,15 +126,35 @@ def _default_actions_call_text_ai(payload: MotorRespondIn, primary_event: str, s
     ]
 
 
-@router.post("/v1/motor/respond", response=MotorRespondOut)
-def motor_respond(request, payload: MotorRespondIn):
+def _job_out(job: MotorJob) -> Dict[str, Any]:
+    return {
+        "ok": job.status != MotorJob.STATUS_FAILED,
+        "job_id": str(job.id),
+        "status": job.status,
+        "turn_wamid": job.turn_wamid,
+        "attempts": job.attempts,
+        "result": job.result_json,
+        "error": job.error,
+    }
+
+
+@router.post("/v1/motor/respond", response={200: MotorRespondOut, 202: MotorJobOut, 400: Dict[str, Any]})
+def motor_respond(request, payload: MotorRespondIn, mode: Optional[str] = None):
+    mode = mode or MOTOR_DEFAULT_MODE
+    if mode == "async":
+        # Valida (pydantic) y encola: el HTTP worker no espera a los LLM
+        job, _ = enqueue_motor_job(payload)
+        return 202, _job_out(job)
+    if mode != "sync":
+        return 400, {"ok": False, "error": "invalid mode (expected sync|async)"}
+
     # Lógica de Deduplicación e Idempotencia
     dedup_key = None
     lock_key = None
     
     # 0. Validar WAMID para dedup
     if payload.turn_wamid and payload.turn_wamid.strip():
-        dedup_key = f"motor:response:{payload.tenant_id}:{payload.turn_wamid}"
+        dedup_key = response_cache_key(payload.tenant_id, payload.turn_wamid)
         lock_key = f"motor:processing:{payload.tenant_id}:{payload.turn_wamid}"
         
         # 1. Check respuesta existente (Idempotencia)
@@ -176,17 +200,133 @@ def motor_respond(request, payload: MotorRespondIn):
             cache.delete(lock_key)
 
 
+@router.get("/v1/motor/jobs/{job_id}", response={200: MotorJobOut, 404: Dict[str, Any]})
+def motor_job_status(request, job_id: str):
+    try:
+        job = MotorJob.objects.filter(pk=job_id).first()
+    except (ValueError, ValidationError):
+        job = None
+    if job is None:
+        return 404, {"ok": False, "error": "job_not_found"}
+    return 200, _job_out(job)
+
+
+def _sse(event: str, data: Dict[str, Any]) -> bytes:
+    return f"event: {event}\ndata: ".encode() + fastjson.dumps(data).encode() + b"\n\n"
+
+
+def _draft_events(chunking: str, min_chars: int):
+    """Fragmentos del modelo -> (evento, data). Al final 'done' con el texto completo."""
+    chunker = SentenceChunker(min_chars) if chunking == "sentences" else None
+    parts: List[str] = []
+    seq = 0
+
+    def emit(text):
+        nonlocal seq
+        seq += 1
+        return ("sentence" if chunker else "token", {"seq": seq, "text": text})
+
+    def feed(piece):
+        parts.append(piece)
+        if chunker is None:
+            return [emit(piece)]
+        return [emit(sentence) for sentence in chunker.feed(piece)]
+
+    def done():
+        tail = chunker.flush() if chunker else None
+        out = [emit(tail)] if tail else []
+        out.append(("done", {"text": "".join(parts).strip(), "chunks": seq}))
+        return out
+
+    return feed, done
+
+
+def _draft_stream_sync(payload: DraftStreamIn):
+    feed, done = _draft_events(payload.chunking, payload.min_chars)
+    for piece in stream_draft(input_json=payload.input_json):
+        for event, data in feed(piece):
+            yield _sse(event, data)
+    for event, data in done():
+        yield _sse(event, data)
+
+
+async def _draft_stream_async(payload: DraftStreamIn):
+    feed, done = _draft_events(payload.chunking, payload.min_chars)
+    async for piece in astream_draft(input_json=payload.input_json):
+        for event, data in feed(piece):
+            yield _sse(event, data)
+    for event, data in done():
+        yield _sse(event, data)
+
+
+@router.post("/v1/motor/draft/stream", response={400: Dict[str, Any]})
+def motor_draft_stream(request, payload: DraftStreamIn):
+    """
+    Drafter en streaming (SSE): el primer fragmento sale apenas lo emite el modelo.
+    chunking=sentences agrupa por oración para enviar mensajes de WhatsApp progresivamente.
+    """
+    if payload.chunking not in ("tokens", "sentences"):
+        return 400, {"ok": False, "error": "invalid chunking (expected tokens|sentences)"}
+
+    # Bajo ASGI un iterador sync se consumiría entero antes de enviar: ahí se usa el cliente async
+    stream = _draft_stream_async(payload) if isinstance(request, ASGIRequest) else _draft_stream_sync(payload)
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: no bufferear el stream
+    return response
+
+
 def _motor_respond_impl(payload: MotorRespondIn):
+    # Presupuesto del turno: las etapas LLM lo comparten y al agotarse caen en sus fallbacks
+    with deadline_scope() as dl:
+        out = _motor_respond_turn(payload)
+    out["telemetry"] = {**(out.get("telemetry") or {}), "deadline": dl.telemetry()}
+    # auditoría: se encola y lo escribe el hilo del decision log (sin round-trip a la DB acá)
+    record_decision(out)
+    return out
+
+
+def _classify_turn(payload: MotorRespondIn, tenant: Tenant, memory: MemoryRepository, window_open: bool,
+                   last_user_message_at, tenant_events: List[Dict[str, Any]], available_templates: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """5) Clasificador LLM (Stored Prompt Mode) con el input completo del turno."""
+    memory_json = {
+        "active_primary_event": memory.get("active_primary_event"),
+        "active_secondary_events_json": memory.get("active_secondary_events", []),
+        "recent_events_json": memory.get("recent_events", []),
+        "summary": memory.get("summary", ""),
+        "facts_json": memory.get("facts_json", []),
+    }
+
+    classifier_input = build_classifier_input(
+        tenant_id=tenant.tenant_key or payload.tenant_id,
+        domain=tenant.domain or "generic",
+        turn_wamid=payload.turn_wamid,
+        text_in=payload.text,
+        timestamp_in=payload.timestamp_in,
+        channel=payload.channel,
+        wa_id=payload.wa_id,
+        phone_number_id=payload.phone_number_id,
+        window_open=window_open,
+        last_user_message_at=_iso(last_user_message_at),
+        memory=memory_json,
+        tenant_events=tenant_events,
+        templates=available_templates,
+    )
+
+    return classify_with_openai(
+        model=os.getenv("MOTOR_CLASSIFIER_MODEL", "gpt-4o"),
+        user_input_json=classifier_input,
+    )
+
+
+def _motor_respond_turn(payload: MotorRespondIn):
     tenant = _get_or_create_tenant(payload.tenant_id)
 
     # contact + memory (si no existe, no lo creamos acá; inbound ya lo crea)
     contact = Contact.objects.filter(tenant=tenant, contact_key=payload.contact_key).first()
-    mem = None
-    last_user_message_at = None
-    if contact:
-        mem = MemoryRecord.objects.filter(tenant=tenant, contact=contact).first()
-        if mem:
-            last_user_message_at = mem.last_user_message_at
+    # Una sola lectura de MemoryRecord por turno; los cambios se acumulan y se escriben con un único UPDATE.
+    memory = MemoryRepository.load(tenant, contact)
+    last_user_message_at = memory.last_user_message_at
 
     now = timezone.now()
     text_lower = (payload.text or "").lower()
@@ -239,16 +379,9 @@ def _motor_respond_impl(payload: MotorRespondIn):
         secondary_events = []
         confidence = 0.1
  
-        if contact:
-            with transaction.atomic():
-                mem_obj, _ = MemoryRecord.objects.get_or_create(tenant=tenant, contact=contact)
-                mem_obj.active_primary_event = primary_event
-                mem_obj.active_secondary_events = secondary_events
-                recent = mem_obj.recent_events or []
-                recent.append({"ts": _iso(now), "event": primary_event, "confidence": confidence})
-                mem_obj.recent_events = recent[-20:]
-                mem_obj.updated_at = timezone.now()
-                mem_obj.save(update_fields=["active_primary_event", "active_secondary_events", "recent_events", "updated_at"])
+        memory.set_events(primary_event, secondary_events)
+        memory.append_recent_event({"ts": _iso(now), "event": primary_event, "confidence": confidence})
+        memory.flush()
 
         return {
             "ok": True,
@@ -268,38 +401,33 @@ def _motor_respond_impl(payload: MotorRespondIn):
         }
 
     # --- IMPORTACIONES DEL NUEVO PIPELINE HÍBRIDO ---
-    from .llm_classifier import extract_signals
+    from .local_extractor import resolve_signals
     from .schemas import Signals, SalesState, PlaybookConfig, RouterDecision
     from .router import decide_playbook
+    from .router_rules import table_for
     from .playbooks import get_playbook
     from .state_manager import update_sales_state
     from .action_builder import build_actions_from_playbook
     from .llm_classifier import generate_draft # Importamos Drafter
 
     # 1. Extractor (Ojos)
-    signals_data = extract_signals(user_input_json={"text": payload.text})
+    # Reglas locales (µs); el extractor LLM sólo si la confianza local no alcanza
+    signals_data, extractor_telemetry = resolve_signals(payload.text or "", tenant)
     signals = Signals(**signals_data)
 
     # 2. Sales State (Memoria)
     # Inicializar o recuperar estado
-    state_data = mem.sales_state_json if mem else {}
+    state_data = memory.get("sales_state_json", {})
     current_state = SalesState(**state_data)
     
     # Actualizar estado con señales nuevas
     sales_state = update_sales_state(current_state, signals)
     
-    # PERSISTENCIA (Opcional en esta fase, pero útil para debugging)
-    # Por ahora solo actualizamos en memoria para el router, 
-    # la persistencia real a DB se puede hacer aquí o al final.
-    # Para cumplir "Sales State deje de estar dormido", lo persistimos.
-    if contact and mem:
-        mem.sales_state_json = sales_state.model_dump()
-        # No guardamos todavía para no hacer doble write, 
-        # pero el objeto 'mem' ya tiene el dato fresco.
-        # Si quisiéramos guardar YA: mem.save(update_fields=["sales_state_json", "updated_at"])
+    # PERSISTENCIA: se acumula en el repositorio y se escribe junto al resto en el paso 7.
+    memory.set_sales_state(sales_state.model_dump())
     
     # 3. Router (Cerebro)
-    router_decision = decide_playbook(signals, sales_state, window_open)
+    router_decision = decide_playbook(signals, sales_state, window_open, table_for(tenant))
     
     # 4. Playbook (Estrategia)
     playbook = get_playbook(router_decision.playbook_key)
@@ -331,39 +459,22 @@ def _motor_respond_impl(payload: MotorRespondIn):
 
     # --- FIN PIPELINE HÍBRIDO (CONTINÚA FLUJO LEGACY) ---
 
-    # 4) Construir input para la IA clasificadora
-    memory_json = {
-        "active_primary_event": (mem.active_primary_event if mem else None),
-        "active_secondary_events_json": (mem.active_secondary_events if mem else []),
-        "recent_events_json": (mem.recent_events if mem else []),
-        "summary": (mem.summary if mem else ""),
-        "facts_json": (mem.facts_json if mem else []),
-    }
-
-    classifier_input = build_classifier_input(
-        tenant_id=tenant.tenant_key or payload.tenant_id,
-        domain=tenant.domain or "generic",
-        turn_wamid=payload.turn_wamid,
-        text_in=payload.text,
-        timestamp_in=payload.timestamp_in,
-        channel=payload.channel,
-        wa_id=payload.wa_id,
-        phone_number_id=payload.phone_number_id,
-        window_open=window_open,
-        last_user_message_at=_iso(last_user_message_at),
-        memory=memory_json,
-        tenant_events=tenant_events,
-        templates=available_templates,
-    )
+    # 4) Clasificador local (entrenado offline por tenant): si su confianza calibrada alcanza, no se llama al LLM.
+    # Sólo con ventana abierta: con ventana cerrada la elección de template sigue siendo del LLM.
+    from .intent_model import predict_event
 
-    # 5) Llamar al modelo
-    model = os.getenv("MOTOR_CLASSIFIER_MODEL", "gpt-4o")
-    
-    # Usamos Stored Prompt Mode exclusivamente
-    llm_out = classify_with_openai(
-        model=model,
-        user_input_json=classifier_input,
-    )
+    local_event = predict_event(payload.text or "", tenant, (e["name"] for e in tenant_events)) if window_open else None
+    if local_event:
+        llm_out = {
+            "ok": True,
+            "decision": {"primary_event": local_event[0], "secondary_events": [], "confidence": local_event[1]},
+            "policy": {"response_mode": "FREEFORM"},
+            "next_actions": [],
+            "memory_update": {},
+            "telemetry": {"llm_used": False, "classifier": "local", "classifier_confidence": round(local_event[1], 3)},
+        }
+    else:
+        llm_out = _classify_turn(payload, tenant, memory, window_open, last_user_message_at, tenant_events, available_templates)
 
     # 6) Normalizar salida del LLM
     # La salida ya viene parcialmente normalizada desde llm_classifier.py
@@ -483,50 +594,18 @@ def _motor_respond_impl(payload: MotorRespondIn):
         
         memory_update = memory_data
     
-    # 7) Persistir MemoryRecord con primary/secondary/recent/scores
-    if contact:
-        with transaction.atomic():
-            mem_obj, _ = MemoryRecord.objects.get_or_create(tenant=tenant, contact=contact)
-
-            mem_obj.active_primary_event = memory_update.get("active_primary_event") or primary_event
-            # HOTFIX: Ensure list is never None
-            mem_obj.active_secondary_events = (memory_update.get("active_secondary_events") or secondary_events) or []
-
-            # append recent
-            recent_append = {"ts": _iso(now), "event": primary_event, "confidence": confidence}
-            recent = list(mem_obj.recent_events or [])
-            recent.append(recent_append)
-            mem_obj.recent_events = recent[-20:]
-
-            # summary (CRÍTICO: Actualizar la memoria narrativa)
-            new_summary = memory_update.get("summary")
-            if new_summary and isinstance(new_summary, str):
-                mem_obj.summary = new_summary
-
-            # facts_json (opcional: si la IA extrajo nuevos datos)
-            new_facts = memory_update.get("facts_json")
-            if isinstance(new_facts, list):
-                # Estrategia simple: reemplazar. 
-                # Idealmente podríamos hacer merge, pero por ahora confiamos en el LLM.
-                mem_obj.facts_json = new_facts
-
-            # scores_json (opcional)
-            scores_json = memory_update.get("scores_json")
-            if isinstance(scores_json, dict) and scores_json:
-                mem_obj.scores_json = scores_json
-
-            mem_obj.updated_at = timezone.now()
-            mem_obj.save(
-                update_fields=[
-                    "active_primary_event",
-                    "active_secondary_events",
-                    "recent_events",
-                    "summary",
-                    "facts_json",
-                    "scores_json",
-                    "updated_at",
-                ]
-            )
+    # 7) Persistir MemoryRecord con primary/secondary/recent/scores/sales_state (un único UPDATE)
+    memory.set_events(
+        memory_update.get("active_primary_event") or primary_event,
+        memory_update.get("active_secondary_events") or secondary_events,
+    )
+    memory.append_recent_event({"ts": _iso(now), "event": primary_event, "confidence": confidence})
+    # summary (CRÍTICO: Actualizar la memoria narrativa)
+    memory.set_summary(memory_update.get("summary"))
+    # facts_json / scores_json (opcionales: si la IA extrajo nuevos datos)
+    memory.set_facts(memory_update.get("facts_json"))
+    memory.set_scores(memory_update.get("scores_json"))
+    memory.flush()
 
     # 8) Salida final
     return {
@@ -551,5 +630,12 @@ def _motor_respond_impl(payload: MotorRespondIn):
             "summary": memory_update.get("summary"),
             "facts_json": memory_update.get("facts_json") or [],
         },
-        "telemetry": {"window_open": window_open, **(telemetry or {})},
+        "telemetry": {
+            "window_open": window_open,
+            **extractor_telemetry,
+            "classifier": "llm",
+            **(telemetry or {}),
+            # decisión del pipeline híbrido (shadow) y señales: van al log de decisiones / replay_motor
+            "router": {"playbook_key": router_decision.playbook_key, "stage": sales_state.stage, "signals": signals.model_dump()},
+        },
     }
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Presupuesto total de un turno del motor (muy por debajo del --timeout 60 de gunicorn)
+TURN_BUDGET_S = float(os.getenv("MOTOR_TURN_BUDGET_S", "8"))
+
+# stage -> (tope propio, reserva para las etapas siguientes). La reserva evita que el extractor
+# o el drafter (shadow) dejen al clasificador sin tiempo.
+STAGES: Dict[str, Tuple[float, float]] = {
+    "extractor": (float(os.getenv("LLM_BUDGET_EXTRACTOR_S", "2.5")), 4.0),
+    "drafter": (float(os.getenv("LLM_BUDGET_DRAFTER_S", "2.5")), 3.0),
+    "classifier": (float(os.getenv("LLM_BUDGET_CLASSIFIER_S", "6")), 0.0),
+}
+
+# Por debajo de esto no vale la pena lanzar (ni reintentar) una llamada
+MIN_CALL_S = float(os.getenv("LLM_MIN_CALL_S", "0.5"))
+RETRY_BASE_S = 0.25
+RETRY_CAP_S = 2.0
+
+# Hedging: segunda request idéntica si la primera supera el p95 observado de la etapa
+HEDGE_ENABLED = os.getenv("LLM_HEDGE", "0") == "1"
+HEDGE_MIN_SAMPLES = 20
+_HEDGE_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_HEDGE_POOL", "16")), thread_name_prefix="llm-hedge")
+
+
+class DeadlineExceeded(Exception):
+    def __init__(self, stage: str):
+        super().__init__(f"deadline exceeded at stage {stage}")
+        self.stage = stage
+
+
+class Deadline:
+    def __init__(self, budget_s: float):
+        self.budget_s = budget_s
+        self.started = time.monotonic()
+        self.at = self.started + budget_s
+        self.expired_stages: List[str] = []
+        # ms acumulados en llamadas LLM y tokens consumidos, por etapa (van al log de decisiones)
+        self.stage_ms: Dict[str, int] = {}
+        self.usage: Dict[str, Dict[str, int]] = {}
+
+    def remaining(self) -> float:
+        return max(0.0, self.at - time.monotonic())
+
+    def stage_end(self, stage: str) -> float:
+        cap, reserve = STAGES.get(stage, (self.budget_s, 0.0))
+        return min(self.at - reserve, time.monotonic() + cap)
+
+    def telemetry(self) -> Dict[str, object]:
+        return {
+            "budget_ms": int(self.budget_s * 1000),
+            "elapsed_ms": int((time.monotonic() - self.started) * 1000),
+            "expired": list(self.expired_stages),
+            "stages_ms": dict(self.stage_ms),
+            "usage": {stage: dict(u) for stage, u in self.usage.items()},
+        }
+
+    def record(self, stage: str, seconds: float, resp: object = None):
+        self.stage_ms[stage] = self.stage_ms.get(stage, 0) + int(seconds * 1000)
+        tokens = _usage(resp)
+        if tokens:
+            acc = self.usage.setdefault(stage, {"input": 0, "output": 0, "total": 0})
+            for k, v in tokens.items():
+                acc[k] += v
+
+
+def _usage(resp: object) -> Optional[Dict[str, int]]:
+    """Tokens de una respuesta OpenAI: Responses API (input/output_tokens) o Chat Completions (prompt/completion_tokens)."""
+    u = getattr(resp, "usage", None)
+    if u is None:
+        return None
+    inp = getattr(u, "input_tokens", None)
+    out = getattr(u, "output_tokens", None)
+    if not isinstance(inp, int):
+        inp = getattr(u, "prompt_tokens", None)
+        out = getattr(u, "completion_tokens", None)
+    if not isinstance(inp, int) or not isinstance(out, int):
+        return None
+    return {"input": inp, "output": out, "total": inp + out}
+
+
+_current: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("motor_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(budget_s: Optional[float] = None):
+    """Todas las llamadas LLM dentro del bloque comparten este presupuesto (default MOTOR_TURN_BUDGET_S)."""
+    dl = Deadline(TURN_BUDGET_S if budget_s is None else budget_s)
+    token = _current.set(dl)
+    try:
+        yield dl
+    finally:
+        _current.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+class _LatencyTracker:
+    """p95 de las últimas N latencias exitosas por etapa (por proceso)."""
+
+    def __init__(self, size: int = 200):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self._size = size
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(stage, deque(maxlen=self._size)).append(seconds)
+
+    def p95(self, stage: str) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(stage, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[int(len(samples) * 0.95) - 1]
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+
+latencies = _LatencyTracker()
+
+
+def _retryable(e: Exception) -> bool:
+    return isinstance(e, openai.APIStatusError) and (e.status_code == 429 or e.status_code >= 500)
+
+
+def _timed(stage: str, fn: Callable[[float], T], timeout: float) -> T:
+    t0 = time.monotonic()
+    out = fn(timeout)
+    latencies.record(stage, time.monotonic() - t0)
+    return out
+
+
+def _hedged(stage: str, fn: Callable[[float], T], timeout: float) -> T:
+    delay = latencies.p95(stage) if HEDGE_ENABLED else None
+    if delay is None or delay + MIN_CALL_S >= timeout:
+        return _timed(stage, fn, timeout)
+
+    first = _HEDGE_POOL.submit(_timed, stage, fn, timeout)
+    done, _ = wait([first], timeout=delay)
+    if done:
+        return first.result()
+
+    logger.info(f"[LLM HEDGE] {stage}: >{delay:.2f}s (p95), launching second request")
+    pending = {first, _HEDGE_POOL.submit(_timed, stage, fn, timeout - delay)}
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for f in done:
+            if f.exception() is None:
+                return f.result()
+            error = f.exception()
+    raise error
+
+
+def call_llm(stage: str, fn: Callable[[float], T]) -> T:
+    """
+    Ejecuta fn(timeout_s) dentro del presupuesto de la etapa (y del turno, si hay deadline_scope).
+    Reintenta con backoff + jitter sólo ante 429/5xx y sólo si el presupuesto alcanza;
+    si no alcanza (o la llamada hace timeout) levanta DeadlineExceeded para que el caller use su fallback.
+    """
+    dl = current_deadline()
+    if dl is None:
+        # Fuera de un turno (p.ej. un script): sólo el tope propio de la etapa, sin reservas
+        dl = Deadline(STAGES.get(stage, (TURN_BUDGET_S, 0.0))[0])
+        end = dl.at
+    else:
+        end = dl.stage_end(stage)
+    started = time.monotonic()
+    out = None
+    try:
+        out = _attempts(stage, fn, dl, end)
+        return out
+    finally:
+        dl.record(stage, time.monotonic() - started, out)
+
+
+def _attempts(stage: str, fn: Callable[[float], T], dl: Deadline, end: float) -> T:
+    attempt = 0
+    while True:
+        timeout = end - time.monotonic()
+        if timeout < MIN_CALL_S:
+            dl.expired_stages.append(stage)
+            raise DeadlineExceeded(stage)
+        try:
+            return _hedged(stage, fn, timeout)
+        except openai.APITimeoutError as e:
+            dl.expired_stages.append(stage)
+            raise DeadlineExceeded(stage) from e
+        except Exception as e:
+            if not _retryable(e):
+                raise
+            attempt += 1
+            backoff = min(RETRY_CAP_S, RETRY_BASE_S * 2 ** attempt) * random.uniform(0.5, 1.0)
+            if end - time.monotonic() - backoff < MIN_CALL_S:
+                dl.expired_stages.append(stage)
+                raise DeadlineExceeded(stage) from e
+            logger.warning(f"[LLM RETRY] {stage} attempt {attempt} in {backoff:.2f}s: {e}")
+            time.sleep(backoff)
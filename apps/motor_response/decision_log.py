@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from django.db import close_old_connections
+
+from whatsapp_inbound.models import MotorDecision
+
+logger = logging.getLogger(__name__)
+
+# async: hilo de fondo con bulk_create por lotes (default) | sync: escribe en el hilo del turno (tests) | off
+MODE = os.getenv("MOTOR_DECISION_LOG", "async")
+BATCH_SIZE = int(os.getenv("MOTOR_DECISION_LOG_BATCH", "200"))
+FLUSH_MS = int(os.getenv("MOTOR_DECISION_LOG_FLUSH_MS", "1000"))
+# Si la DB no da abasto se descartan los más viejos: el log nunca frena ni hace crecer sin límite al worker
+MAX_BUFFER = int(os.getenv("MOTOR_DECISION_LOG_MAX_BUFFER", "20000"))
+
+
+class DecisionWriter:
+    """
+    Buffer en memoria del proceso. submit() sólo agrega a una deque (sin I/O); un hilo daemon
+    hace bulk_create cada BATCH_SIZE registros o cada FLUSH_MS, y atexit vacía lo pendiente al apagar.
+    """
+
+    def __init__(self, batch_size: int = BATCH_SIZE, flush_ms: int = FLUSH_MS, max_buffer: int = MAX_BUFFER):
+        self.batch_size = batch_size
+        self.flush_s = flush_ms / 1000
+        self._buf: Deque[MotorDecision] = deque(maxlen=max_buffer)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = 0
+        self.dropped = 0
+        self.written = 0
+
+    def submit(self, record: MotorDecision):
+        with self._lock:
+            if len(self._buf) == self._buf.maxlen:
+                self.dropped += 1
+            self._buf.append(record)
+            full = len(self._buf) >= self.batch_size
+            if self._pid != os.getpid():
+                # se arranca al primer uso en cada proceso: un hilo no sobrevive al fork de gunicorn
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="motor-decision-log", daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Escribe todo lo pendiente (lotes de batch_size). Devuelve la cantidad escrita."""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._buf)
+                self._buf.clear()
+            if not batch:
+                return 0
+            try:
+                MotorDecision.objects.bulk_create(batch, batch_size=self.batch_size)
+            except Exception as e:
+                # auditoría best-effort: un error de DB no puede tumbar al worker ni reintentar en loop
+                logger.error(f"[DECISION LOG] dropped {len(batch)} records: {e}")
+                self.dropped += len(batch)
+                return 0
+            self.written += len(batch)
+            return len(batch)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_s)
+            self._wake.clear()
+            close_old_connections()
+            self.flush()
+
+
+writer = DecisionWriter()
+# apagado ordenado (SIGTERM de gunicorn/uvicorn, fin de un comando): no se pierde lo que queda en el buffer
+atexit.register(writer.flush)
+
+
+def record_decision(out: Dict[str, Any]):
+    """Arma el MotorDecision desde la salida de _motor_respond_impl y lo encola (sin round-trip a la DB)."""
+    if MODE == "off":
+        return
+    try:
+        record = build_record(out)
+        if MODE == "sync":
+            record.save(force_insert=True)
+        else:
+            writer.submit(record)
+    except Exception:
+        # el turno ya está resuelto: la auditoría nunca le cambia la respuesta a n8n
+        logger.exception("[DECISION LOG] could not record decision")
+
+
+def build_record(out: Dict[str, Any]) -> MotorDecision:
+    telemetry = out.get("telemetry") or {}
+    decision = out.get("decision") or {}
+    router = telemetry.get("router") or {}
+    timings = dict(telemetry.get("deadline") or {})
+    usage = timings.pop("usage", {})
+    actions: List[Dict[str, Any]] = out.get("next_actions") or []
+    return MotorDecision(
+        tenant_id=out.get("tenant_id") or "",
+        contact_key=out.get("contact_key") or "",
+        turn_wamid=(out.get("turn") or {}).get("turn_wamid") or "",
+        text_in=(out.get("turn") or {}).get("text_in") or "",
+        primary_event=decision.get("primary_event") or "",
+        secondary_events=decision.get("secondary_events") or [],
+        confidence=float(decision.get("confidence") or 0.0),
+        playbook_key=router.get("playbook_key") or "",
+        classifier=telemetry.get("classifier") or "",
+        extractor=telemetry.get("extractor") or "",
+        window_open=telemetry.get("window_open"),
+        signals_json=router.get("signals"),
+        policy_json=out.get("policy") or {},
+        next_actions_json=actions,
+        timings_json=timings,
+        usage_json=usage,
+        total_tokens=sum(u.get("total", 0) for u in usage.values()),
+        warning=str(telemetry.get("warning") or out.get("warning") or "")[:64],
+    )
@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import io
+import os
+import zlib
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from whatsapp_inbound.models import MotorDecision, Tenant
+
+from .local_extractor import normalize
+
+# Modelo lineal sobre n-gramas hasheados, entrenado offline (manage.py train_intent_model) por tenant.
+# Reemplaza al clasificador LLM sólo cuando la confianza calibrada alcanza MIN_CONFIDENCE.
+MODEL_DIR = Path(os.getenv("MOTOR_INTENT_MODEL_DIR", str(Path(settings.BASE_DIR) / "var" / "intent_models")))
+MIN_CONFIDENCE = float(os.getenv("INTENT_MODEL_MIN_CONFIDENCE", "0.85"))
+FORMAT_VERSION = 2  # v2: sin etiquetas con policy distinta de FREEFORM plano
+DIM_BITS = 18
+
+# Decisiones que no salen del clasificador (reglas / errores): no son etiquetas a aprender
+EXCLUDED_LABELS = {"FALLBACK", "SAFETY_BLOCK"}
+
+
+def _hash(gram: str) -> int:
+    return zlib.crc32(gram.encode())
+
+
+def features(text: str, dim_bits: int = DIM_BITS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (buckets, valores) de palabras, bigramas y trigramas de caracteres de cada palabra.
+    Hashing con signo (bit 31 del crc32) para que las colisiones se compensen; vector con norma L2 = 1.
+    """
+    words = normalize(text).split()
+    grams: List[str] = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f" {w} "
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    if not grams:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+    h = np.fromiter((_hash(g) for g in grams), dtype=np.int64, count=len(grams))
+    buckets = h & ((1 << dim_bits) - 1)
+    signs = np.where(h >> 31, -1.0, 1.0).astype(np.float32)
+    idx, inverse = np.unique(buckets, return_inverse=True)
+    val = np.zeros(len(idx), dtype=np.float32)
+    np.add.at(val, inverse, signs)
+    norm = float(np.linalg.norm(val))
+    if norm:
+        val /= norm
+    return idx, val
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    z = z - z.max(axis=-1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+class IntentModel:
+    """Pesos sólo para los buckets vistos en entrenamiento (`rows` ordenado): el archivo queda chico."""
+
+    def __init__(self, labels: Sequence[str], rows: np.ndarray, weights: np.ndarray, bias: np.ndarray,
+                 temperature: float = 1.0, dim_bits: int = DIM_BITS):
+        self.labels = list(labels)
+        self.rows = rows.astype(np.int64)
+        self.weights = weights.astype(np.float32)
+        self.bias = bias.astype(np.float32)
+        self.temperature = float(temperature)
+        self.dim_bits = dim_bits
+
+    def logits(self, text: str) -> np.ndarray:
+        idx, val = features(text, self.dim_bits)
+        pos = np.searchsorted(self.rows, idx)
+        pos[pos == len(self.rows)] = 0
+        known = self.rows[pos] == idx if len(self.rows) else np.zeros(len(idx), dtype=bool)
+        return self.bias + val[known] @ self.weights[pos[known]]
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """(label, confianza calibrada)."""
+        p = _softmax(self.logits(text) / self.temperature)
+        k = int(p.argmax())
+        return self.labels[k], float(p[k])
+
+    def save(self, path: Path) -> int:
+        """Escritura atómica (tmp + rename) para que los workers nunca lean un archivo a medias. Devuelve bytes."""
+        buf = io.BytesIO()
+        np.savez_compressed(
+            buf,
+            version=np.int32(FORMAT_VERSION),
+            labels=np.array(self.labels),
+            rows=self.rows.astype(np.int32),
+            weights=self.weights.astype(np.float16),
+            bias=self.bias,
+            temperature=np.float32(self.temperature),
+            dim_bits=np.int32(self.dim_bits),
+        )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(buf.getvalue())
+        os.replace(tmp, path)
+        return len(buf.getvalue())
+
+    @classmethod
+    def load(cls, path: Path) -> "IntentModel":
+        with np.load(path, allow_pickle=False) as z:
+            if int(z["version"]) != FORMAT_VERSION:
+                raise ValueError(f"unsupported intent model version {int(z['version'])}")
+            return cls(
+                labels=[str(x) for x in z["labels"]],
+                rows=z["rows"],
+                weights=z["weights"],
+                bias=z["bias"],
+                temperature=float(z["temperature"]),
+                dim_bits=int(z["dim_bits"]),
+            )
+
+
+# --- entrenamiento ---
+
+def _design(texts: Sequence[str], dim_bits: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Matriz esparsa en formato COO: (fila, bucket, valor)."""
+    rows, cols, vals = [], [], []
+    for i, text in enumerate(texts):
+        idx, val = features(text, dim_bits)
+        rows.append(np.full(len(idx), i, dtype=np.int64))
+        cols.append(idx)
+        vals.append(val)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(vals)
+
+
+def _fit(r: np.ndarray, c: np.ndarray, v: np.ndarray, y: np.ndarray, n: int, n_features: int, n_labels: int,
+         epochs: int, lr: float, l2: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Regresión logística multinomial, batch completo con Adam (los datos de un tenant entran en memoria)."""
+    W = np.zeros((n_features, n_labels), dtype=np.float64)
+    b = np.zeros(n_labels, dtype=np.float64)
+    Y = np.eye(n_labels)[y]
+    mW, vW, mb, vb = np.zeros_like(W), np.zeros_like(W), np.zeros_like(b), np.zeros_like(b)
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    for t in range(1, epochs + 1):
+        Z = np.tile(b, (n, 1))
+        np.add.at(Z, r, v[:, None] * W[c])
+        G = (_softmax(Z) - Y) / n
+        gW = l2 * W
+        np.add.at(gW, c, v[:, None] * G[r])
+        gb = G.sum(axis=0)
+        mW = beta1 * mW + (1 - beta1) * gW
+        vW = beta2 * vW + (1 - beta2) * gW ** 2
+        mb = beta1 * mb + (1 - beta1) * gb
+        vb = beta2 * vb + (1 - beta2) * gb ** 2
+        step = lr * np.sqrt(1 - beta2 ** t) / (1 - beta1 ** t)
+        W -= step * mW / (np.sqrt(vW) + eps)
+        b -= step * mb / (np.sqrt(vb) + eps)
+    return W, b
+
+
+def _fit_temperature(Z: np.ndarray, y: np.ndarray) -> float:
+    """
+    Temperature scaling: el T que minimiza la NLL del holdout (grilla log; un parámetro no necesita más).
+    Sólo T >= 1: el holdout sale de la misma distribución que el train y no justifica afilar la confianza
+    para mensajes fuera de ella.
+    """
+    best_t, best_nll = 1.0, np.inf
+    for t in np.exp(np.linspace(0.0, np.log(10.0), 40)):
+        p = _softmax(Z / t)[np.arange(len(y)), y]
+        nll = -np.log(np.clip(p, 1e-12, None)).mean()
+        if nll < best_nll:
+            best_t, best_nll = float(t), nll
+    return best_t
+
+
+def train(texts: Sequence[str], labels: Sequence[str], dim_bits: int = DIM_BITS, epochs: int = 150,
+          lr: float = 0.1, l2: float = 1e-4, holdout: float = 0.2, min_confidence: float = MIN_CONFIDENCE,
+          seed: int = 0) -> Tuple[IntentModel, Dict[str, float]]:
+    """
+    Entrena sobre (1 - holdout) y calibra la temperatura sobre el holdout.
+    Devuelve (modelo, métricas del holdout: accuracy, cobertura y accuracy por encima del umbral).
+    """
+    classes = sorted(set(labels))
+    y_all = np.array([classes.index(l) for l in labels], dtype=np.int64)
+    order = np.random.default_rng(seed).permutation(len(texts))
+    n_hold = int(len(texts) * holdout) if len(classes) > 1 else 0
+    hold, fit = order[:n_hold], order[n_hold:]
+
+    r, c, v = _design([texts[i] for i in fit], dim_bits)
+    vocab, c_local = np.unique(c, return_inverse=True)
+    W, b = _fit(r, c_local, v, y_all[fit], len(fit), len(vocab), len(classes), epochs, lr, l2)
+    model = IntentModel(classes, vocab, W, b, dim_bits=dim_bits)
+
+    metrics: Dict[str, float] = {"train": float(len(fit)), "holdout": float(n_hold)}
+    if n_hold:
+        Z = np.stack([model.logits(texts[i]) for i in hold])
+        y_hold = y_all[hold]
+        model.temperature = _fit_temperature(Z, y_hold)
+        p = _softmax(Z / model.temperature)
+        pred, conf = p.argmax(axis=1), p.max(axis=1)
+        covered = conf >= min_confidence
+        metrics.update(
+            accuracy=float((pred == y_hold).mean()),
+            coverage=float(covered.mean()),
+            covered_accuracy=float((pred[covered] == y_hold[covered]).mean()) if covered.any() else 0.0,
+        )
+    metrics["temperature"] = model.temperature
+    return model, metrics
+
+
+def plain_freeform(policy: Optional[dict]) -> bool:
+    """La policy que responde el fast path local: FREEFORM sin template, handoff ni block."""
+    policy = policy or {}
+    return (
+        str(policy.get("response_mode") or "").upper() == "FREEFORM"
+        and not policy.get("template_key")
+        and not policy.get("handoff")
+        and not policy.get("block")
+    )
+
+
+def training_pairs(tenant: Tenant, since_days: int = 90) -> List[Tuple[str, str]]:
+    """
+    (texto, primary_event) del log de decisiones. Sólo turnos clasificados por el LLM con ventana abierta:
+    las predicciones del propio modelo local no se usan como etiqueta.
+    El fast path local responde siempre FREEFORM plano, así que una etiqueta para la que el LLM pidió
+    alguna vez handoff / template / block queda fuera del modelo (esos turnos siguen yendo al LLM).
+    """
+    since = timezone.now() - timedelta(days=since_days)
+    qs = (
+        MotorDecision.objects.filter(tenant_id=tenant.tenant_key, classifier="llm", created_at__gte=since)
+        .exclude(window_open=False)
+        .exclude(primary_event__in=EXCLUDED_LABELS)
+        .exclude(text_in="")
+        .values_list("text_in", "primary_event", "policy_json")
+        .iterator(chunk_size=2000)
+    )
+    rows = list(qs)
+    escalated = {label for _, label, policy in rows if not plain_freeform(policy)}
+    return [(text, label) for text, label, _ in rows if label not in escalated]
+
+
+# --- runtime ---
+
+_loaded: Dict[str, Tuple[float, Optional[IntentModel]]] = {}
+
+
+def model_path(tenant_key: str) -> Path:
+    return MODEL_DIR / f"{tenant_key}.npz"
+
+
+def model_for(tenant: Tenant) -> Optional[IntentModel]:
+    """Modelo del tenant, recargado cuando cambia el mtime del archivo (un re-entrenamiento no requiere reinicio)."""
+    path = model_path(tenant.tenant_key)
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        _loaded.pop(tenant.tenant_key, None)
+        return None
+    hit = _loaded.get(tenant.tenant_key)
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+    try:
+        model = IntentModel.load(path)
+    except Exception:
+        model = None  # archivo corrupto / versión vieja: LLM hasta que se re-entrene
+    _loaded[tenant.tenant_key] = (mtime, model)
+    return model
+
+
+def predict_event(text: str, tenant: Tenant, allowed: Iterable[str]) -> Optional[Tuple[str, float]]:
+    """(primary_event, confianza) si el modelo local alcanza MIN_CONFIDENCE con un evento activo; si no None (=> LLM)."""
+    model = model_for(tenant)
+    if model is None or not text:
+        return None
+    label, confidence = model.predict(text)
+    if confidence < MIN_CONFIDENCE or label not in set(allowed):
+        return None
+    return label, confidence
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import logging
+import os
+from datetime import timedelta
+from typing import List, Tuple
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from whatsapp_inbound.ids import uuid7
+from whatsapp_inbound.models import MotorJob, OutboxEvent
+
+from .schemas import MotorRespondIn, MotorRespondOut
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = int(os.getenv("MOTOR_JOB_MAX_ATTEMPTS", "3"))
+# Mismo TTL que usa /v1/motor/respond para devolver la respuesta cacheada a reintentos
+RESPONSE_TTL = 86400
+
+
+def response_cache_key(tenant_id: str, turn_wamid: str) -> str:
+    return f"motor:response:{tenant_id}:{turn_wamid}"
+
+
+def enqueue_motor_job(payload: MotorRespondIn) -> Tuple[MotorJob, bool]:
+    """(job, created). Un turno con turn_wamid se encola una sola vez; sin wamid no hay dedupe."""
+    wamid = (payload.turn_wamid or "").strip()
+    dedupe_key = f"{payload.tenant_id}::{wamid}::MOTOR_JOB" if wamid else f"{payload.tenant_id}::{uuid7()}::MOTOR_JOB"
+    return MotorJob.objects.get_or_create(
+        dedupe_key=dedupe_key,
+        defaults={
+            "tenant_id": payload.tenant_id,
+            "contact_key": payload.contact_key,
+            "turn_wamid": payload.turn_wamid,
+            "payload_json": payload.model_dump(mode="json"),
+        },
+    )
+
+
+def claim_jobs(batch_size: int, worker_id: str) -> List[MotorJob]:
+    """Reclama jobs pendientes con SKIP LOCKED: varios workers no toman el mismo job."""
+    with transaction.atomic():
+        now = timezone.now()
+        jobs = list(
+            MotorJob.objects.select_for_update(skip_locked=True)
+            .filter(status=MotorJob.STATUS_PENDING, next_retry_at__lte=now)
+            .order_by("created_at")[:batch_size]
+        )
+        for job in jobs:
+            job.status = MotorJob.STATUS_PROCESSING
+            job.attempts = (job.attempts or 0) + 1
+            job.locked_at = now
+            job.locked_by = worker_id
+            job.updated_at = now
+            job.save(update_fields=["status", "attempts", "locked_at", "locked_by", "updated_at"])
+        return jobs
+
+
+def _publish(job: MotorJob, payload_json: dict):
+    wamid = (job.turn_wamid or "").strip() or str(job.id)
+    try:
+        with transaction.atomic():
+            OutboxEvent.objects.create(
+                topic=OutboxEvent.TOPIC_MOTOR_DECIDED,
+                tenant_id=job.tenant_id,
+                contact_key=job.contact_key,
+                turn_wamid=job.turn_wamid,
+                dedupe_key=f"{job.tenant_id}::{wamid}::MOTOR_DECIDED",
+                payload_json=payload_json,
+                status=OutboxEvent.STATUS_PENDING,
+                next_retry_at=timezone.now(),
+            )
+    except IntegrityError:
+        # ya publicado (job re-ejecutado tras un reaper)
+        pass
+
+
+def run_motor_job(job: MotorJob) -> bool:
+    """
+    Ejecuta el turno y publica MOTOR_DECIDED en la misma transacción que marca el job como done.
+    Errores: reintento con backoff hasta MAX_ATTEMPTS; después failed + MOTOR_DECIDED con ok=False.
+    """
+    from .api import _motor_respond_impl
+
+    payload = MotorRespondIn(**job.payload_json)
+    try:
+        result = MotorRespondOut(**_motor_respond_impl(payload)).model_dump(mode="json")
+    except Exception as e:
+        logger.exception(f"[MOTOR JOB] {job.id} failed (attempt {job.attempts})")
+        _fail(job, str(e))
+        return False
+
+    with transaction.atomic():
+        job.status = MotorJob.STATUS_DONE
+        job.result_json = result
+        job.error = None
+        job.save(update_fields=["status", "result_json", "error", "updated_at"])
+        _publish(job, {"job_id": str(job.id), **result})
+
+    if payload.turn_wamid and payload.turn_wamid.strip():
+        cache.set(response_cache_key(payload.tenant_id, payload.turn_wamid), result, timeout=RESPONSE_TTL)
+    return True
+
+
+def _fail(job: MotorJob, err: str):
+    now = timezone.now()
+    job.error = err[:2000]
+    if job.attempts < MAX_ATTEMPTS:
+        job.status = MotorJob.STATUS_PENDING
+        job.next_retry_at = now + timedelta(seconds=min(60, 2 ** min(job.attempts, 6)))
+        job.save(update_fields=["status", "error", "next_retry_at", "updated_at"])
+        return
+
+    with transaction.atomic():
+        job.status = MotorJob.STATUS_FAILED
+        job.save(update_fields=["status", "error", "updated_at"])
+        _publish(job, {
+            "ok": False,
+            "job_id": str(job.id),
+            "tenant_id": job.tenant_id,
+            "contact_key": job.contact_key,
+            "turn": {"turn_wamid": job.turn_wamid, "text_in": job.payload_json.get("text")},
+            "error": job.error,
+        })
+
+
+def reap_stuck_jobs(processing_ttl: int) -> int:
+    """Devuelve a pending los jobs 'processing' de workers que murieron a mitad de turno."""
+    cutoff = timezone.now() - timedelta(seconds=processing_ttl)
+    return MotorJob.objects.filter(status=MotorJob.STATUS_PROCESSING, updated_at__lt=cutoff).update(
+        status=MotorJob.STATUS_PENDING, locked_at=None, locked_by=None, updated_at=timezone.now()
+    )
@@ -2,15 +2,23 @@ from __future__ import annotations
 
 import json
 import os
-from typing import Any, Dict, List, Optional
+import re
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
 
 # OpenAI SDK (nuevo)
 # pip install openai
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+from .deadline import DeadlineExceeded, call_llm
 
 
 def _client() -> OpenAI:
-    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    # Sin reintentos del SDK: los decide call_llm según el presupuesto que queda
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+
+def _async_client() -> AsyncOpenAI:
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 
 def classify_with_openai(
@@ -44,7 +52,7 @@ def classify_with_openai(
     print(f"\n--- DEBUG LLM INPUT ---\n{full_context_json}\n--- END DEBUG ---")
 
     try:
-        resp = c.responses.create(
+        resp = call_llm("classifier", lambda timeout: c.responses.create(
             prompt={
                 "id": prompt_id,
                 "variables": {
@@ -64,7 +72,8 @@ def classify_with_openai(
                 }
             },
             max_output_tokens=2048,
-        )
+            timeout=min(timeout, timeout_s),
+        ))
 
         # Extraer texto final
         out_text = ""
@@ -72,6 +81,13 @@ def classify_with_openai(
             # Asumiendo que el contenido es texto
             out_text = resp.output[0].content[0].text or ""
 
+    except DeadlineExceeded:
+        # Presupuesto agotado: api.py cae en su rama FALLBACK / REOPEN_24H
+        return {
+            "ok": False,
+            "error": "LLM_DEADLINE_EXCEEDED",
+            "raw": ""
+        }
     except Exception as e:
         # En caso de error, devolvemos estructura de error para que no rompa el flujo
         return {
@@ -178,7 +194,7 @@ RULES:
     user_text = json.dumps(user_input_json, ensure_ascii=False)
 
     try:
-        resp = c.chat.completions.create(
+        resp = call_llm("extractor", lambda timeout: c.chat.completions.create(
             model=model,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -186,8 +202,9 @@ RULES:
             ],
             response_format={"type": "json_object"},
             temperature=0.0, # Determinístico
-            max_tokens=512
-        )
+            max_tokens=512,
+            timeout=timeout,
+        ))
         
         out_text = resp.choices[0].message.content or "{}"
         parsed = json.loads(out_text)
@@ -211,18 +228,7 @@ RULES:
         }
 
 
-def generate_draft(
-    *,
-    input_json: Dict[str, Any],
-) -> str:
-    """
-    Función específica para el DRAFTER (Boca).
-    Utiliza un prompt INLINE para redactar el mensaje final basado en la estrategia decidida.
-    """
-    c = _client()
-    model = os.getenv("LLM_DRAFTER_MODEL", "gpt-4o")
-
-    system_prompt = """
+DRAFTER_SYSTEM_PROMPT = """
 You are a PROFESSIONAL SALES DRAFTER for a car dealership.
 Your ONLY job is to write the final message to the customer based on the provided STRATEGY and CONTEXT.
 
@@ -243,20 +249,36 @@ RULES:
 7. Return ONLY the message text. No JSON, no markdown, no quotes.
 
 GOAL: Write a message that moves the sale forward according to the objective.
-    """.strip()
+""".strip()
+
+DRAFT_FALLBACK = "Hola, gracias por escribirnos. ¿En qué podemos ayudarte hoy?"
 
+
+def _drafter_request(input_json: Dict[str, Any]) -> Dict[str, Any]:
     user_text = json.dumps(input_json, ensure_ascii=False)
+    return {
+        "model": os.getenv("LLM_DRAFTER_MODEL", "gpt-4o"),
+        "messages": [
+            {"role": "system", "content": DRAFTER_SYSTEM_PROMPT},
+            {"role": "user", "content": f"INPUT_CONTEXT: {user_text}"}
+        ],
+        "temperature": 0.5,  # Un poco de creatividad para redacción
+        "max_tokens": 300,
+    }
+
+
+def generate_draft(
+    *,
+    input_json: Dict[str, Any],
+) -> str:
+    """
+    Función específica para el DRAFTER (Boca).
+    Utiliza un prompt INLINE para redactar el mensaje final basado en la estrategia decidida.
+    """
+    c = _client()
 
     try:
-        resp = c.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"INPUT_CONTEXT: {user_text}"}
-            ],
-            temperature=0.5, # Un poco de creatividad para redacción
-            max_tokens=300
-        )
+        resp = call_llm("drafter", lambda timeout: c.chat.completions.create(**_drafter_request(input_json), timeout=timeout))
         
         draft = resp.choices[0].message.content or ""
         return draft.strip()
@@ -264,7 +286,84 @@ GOAL: Write a message that moves the sale forward according to the objective.
     except Exception as e:
         print(f"DRAFTER ERROR: {e}")
         # Fallback seguro
-        return "Hola, gracias por escribirnos. ¿En qué podemos ayudarte hoy?"
+        return DRAFT_FALLBACK
+
+
+def _delta_text(chunk) -> str:
+    if not chunk.choices:
+        return ""
+    return chunk.choices[0].delta.content or ""
+
+
+def stream_draft(
+    *,
+    input_json: Dict[str, Any],
+) -> Iterator[str]:
+    """
+    Igual que generate_draft pero con la API de streaming: emite los fragmentos a medida que llegan.
+    Si falla antes del primer fragmento emite el fallback; si falla a mitad, corta ahí.
+    """
+    emitted = False
+    try:
+        for chunk in _client().chat.completions.create(**_drafter_request(input_json), stream=True):
+            text = _delta_text(chunk)
+            if text:
+                emitted = True
+                yield text
+    except Exception as e:
+        print(f"DRAFTER STREAM ERROR: {e}")
+        if not emitted:
+            yield DRAFT_FALLBACK
+
+
+async def astream_draft(
+    *,
+    input_json: Dict[str, Any],
+) -> AsyncIterator[str]:
+    """Variante async (ASGI): no ocupa un hilo por stream mientras se espera al modelo."""
+    emitted = False
+    try:
+        stream = await _async_client().chat.completions.create(**_drafter_request(input_json), stream=True)
+        async for chunk in stream:
+            text = _delta_text(chunk)
+            if text:
+                emitted = True
+                yield text
+    except Exception as e:
+        print(f"DRAFTER STREAM ERROR: {e}")
+        if not emitted:
+            yield DRAFT_FALLBACK
+
+
+# Fin de oración seguido de espacio, o salto de línea
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+
+class SentenceChunker:
+    """
+    Agrupa fragmentos del stream en oraciones completas para enviarlas como mensajes de WhatsApp.
+    Oraciones más cortas que min_chars se juntan con la siguiente (evita mensajes sueltos tipo "Hola!").
+    """
+
+    def __init__(self, min_chars: int = 20):
+        self.min_chars = min_chars
+        self._buf = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buf += text
+        out: List[str] = []
+        start = 0
+        for m in _SENTENCE_END.finditer(self._buf):
+            piece = self._buf[start:m.start()].strip()
+            if len(piece) >= self.min_chars:
+                out.append(piece)
+                start = m.end()
+        self._buf = self._buf[start:]
+        return out
+
+    def flush(self) -> Optional[str]:
+        rest, self._buf = self._buf.strip(), ""
+        return rest or None
 
 
 def build_classifier_input(
@@ -0,0 +1,418 @@
+from __future__ import annotations
+
+import os
+import re
+import unicodedata
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from whatsapp_inbound.catalog_cache import get_catalog
+from whatsapp_inbound.models import Tenant, TenantVehicle
+
+# Por encima de esta confianza la extracción local es la respuesta; por debajo se consulta al LLM
+MIN_CONFIDENCE = float(os.getenv("LOCAL_EXTRACTOR_MIN_CONFIDENCE", "0.7"))
+
+# Gazetteer base (mercado AR). El del tenant (TenantVehicle) se agrega delante y sus alias ganan.
+DEFAULT_VEHICLES: List[Dict[str, Any]] = [
+    {"make": "Toyota", "model": "Corolla Cross", "trims": ["XLI", "XEI", "SEG", "GR-Sport"]},
+    {"make": "Toyota", "model": "Corolla", "trims": ["XLI", "XEI", "SEG", "GR-Sport"], "aliases": ["corola"]},
+    {"make": "Toyota", "model": "Hilux", "trims": ["DX", "SR", "SRV", "SRX", "GR-Sport"]},
+    {"make": "Toyota", "model": "SW4", "trims": ["SRV", "SRX", "Diamond", "GR-Sport"]},
+    {"make": "Toyota", "model": "Etios", "trims": ["X", "XS", "XLS"]},
+    {"make": "Toyota", "model": "Yaris", "trims": ["XS", "XLS", "S"]},
+    {"make": "Volkswagen", "model": "Amarok", "trims": ["Trendline", "Comfortline", "Highline", "Extreme", "V6"]},
+    {"make": "Volkswagen", "model": "Gol Trend", "trims": ["Trendline", "Comfortline", "Highline"]},
+    {"make": "Volkswagen", "model": "Gol", "trims": ["Trendline", "Comfortline", "Highline"]},
+    {"make": "Volkswagen", "model": "Polo", "trims": ["Track", "Trendline", "Comfortline", "Highline", "GTS"]},
+    {"make": "Volkswagen", "model": "Virtus", "trims": ["Trendline", "Comfortline", "Highline", "Exclusive"]},
+    {"make": "Volkswagen", "model": "T-Cross", "trims": ["Trendline", "Comfortline", "Highline"], "aliases": ["tcross"]},
+    {"make": "Volkswagen", "model": "Taos", "trims": ["Comfortline", "Highline", "Hero"]},
+    {"make": "Volkswagen", "model": "Vento", "trims": ["Comfortline", "Highline", "GLI"]},
+    {"make": "Ford", "model": "Ranger", "trims": ["XL", "XLS", "XLT", "Limited", "Raptor"]},
+    {"make": "Ford", "model": "EcoSport", "trims": ["S", "SE", "Freestyle", "Titanium"], "aliases": ["eco sport"]},
+    {"make": "Ford", "model": "Territory", "trims": ["SEL", "Titanium"]},
+    {"make": "Ford", "model": "Maverick", "trims": ["XLT", "Lariat"]},
+    {"make": "Ford", "model": "Focus", "trims": ["S", "SE", "Titanium"]},
+    {"make": "Chevrolet", "model": "Onix", "trims": ["LT", "LTZ", "Premier", "RS"]},
+    {"make": "Chevrolet", "model": "Cruze", "trims": ["LT", "LTZ", "Premier", "RS"]},
+    {"make": "Chevrolet", "model": "Tracker", "trims": ["LT", "LTZ", "Premier", "RS"]},
+    {"make": "Chevrolet", "model": "S10", "trims": ["LS", "LT", "LTZ", "High Country", "Z71"]},
+    {"make": "Chevrolet", "model": "Spin", "trims": ["LT", "LTZ", "Activ"]},
+    {"make": "Fiat", "model": "Cronos", "trims": ["Like", "Drive", "Precision"]},
+    {"make": "Fiat", "model": "Argo", "trims": ["Drive", "Trekking", "HGT"]},
+    {"make": "Fiat", "model": "Toro", "trims": ["Freedom", "Volcano", "Ranch", "Ultra"]},
+    {"make": "Fiat", "model": "Strada", "trims": ["Endurance", "Freedom", "Volcano", "Ranch"]},
+    {"make": "Fiat", "model": "Pulse", "trims": ["Drive", "Audace", "Impetus", "Abarth"]},
+    {"make": "Fiat", "model": "Mobi", "trims": ["Like", "Way", "Trekking"]},
+    {"make": "Renault", "model": "Sandero Stepway", "trims": ["Zen", "Intens"], "aliases": ["stepway"]},
+    {"make": "Renault", "model": "Sandero", "trims": ["Life", "Zen", "Intens", "RS"]},
+    {"make": "Renault", "model": "Logan", "trims": ["Life", "Zen", "Intens"]},
+    {"make": "Renault", "model": "Kangoo", "trims": ["Life", "Zen", "Stepway"]},
+    {"make": "Renault", "model": "Duster", "trims": ["Zen", "Intens", "Iconic"]},
+    {"make": "Renault", "model": "Alaskan", "trims": ["Confort", "Emotion", "Iconic"]},
+    {"make": "Renault", "model": "Kwid", "trims": ["Life", "Zen", "Intens", "Outsider"]},
+    {"make": "Peugeot", "model": "208", "trims": ["Like", "Active", "Allure", "Feline", "GT"]},
+    {"make": "Peugeot", "model": "2008", "trims": ["Active", "Allure", "Feline", "GT"]},
+    {"make": "Peugeot", "model": "308", "trims": ["Active", "Allure", "Feline", "GT"]},
+    {"make": "Peugeot", "model": "408", "trims": ["Active", "Allure", "Feline", "GT"]},
+    {"make": "Peugeot", "model": "3008", "trims": ["Allure", "GT"]},
+    {"make": "Peugeot", "model": "Partner", "trims": ["Confort", "Patagonica"]},
+    {"make": "Citroën", "model": "C4 Cactus", "trims": ["Feel", "Shine"], "aliases": ["cactus"]},
+    {"make": "Citroën", "model": "C3", "trims": ["Live", "Feel", "Shine"]},
+    {"make": "Citroën", "model": "Berlingo", "trims": ["Business", "Multispace"]},
+    {"make": "Nissan", "model": "Frontier", "trims": ["S", "SE", "XE", "LE", "Pro-4X"]},
+    {"make": "Nissan", "model": "Kicks", "trims": ["Sense", "Advance", "Exclusive"]},
+    {"make": "Nissan", "model": "Versa", "trims": ["Sense", "Advance", "Exclusive"]},
+    {"make": "Nissan", "model": "Sentra", "trims": ["Sense", "Advance", "Exclusive"]},
+    {"make": "Honda", "model": "HR-V", "trims": ["LX", "EX", "EXL"], "aliases": ["hrv"]},
+    {"make": "Honda", "model": "CR-V", "trims": ["LX", "EX", "EXL"], "aliases": ["crv"]},
+    {"make": "Honda", "model": "Civic", "trims": ["EX", "EXL", "EXT", "Type R"]},
+    {"make": "Honda", "model": "Fit", "trims": ["LX", "EX", "EXL"]},
+    {"make": "Jeep", "model": "Renegade", "trims": ["Sport", "Longitude", "Trailhawk"]},
+    {"make": "Jeep", "model": "Compass", "trims": ["Sport", "Longitude", "Limited", "Trailhawk"]},
+    {"make": "Jeep", "model": "Commander", "trims": ["Limited", "Overland"]},
+    {"make": "Hyundai", "model": "Tucson", "trims": ["GL", "GLS"]},
+    {"make": "Hyundai", "model": "Creta", "trims": ["Safety", "Limited", "Ultimate"]},
+    {"make": "Hyundai", "model": "HB20", "trims": ["Comfort", "Platinum"]},
+]
+
+MAKE_ALIASES = {"volkswagen": ["vw", "volks"], "chevrolet": ["chevy", "chevro"]}
+
+CITY_NAMES = {
+    "caba": "CABA", "capital federal": "CABA", "capital": "CABA",
+    "buenos aires": "Buenos Aires", "gba": "Buenos Aires", "zona norte": "Buenos Aires", "zona sur": "Buenos Aires",
+    "cordoba": "Córdoba", "rosario": "Rosario", "mendoza": "Mendoza", "la plata": "La Plata",
+    "mar del plata": "Mar del Plata", "tucuman": "Tucumán", "salta": "Salta", "santa fe": "Santa Fe",
+    "neuquen": "Neuquén", "bahia blanca": "Bahía Blanca", "san juan": "San Juan", "parana": "Paraná",
+    "corrientes": "Corrientes", "posadas": "Posadas", "resistencia": "Resistencia", "san luis": "San Luis",
+    "rio cuarto": "Río Cuarto", "villa maria": "Villa María", "comodoro rivadavia": "Comodoro Rivadavia",
+    "san rafael": "San Rafael", "jujuy": "Jujuy", "santiago del estero": "Santiago del Estero",
+}
+
+# (intent, patrón) en orden de prioridad: si matchean varios, gana el primero
+INTENT_RULES: List[Tuple[str, str]] = [
+    ("HANDOFF_REQUEST", r"hablar con (?:un|una|alguien|el|la)\b|asesor|vendedor|persona real|humano|llam(?:en|ame|enme)"),
+    ("BOOK_TEST_DRIVE", r"test ?drive|prueba de manejo|probarl[oa]|manejarl[oa]"),
+    ("SCHEDULE_VISIT", r"visitar(?:los)?|pasar por|ir a verl[oa]|agendar|sacar turno|donde (?:estan|quedan)|direccion"),
+    ("ASK_FINANCING", r"financ\w*|cuotas?|credito|prendario|plan de ahorro|tasa"),
+    ("ASK_PRICE", r"precio|cuanto (?:sale|cuesta|esta|vale|seria)|valor|cotiza\w*"),
+    ("ASK_AVAILABILITY", r"tienen|tenes|hay (?:stock|unidad(?:es)?|disponib\w*)|disponib\w*|stock|entrega inmediata"),
+    ("COMPLAINT", r"queja|reclamo|pesimo|malisimo|denuncia"),
+    ("GREETING", r"hola|buen(?:as|os)?(?: (?:dias|tardes|noches))?"),
+]
+
+OBJECTION_RULES: List[Tuple[str, str]] = [
+    ("PRICE_TOO_HIGH", r"(?:muy |re )?caro|carisimo|fuera de (?:mi )?presupuesto|no me alcanza"),
+    ("COMPETITOR", r"otra (?:concesionaria|agencia)|mas barato en|me ofrecieron"),
+    ("TIMING", r"mas adelante|no por ahora|el ano que viene|todavia no"),
+    ("NO_STOCK", r"no (?:tienen|hay) stock|sin stock"),
+]
+
+PAYMENT_RULES: List[Tuple[str, str]] = [
+    ("cash", r"contado|efectivo|cash"),
+    ("finance", r"financ\w*|cuotas?|credito|prendario|plan de ahorro"),
+    ("lease", r"leasing"),
+]
+
+TIMEFRAME_RULES: List[Tuple[str, str]] = [
+    ("immediate", r"hoy|urgente|cuanto antes|ya mismo|esta semana"),
+    ("this_month", r"este mes"),
+    ("next_months", r"(?:el )?mes que viene|proximo mes|en (?:unos |un par de )?(?:\d+ )?meses"),
+]
+
+RISK_WORDS = r"puta|mierda|idiota|estafa|estafadores|chorros|hdp|forro"
+
+NEW_USED_RULES: List[Tuple[str, str]] = [
+    ("new", r"0 ?km|cero ?km|nuev[oa]s?"),
+    ("used", r"usad[oa]s?|seminuev[oa]|de segunda"),
+]
+
+# Palabras que no aportan significado: no cuentan como "texto sin entender"
+STOPWORDS = set("""
+a al algo alguno algun ante con como cual cuando de del el ella en entre era es esa ese eso esta este esto
+estoy la las le les lo los me mi mis muy nada ni no nos o para pero por que quiero queria quisiera saber se
+si sin so sobre soy su sus te tu tus un una uno unos unas y ya yo vos ustedes gracias porfa favor info
+informacion consulta consultar ver auto autos camioneta modelo version ano busco buscando tengo necesito
+pago pagar poner anticipo entrega presupuesto
+""".split())
+
+_NUM = r"\d{1,3}(?:[.,]\d{3})+|\d+(?:[.,]\d+)?"
+_BUDGET = re.compile(
+    r"(?P<pre>usd|u\$s|us\$|u\$d|\$)?\s*(?P<num>" + _NUM + r")\s*"
+    r"(?P<mult>k|mil|lucas?|palos?|millon(?:es)?|m)?\b\s*"
+    r"(?P<post>usd|u\$s|us\$|dolares|dolar|verdes|pesos)?"
+)
+_MULT = {"k": 1_000, "mil": 1_000, "luca": 1_000, "lucas": 1_000, "palo": 1_000_000, "palos": 1_000_000,
+         "millon": 1_000_000, "millones": 1_000_000, "m": 1_000_000}
+_USD = {"usd", "u$s", "us$", "u$d", "dolares", "dolar", "verdes"}
+# sin dígitos pegados ni forma de separador de miles ("2.019.000"); la puntuación normal sí ("2019, usada")
+_YEAR = re.compile(r"(?<![\d$])(?<!\d[.,])(19[89]\d|20[0-4]\d)(?!\d|[.,]\d)")
+# "hay" suelto es ambiguo ("no hay problema"): cuenta como ASK_AVAILABILITY sólo pegado a un vehículo
+_HAY = re.compile(r"(?<![a-z0-9])hay (?:(?:un|una|unos|unas|algun|alguna|algo de) )?")
+_TOKEN = re.compile(r"[a-z0-9$]+")
+
+
+def normalize(text: str) -> str:
+    """minúsculas, sin acentos y con espacios simples (los patrones se escriben sobre esto)."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r"\s+", " ", text.lower()).strip()
+
+
+def _key(phrase: str) -> str:
+    """Clave de lookup: "T-Cross", "t cross" y "tcross" son lo mismo."""
+    return re.sub(r"[\s-]+", "", phrase)
+
+
+def _alternation(phrases: Iterable[str]) -> re.Pattern:
+    # más largas primero: "corolla cross" antes que "corolla"
+    ordered = sorted({p for p in phrases if p}, key=len, reverse=True)
+    body = "|".join(r"[\s-]?".join(map(re.escape, re.split(r"[\s-]+", p))) for p in ordered) or r"(?!)"
+    return re.compile(r"(?<![a-z0-9])(" + body + r")(?![a-z0-9])")
+
+
+def _rules(rules: List[Tuple[str, str]]) -> List[Tuple[str, re.Pattern]]:
+    return [(label, re.compile(r"(?<![a-z0-9])(?:" + pattern + r")(?![a-z0-9])")) for label, pattern in rules]
+
+
+_INTENTS = _rules(INTENT_RULES)
+_OBJECTIONS = _rules(OBJECTION_RULES)
+_PAYMENTS = _rules(PAYMENT_RULES)
+_TIMEFRAMES = _rules(TIMEFRAME_RULES)
+_NEW_USED = _rules(NEW_USED_RULES)
+_RISK = re.compile(r"(?<![a-z0-9])(?:" + RISK_WORDS + r")(?![a-z0-9])")
+_CITIES = _alternation(CITY_NAMES)
+CITIES = {_key(alias): city for alias, city in CITY_NAMES.items()}
+
+
+class Gazetteer:
+    """Marcas/modelos/versiones compilados a una alternation por tipo (un solo pase de regex cada uno)."""
+
+    def __init__(self, vehicles: List[Dict[str, Any]]):
+        self.models: Dict[str, Tuple[str, str]] = {}  # alias -> (make, model)
+        self.makes: Dict[str, str] = {}  # alias -> make
+        self.trims: Dict[Tuple[str, str], Dict[str, str]] = {}  # (make, model) -> {alias: trim}
+        aliases = {"models": set(), "makes": set()}
+        for v in vehicles:
+            make, model = v["make"], v["model"]
+            for alias in [model, *(v.get("aliases") or [])]:
+                aliases["models"].add(normalize(alias))
+                self.models.setdefault(_key(normalize(alias)), (make, model))
+            aliases["makes"].add(normalize(make))
+            self.makes.setdefault(_key(normalize(make)), make)
+            trims = self.trims.setdefault((make, model), {})
+            for trim in v.get("trims") or []:
+                trims.setdefault(_key(normalize(trim)), trim)
+        for canonical, extra in MAKE_ALIASES.items():
+            make = self.makes.get(_key(canonical))
+            for alias in extra if make else ():
+                aliases["makes"].add(alias)
+                self.makes.setdefault(_key(alias), make)
+
+        self._model_re = _alternation(aliases["models"])
+        self._make_re = _alternation(aliases["makes"])
+        self._trim_re = {
+            key: _alternation(normalize(t) for t in trims.values())
+            for key, trims in self.trims.items() if trims
+        }
+
+    def match(self, norm: str) -> Tuple[Dict[str, Optional[str]], List[Tuple[int, int]]]:
+        spans: List[Tuple[int, int]] = []
+        make = model = trim = None
+
+        m = self._make_re.search(norm)
+        if m:
+            make = self.makes[_key(m.group(1))]
+            spans.append(m.span())
+
+        for m in self._model_re.finditer(norm):
+            found = self.models[_key(m.group(1))]
+            # con marca explícita, sólo modelos de esa marca
+            if make and found[0] != make:
+                continue
+            make, model = found
+            spans.append(m.span())
+            break
+
+        if make and model and (make, model) in self._trim_re:
+            m = self._trim_re[(make, model)].search(norm)
+            if m:
+                trim = self.trims[(make, model)][_key(m.group(1))]
+                spans.append(m.span())
+
+        return {"make": make, "model": model, "trim": trim}, spans
+
+
+DEFAULT_GAZETTEER = Gazetteer(DEFAULT_VEHICLES)
+_compiled: Dict[str, Tuple[Any, Gazetteer]] = {}
+
+
+def _load_tenant_vehicles(tenant: Tenant) -> List[Dict[str, Any]]:
+    def load():
+        qs = TenantVehicle.objects.filter(tenant=tenant, is_active=True).order_by("name")
+        return [{"make": v.make, "model": v.model, "trims": v.trims or [], "aliases": v.aliases or []} for v in qs]
+
+    return get_catalog("vehicles", tenant.pk, load)
+
+
+def gazetteer_for(tenant: Optional[Tenant]) -> Gazetteer:
+    """Gazetteer del tenant + base. Se recompila sólo cuando cambia la versión del catálogo."""
+    if tenant is None:
+        return DEFAULT_GAZETTEER
+    vehicles = _load_tenant_vehicles(tenant)
+    if not vehicles:
+        return DEFAULT_GAZETTEER
+    key = str(tenant.pk)
+    hit = _compiled.get(key)
+    # get_catalog devuelve el mismo objeto mientras la versión no cambie
+    if hit is not None and hit[0] is vehicles:
+        return hit[1]
+    gz = Gazetteer([*vehicles, *DEFAULT_VEHICLES])
+    _compiled[key] = (vehicles, gz)
+    return gz
+
+
+def _first(rules: List[Tuple[str, re.Pattern]], norm: str, spans: List[Tuple[int, int]]) -> Optional[str]:
+    for label, pattern in rules:
+        m = pattern.search(norm)
+        if m:
+            spans.append(m.span())
+            return label
+    return None
+
+
+def _budget(norm: str, spans: List[Tuple[int, int]]) -> Optional[str]:
+    for m in _BUDGET.finditer(norm):
+        pre, mult, post = m.group("pre"), m.group("mult"), m.group("post")
+        # sin moneda ni multiplicador es un número suelto (año, kilómetros...)
+        if not (pre or mult or post):
+            continue
+        raw = m.group("num")
+        if re.fullmatch(r"\d{1,3}(?:[.,]\d{3})+", raw):
+            amount = float(re.sub(r"[.,]", "", raw))
+        else:
+            amount = float(raw.replace(",", "."))
+        amount *= _MULT.get(mult or "", 1)
+        if amount < 1_000:
+            continue
+        currency = "USD" if (pre in _USD or post in _USD) else "ARS"
+        spans.append(m.span())
+        return f"{currency} {int(amount)}"
+    return None
+
+
+def _year(norm: str, spans: List[Tuple[int, int]]) -> Optional[str]:
+    for m in _YEAR.finditer(norm):
+        if any(s <= m.start() < e for s, e in spans):
+            continue  # parte de un presupuesto
+        if 1980 <= int(m.group(1)) <= date.today().year + 1:
+            spans.append(m.span())
+            return m.group(1)
+    return None
+
+
+def _hay_vehicle(norm: str, vehicle_spans: List[Tuple[int, int]]) -> Optional[re.Match]:
+    starts = {start for start, _ in vehicle_spans}
+    for m in _HAY.finditer(norm):
+        if m.end() in starts:
+            return m
+    return None
+
+
+def _unknown_ratio(norm: str, spans: List[Tuple[int, int]]) -> Tuple[float, int]:
+    tokens = [(m.group(0), m.start()) for m in _TOKEN.finditer(norm)]
+    if not tokens:
+        return 0.0, 0
+    unknown = sum(
+        1 for tok, pos in tokens
+        if tok not in STOPWORDS and not any(s <= pos < e for s, e in spans)
+    )
+    return unknown / len(tokens), len(tokens)
+
+
+def extract_local(text: str, gazetteer: Optional[Gazetteer] = None) -> Tuple[Dict[str, Any], float]:
+    """
+    Extractor por reglas: mismo contrato que llm_classifier.extract_signals + confianza [0, 1].
+    La confianza baja con intención ambigua o ausente, objeciones (matices) y texto que ninguna regla explica.
+    """
+    norm = normalize(text)
+    spans: List[Tuple[int, int]] = []
+
+    vehicle, vehicle_spans = (gazetteer or DEFAULT_GAZETTEER).match(norm)
+
+    intents = []
+    for label, pattern in _INTENTS:
+        m = pattern.search(norm)
+        if m is None and label == "ASK_AVAILABILITY":
+            m = _hay_vehicle(norm, vehicle_spans)
+        if m:
+            intents.append(label)
+            spans.append(m.span())
+    if len(intents) > 1 and "GREETING" in intents:
+        intents.remove("GREETING")
+    intent = intents[0] if intents else "OTHER"
+    spans += vehicle_spans
+    budget = _budget(norm, spans)
+    vehicle["year"] = _year(norm, spans)
+    vehicle["new_or_used"] = _first(_NEW_USED, norm, spans)
+    commercial = {
+        "budget": budget,
+        "payment_type": _first(_PAYMENTS, norm, spans),
+        "timeframe": _first(_TIMEFRAMES, norm, spans),
+        "city": None,
+    }
+    m = _CITIES.search(norm)
+    if m:
+        commercial["city"] = CITIES.get(_key(m.group(1)))
+        spans.append(m.span())
+
+    objection = _first(_OBJECTIONS, norm, spans)
+    risk = bool(_RISK.search(norm))
+
+    confidence = 0.95
+    has_entities = any(vehicle.values()) or any(commercial.values())
+    if intent == "OTHER":
+        confidence -= 0.35 if has_entities else 0.6
+    if len(intents) > 1:
+        confidence -= 0.15
+    if objection:
+        confidence -= 0.2
+    unknown, n_tokens = _unknown_ratio(norm, spans)
+    confidence -= max(0.0, unknown - 0.35)
+    if n_tokens > 40:
+        confidence -= 0.2  # mensajes largos: matices que las reglas no capturan
+
+    signals = {
+        "intent": intent,
+        "objection": objection,
+        "risk": risk,
+        "entities": {"vehicle": vehicle, "commercial": commercial},
+    }
+    return signals, round(max(0.0, min(1.0, confidence)), 2)
+
+
+def resolve_signals(text: str, tenant: Optional[Tenant] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    (signals, telemetry). Local si la confianza alcanza MIN_CONFIDENCE; si no, extractor LLM
+    y las entidades locales completan lo que el LLM dejó en null.
+    """
+    from . import llm_classifier
+
+    local, confidence = extract_local(text, gazetteer_for(tenant))
+    if confidence >= MIN_CONFIDENCE:
+        return local, {"extractor": "local", "extractor_confidence": confidence}
+
+    signals = llm_classifier.extract_signals(user_input_json={"text": text})
+    # el fallback por error del extractor LLM devuelve GENERAL: ahí la intención local es mejor
+    if signals.get("intent") in (None, "GENERAL") and local["intent"] != "OTHER":
+        signals["intent"] = local["intent"]
+    entities = signals.setdefault("entities", {}) or {}
+    for group, values in local["entities"].items():
+        merged = dict(entities.get(group) or {})
+        for k, v in values.items():
+            if v and not merged.get(k):
+                merged[k] = v
+        entities[group] = merged
+    signals["entities"] = entities
+    signals["risk"] = bool(signals.get("risk")) or local["risk"]
+    return signals, {"extractor": "llm", "extractor_confidence": confidence}
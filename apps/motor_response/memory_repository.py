@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from whatsapp_inbound.models import Contact, MemoryRecord, Tenant
+
+
+logger = logging.getLogger(__name__)
+
+RECENT_EVENTS_MAX = 20
+
+
+class MemoryRepository:
+    """
+    Acceso a MemoryRecord para un turno del motor.
+
+    - Lee el registro UNA vez (opcionalmente con select_for_update).
+    - Acumula los cambios del turno (eventos, summary, facts, scores, sales_state).
+    - flush() los escribe en un único UPDATE con concurrencia optimista
+      sobre la columna `version`. Si otro turno del mismo contacto escribió
+      primero, se relee el registro y se re-aplican los cambios pendientes.
+    """
+
+    def __init__(self, tenant: Tenant, contact: Contact, record: Optional[MemoryRecord] = None):
+        self.tenant = tenant
+        self.contact = contact
+        self.record = record
+        self._changes: Dict[str, Any] = {}
+        self._recent_append: List[Dict[str, Any]] = []
+
+    @classmethod
+    def load(cls, tenant: Tenant, contact: Optional[Contact], *, for_update: bool = False) -> "MemoryRepository":
+        """
+        Carga el MemoryRecord del contacto (si existe).
+        for_update=True requiere estar dentro de transaction.atomic().
+        """
+        record = None
+        if contact is not None:
+            qs = MemoryRecord.objects.filter(tenant=tenant, contact=contact)
+            if for_update:
+                qs = qs.select_for_update()
+            record = qs.first()
+        return cls(tenant, contact, record)
+
+    # --- lectura ---
+
+    def get(self, field: str, default: Any = None) -> Any:
+        if field in self._changes:
+            return self._changes[field]
+        if self.record is None:
+            return default
+        value = getattr(self.record, field, default)
+        return default if value is None else value
+
+    @property
+    def last_user_message_at(self):
+        return self.record.last_user_message_at if self.record else None
+
+    @property
+    def recent_events(self) -> List[Dict[str, Any]]:
+        base = list(self.get("recent_events", []))
+        return (base + self._recent_append)[-RECENT_EVENTS_MAX:]
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self._changes or self._recent_append)
+
+    # --- acumulación de cambios ---
+
+    def set_events(self, primary_event: Optional[str], secondary_events: Optional[List[str]]):
+        self._changes["active_primary_event"] = primary_event
+        # HOTFIX: Ensure list is never None
+        self._changes["active_secondary_events"] = secondary_events or []
+
+    def append_recent_event(self, entry: Dict[str, Any]):
+        self._recent_append.append(entry)
+
+    def set_summary(self, summary: Any):
+        if summary and isinstance(summary, str):
+            self._changes["summary"] = summary
+
+    def set_facts(self, facts: Any):
+        # Estrategia simple: reemplazar (confiamos en el LLM).
+        if isinstance(facts, list):
+            self._changes["facts_json"] = facts
+
+    def set_scores(self, scores: Any):
+        if isinstance(scores, dict) and scores:
+            self._changes["scores_json"] = scores
+
+    def set_sales_state(self, sales_state: Dict[str, Any]):
+        self._changes["sales_state_json"] = sales_state
+
+    # --- escritura ---
+
+    def flush(self, max_retries: int = 3) -> bool:
+        """
+        Persiste los cambios acumulados. Devuelve True si escribió algo.
+        Sin contacto no hay memoria que persistir (inbound es quien crea Contact).
+        """
+        if self.contact is None or not self.has_changes:
+            return False
+
+        for _ in range(max_retries):
+            if self.record is None:
+                if self._insert():
+                    break
+            elif self._update():
+                break
+            # Conflicto: otro turno escribió (o creó) el registro. Releer y reintentar.
+            logger.info(f"[MEMORY] Version conflict for contact {self.contact.pk}, retrying")
+            self.record = MemoryRecord.objects.filter(tenant=self.tenant, contact=self.contact).first()
+        else:
+            logger.warning(f"[MEMORY] Could not flush memory for contact {self.contact.pk} after {max_retries} attempts")
+            return False
+
+        self._changes = {}
+        self._recent_append = []
+        return True
+
+    def _values(self) -> Dict[str, Any]:
+        values = dict(self._changes)
+        if self._recent_append:
+            values["recent_events"] = self.recent_events
+        values["updated_at"] = timezone.now()
+        return values
+
+    def _update(self) -> bool:
+        values = self._values()
+        rows = MemoryRecord.objects.filter(pk=self.record.pk, version=self.record.version).update(
+            version=F("version") + 1, **values
+        )
+        if rows != 1:
+            return False
+        for k, v in values.items():
+            setattr(self.record, k, v)
+        self.record.version += 1
+        return True
+
+    def _insert(self) -> bool:
+        record = MemoryRecord(tenant=self.tenant, contact=self.contact, **self._values())
+        try:
+            with transaction.atomic():
+                record.save(force_insert=True)
+        except IntegrityError:
+            return False
+        self.record = record
+        return True
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from django.db import close_old_connections
+
+from whatsapp_inbound.models import Contact, Message, MotorDecision, Tenant
+
+from .action_builder import build_actions_from_playbook
+from .local_extractor import extract_local, gazetteer_for
+from .playbooks import get_playbook
+from .router import decide_playbook
+from .router_rules import table_for
+from .schemas import MotorRespondIn, SalesState, Signals
+from .state_manager import update_sales_state
+
+# Replay determinístico del pipeline híbrido (estado -> router -> playbook -> acciones) sobre Messages
+# históricos, sin LLM. Lo usa `manage.py replay_motor` para validar cambios de router/playbooks.
+
+SIGNAL_MODES = ("local", "stub", "recorded")
+WINDOW = timedelta(hours=24)
+
+# (wamid, playbook_key, stage, next_action, tipos de acción)
+Decision = Tuple[str, str, str, str, Tuple[str, ...]]
+
+_STUB_SIGNALS = Signals(intent="OTHER")
+
+
+def replay_turns(
+    payload: MotorRespondIn,
+    turns: Iterable[Tuple[str, datetime, str]],
+    signals_mode: str = "local",
+    tenant: Optional[Tenant] = None,
+    recorded: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Iterator[Decision]:
+    """
+    Reproduce los turnos inbound de UN contacto en orden (wamid, timestamp, texto), partiendo de un
+    SalesState vacío. La ventana 24h se calcula contra el inbound anterior, como en el motor.
+    signals_mode=recorded usa las señales del log de decisiones (wamid -> signals) y, si el turno
+    no está logueado, el extractor local.
+    """
+    gz = gazetteer_for(tenant) if signals_mode != "stub" else None
+    table = table_for(tenant)
+    recorded = recorded or {}
+    state = SalesState()
+    last_ts: Optional[datetime] = None
+    for wamid, ts, text in turns:
+        window_open = last_ts is None or ts - last_ts <= WINDOW
+        last_ts = ts
+        if wamid in recorded:
+            signals = Signals(**recorded[wamid])
+        elif gz is not None:
+            signals = Signals(**extract_local(text or "", gz)[0])
+        else:
+            signals = _STUB_SIGNALS
+
+        state = update_sales_state(state, signals)
+        decision = decide_playbook(signals, state, window_open, table)
+        actions = build_actions_from_playbook(
+            payload=payload.model_copy(update={"turn_wamid": wamid, "text": text}),
+            playbook=get_playbook(decision.playbook_key),
+            state=state,
+            signals=signals,
+        )
+        yield wamid, decision.playbook_key, state.stage, state.next_action, tuple(a["type"] for a in actions)
+
+
+def replay_contacts(
+    tenant_id: Any,
+    contact_ids: Sequence[Any],
+    signals_mode: str = "local",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[Decision]:
+    """
+    Unidad de trabajo del pool: un lote de contactos de un tenant. Una sola query ordenada por
+    (contacto, timestamp) que se consume en streaming; cada contacto arranca con estado vacío.
+    """
+    close_old_connections()
+    tenant = Tenant.objects.get(pk=tenant_id)
+    contacts = {pk: (wa_id, key) for pk, wa_id, key in Contact.objects.filter(pk__in=contact_ids).values_list("pk", "wa_id", "contact_key")}
+    recorded = _recorded_signals(tenant, [key for _, key in contacts.values()]) if signals_mode == "recorded" else None
+
+    qs = Message.objects.filter(tenant_id=tenant_id, contact_id__in=contact_ids, direction=Message.DIR_IN)
+    if since:
+        qs = qs.filter(timestamp__gte=since)
+    if until:
+        qs = qs.filter(timestamp__lt=until)
+    rows = qs.order_by("contact_id", "timestamp", "id").values_list("contact_id", "wamid", "timestamp", "text_body")
+
+    out: List[Decision] = []
+    current, turns = None, []
+    for contact_id, wamid, ts, text in rows.iterator(chunk_size=5000):
+        if contact_id != current:
+            if turns:
+                out += replay_turns(_payload(tenant, current, contacts), turns, signals_mode, tenant, recorded)
+            current, turns = contact_id, []
+        turns.append((wamid, ts, text))
+    if turns:
+        out += replay_turns(_payload(tenant, current, contacts), turns, signals_mode, tenant, recorded)
+    return out
+
+
+def _recorded_signals(tenant: Tenant, contact_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+    qs = MotorDecision.objects.filter(
+        tenant_id=tenant.tenant_key, contact_key__in=contact_keys, signals_json__isnull=False
+    ).exclude(turn_wamid="")
+    return dict(qs.values_list("turn_wamid", "signals_json").iterator(chunk_size=5000))
+
+
+def _payload(tenant: Tenant, contact_id: Any, contacts: Dict[Any, Tuple[str, str]]) -> MotorRespondIn:
+    wa_id, contact_key = contacts.get(contact_id) or ("", "")
+    return MotorRespondIn(
+        tenant_id=tenant.tenant_key,
+        contact_key=contact_key,
+        wa_id=wa_id,
+        phone_number_id="",
+        turn_wamid="",
+    )
+
+
+class DecisionDiff:
+    """Compara (playbook, acciones) contra una corrida anterior (wamid -> (playbook, acciones)), lote a lote."""
+
+    def __init__(self, baseline: Dict[str, Tuple[str, Tuple[str, ...]]]):
+        self.baseline = baseline
+        self.compared = self.changed = self.missing = 0
+        self.transitions: Dict[str, List[Any]] = {}
+
+    def add(self, decisions: Iterable[Decision]):
+        for wamid, playbook, _stage, _next, actions in decisions:
+            old = self.baseline.get(wamid)
+            if old is None:
+                self.missing += 1
+                continue
+            self.compared += 1
+            if old == (playbook, actions):
+                continue
+            self.changed += 1
+            key = f"{old[0]}[{','.join(old[1])}] -> {playbook}[{','.join(actions)}]"
+            # [cantidad, primer wamid como ejemplo]
+            self.transitions.setdefault(key, [0, wamid])[0] += 1
+
+    def top(self, n: int = 10) -> List[Tuple[str, int, str]]:
+        ranked = sorted(self.transitions.items(), key=lambda kv: -kv[1][0])[:n]
+        return [(key, count, example) for key, (count, example) in ranked]
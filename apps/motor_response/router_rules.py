@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import logging
+import string
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .playbooks import PLAYBOOK_REGISTRY
+from .schemas import RouterDecision
+
+logger = logging.getLogger(__name__)
+
+# Reglas del router como datos: se evalúan por prioridad ascendente y gana la primera cuyo `when` se cumple
+# (AND de condiciones). Un tenant puede agregar reglas o pisar/desactivar una default usando el mismo `name`.
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    # 1. Riesgo / safety
+    {"name": "risk", "priority": 10, "when": {"risk": True}, "playbook_key": "SAFE_BOUNDARY",
+     "reason": "Risk flag detected in signals.", "level": 1},
+    # 2. Ventana cerrada
+    {"name": "window_closed", "priority": 20, "when": {"window_open": False}, "playbook_key": "REOPEN_24H",
+     "reason": "WhatsApp 24h window is closed.", "level": 1},
+    # 3. Handoff explícito
+    {"name": "handoff_request", "priority": 30, "when": {"intent": "HANDOFF_REQUEST"}, "playbook_key": "HANDOFF",
+     "reason": "User explicitly requested human agent.", "level": 2},
+    # 4. Objeciones (las no mapeadas van a un humano)
+    {"name": "objection_price", "priority": 40, "when": {"objection": {"contains": "PRICE"}}, "playbook_key": "OBJECTION_PRICE",
+     "reason": "Handling price objection: {objection}", "level": 3},
+    {"name": "objection_other", "priority": 49, "when": {"objection": {"present": True}}, "playbook_key": "HANDOFF",
+     "reason": "Unhandled objection: {objection}", "level": 3},
+    # 5. Intención explícita
+    {"name": "intent_price", "priority": 50, "when": {"intent": "ASK_PRICE"}, "playbook_key": "PRICE_QUOTE_MIN",
+     "reason": "User intent '{intent}' maps directly to playbook.", "level": 4},
+    {"name": "intent_financing", "priority": 51, "when": {"intent": "ASK_FINANCING"}, "playbook_key": "FINANCING_MIN",
+     "reason": "User intent '{intent}' maps directly to playbook.", "level": 4},
+    {"name": "intent_availability", "priority": 52, "when": {"intent": "ASK_AVAILABILITY"}, "playbook_key": "AVAILABILITY_MIN",
+     "reason": "User intent '{intent}' maps directly to playbook.", "level": 4},
+    {"name": "intent_visit", "priority": 53, "when": {"intent": ["BOOK_TEST_DRIVE", "SCHEDULE_VISIT"]}, "playbook_key": "BOOK_VISIT",
+     "reason": "User intent '{intent}' maps directly to playbook.", "level": 4},
+    # 6. Faltantes críticos
+    {"name": "missing_model", "priority": 60, "when": {"missing": {"any": ["model"]}}, "playbook_key": "DISCOVERY_MIN",
+     "reason": "Missing critical info: Vehicle Model.", "level": 5},
+    {"name": "missing_budget", "priority": 61, "when": {"missing": {"any": ["budget"]}}, "playbook_key": "DISCOVERY_MIN",
+     "reason": "Missing critical info: Budget.", "level": 5},
+    # 7. Default
+    {"name": "default", "priority": 1000, "when": {}, "playbook_key": "DEFAULT_ASSIST",
+     "reason": "No specific rule triggered. Defaulting to assistance.", "level": 6},
+]
+
+# Lo que puede mirar una regla: (signals, state, window_open) -> valor
+FEATURES: Dict[str, Callable[[Any, Any, bool], Any]] = {
+    "risk": lambda sig, st, w: bool(sig.risk),
+    "window_open": lambda sig, st, w: bool(w),
+    "intent": lambda sig, st, w: sig.intent,
+    "objection": lambda sig, st, w: sig.objection,
+    "missing": lambda sig, st, w: tuple(st.missing),
+    "stage": lambda sig, st, w: st.stage,
+    "state_intent": lambda sig, st, w: st.intent,
+    "temperature": lambda sig, st, w: st.temperature,
+    "lead_type": lambda sig, st, w: st.lead_type,
+    "vehicle_make": lambda sig, st, w: st.vehicle.make,
+    "vehicle_model": lambda sig, st, w: st.vehicle.model,
+    "vehicle_new_or_used": lambda sig, st, w: st.vehicle.new_or_used,
+    "commercial_budget": lambda sig, st, w: st.commercial.budget,
+    "commercial_payment_type": lambda sig, st, w: st.commercial.payment_type,
+    "commercial_timeframe": lambda sig, st, w: st.commercial.timeframe,
+    "commercial_city": lambda sig, st, w: st.commercial.city,
+}
+
+OPERATORS = ("in", "not_in", "contains", "present", "any")
+# valores admitidos dentro de in / not_in / any (se comparan contra features escalares)
+SCALARS = (str, int, float, bool, type(None))
+FALLBACK_RULE = DEFAULT_RULES[-1]
+# Tope del memo de decide(): las combinaciones reales de features son pocas; si no, se reinicia
+MEMO_MAX = 4096
+
+
+class RuleError(ValueError):
+    pass
+
+
+def _predicate(feature: str, cond: Any) -> Callable[[Any], bool]:
+    """Condición de una regla -> predicado sobre el valor de la feature."""
+    if isinstance(cond, list):
+        cond = {"in": cond}
+    if not isinstance(cond, dict):
+        return lambda v, x=cond: v == x
+    if len(cond) != 1 or next(iter(cond)) not in OPERATORS:
+        raise RuleError(f"{feature}: expected one operator of {OPERATORS}, got {sorted(cond)}")
+    op, arg = next(iter(cond.items()))
+    if op in ("in", "not_in", "any"):
+        if not isinstance(arg, list) or not all(isinstance(x, SCALARS) for x in arg):
+            raise RuleError(f"{feature}.{op}: expected a list of scalars")
+        values = frozenset(arg)
+        if op == "in":
+            return lambda v: v in values
+        if op == "not_in":
+            return lambda v: v not in values
+        return lambda v: bool(values.intersection(v or ()))
+    if op == "contains":
+        needle = str(arg).upper()
+        return lambda v: bool(v) and needle in str(v).upper()
+    return lambda v, want=bool(arg): bool(v) == want
+
+
+def _check_rule(rule: Dict[str, Any]):
+    """Forma de la regla antes de compilarla: cualquier dato inválido sale como RuleError, nunca TypeError."""
+    name = rule.get("name")
+    for field, value in (("priority", rule.get("priority")), ("level", rule.get("level", 5))):
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise RuleError(f"{name}: {field} must be an integer")
+    if not isinstance(rule.get("when") or {}, dict):
+        raise RuleError(f"{name}: when must be an object of feature -> condition")
+
+
+class CompiledRule:
+    __slots__ = ("name", "priority", "playbook_key", "reason", "level", "atoms", "reason_fields")
+
+    def __init__(self, rule: Dict[str, Any], atoms: List[int]):
+        self.name = rule["name"]
+        self.priority = int(rule["priority"])
+        self.playbook_key = rule["playbook_key"]
+        self.reason = rule.get("reason") or f"Rule '{rule['name']}'."
+        self.level = int(rule.get("level", 5))
+        self.atoms = atoms
+        self.reason_fields = [f for _, f, _, _ in string.Formatter().parse(self.reason) if f]
+
+
+class RuleTable:
+    """
+    Tabla compilada: cada condición distinta es un "átomo" (feature, predicado) y cada regla la
+    máscara de átomos que exige. decide() memoiza por la tupla de features que la tabla realmente usa;
+    decide_batch() evalúa los átomos por columna y resuelve todas las reglas con una multiplicación de matrices.
+    """
+
+    def __init__(self, rules: Iterable[Dict[str, Any]]):
+        rules = list(rules)
+        for rule in rules:
+            _check_rule(rule)
+        ordered = sorted(rules, key=lambda r: r["priority"])
+        atom_index: Dict[Tuple[str, str], int] = {}
+        self.atoms: List[Tuple[str, Callable[[Any], bool]]] = []
+        self.rules: List[CompiledRule] = []
+        for rule in ordered:
+            playbook = rule.get("playbook_key")
+            if playbook not in PLAYBOOK_REGISTRY:
+                raise RuleError(f"{rule.get('name')}: unknown playbook_key {playbook!r}")
+            atoms = []
+            for feature, cond in (rule.get("when") or {}).items():
+                if feature not in FEATURES:
+                    raise RuleError(f"{rule['name']}: unknown feature {feature!r} (expected one of {sorted(FEATURES)})")
+                key = (feature, repr(cond))
+                if key not in atom_index:
+                    atom_index[key] = len(self.atoms)
+                    self.atoms.append((feature, _predicate(feature, cond)))
+                atoms.append(atom_index[key])
+            self.rules.append(CompiledRule(rule, atoms))
+        if not self.rules or self.rules[-1].atoms:
+            # siempre hay una regla que matchea
+            self.rules.append(CompiledRule(FALLBACK_RULE, []))
+
+        for r in self.rules:
+            bad = [f for f in r.reason_fields if f not in FEATURES]
+            if bad:
+                raise RuleError(f"{r.name}: unknown reason placeholder(s) {bad}")
+
+        # features que miran los átomos o los textos de reason (en orden estable): clave del memo
+        used = {feature for feature, _ in self.atoms} | {f for r in self.rules for f in r.reason_fields}
+        self.features = [f for f in FEATURES if f in used]
+        self._getters = [FEATURES[f] for f in self.features]
+        pos = {f: i for i, f in enumerate(self.features)}
+        self._atom_pos = [(pos[feature], pred) for feature, pred in self.atoms]
+
+        self.mask = np.zeros((len(self.rules), len(self.atoms)), dtype=np.int32)
+        for i, r in enumerate(self.rules):
+            self.mask[i, r.atoms] = 1
+        self._required = self.mask.sum(axis=1)
+        self._memo: Dict[Tuple, RouterDecision] = {}
+
+    def _resolve(self, values: Sequence[Any], hits: Sequence[bool]) -> RouterDecision:
+        for r in self.rules:
+            if all(hits[a] for a in r.atoms):
+                return self._decision(r, values)
+        raise AssertionError("rule table without fallback")
+
+    def _decision(self, r: CompiledRule, values: Sequence[Any]) -> RouterDecision:
+        reason = r.reason
+        if r.reason_fields:
+            by_name = dict(zip(self.features, values))
+            reason = reason.format(**{f: by_name[f] for f in r.reason_fields})
+        return RouterDecision(playbook_key=r.playbook_key, reason=reason, priority_level=r.level)
+
+    def decide(self, signals: Any, state: Any, window_open: bool) -> RouterDecision:
+        key = tuple(g(signals, state, window_open) for g in self._getters)
+        hit = self._memo.get(key)
+        if hit is None:
+            hits = [pred(key[i]) for i, pred in self._atom_pos]
+            hit = self._resolve(key, hits)
+            if len(self._memo) >= MEMO_MAX:
+                self._memo.clear()
+            self._memo[key] = hit
+        # instancia compartida por el memo: los callers la tratan como sólo lectura
+        return hit
+
+    def decide_batch(self, signals: Sequence[Any], states: Sequence[Any], windows: Sequence[bool]) -> List[RouterDecision]:
+        """Ruteo de un lote (replay, backtests): átomos por columna + (n x átomos) @ (átomos x reglas)."""
+        n = len(signals)
+        if n == 0:
+            return []
+        columns = [
+            np.fromiter((g(s, st, w) for s, st, w in zip(signals, states, windows)), dtype=object, count=n)
+            for g in self._getters
+        ]
+        hits = np.ones((n, len(self.atoms)), dtype=np.int32)
+        for j, (i, pred) in enumerate(self._atom_pos):
+            hits[:, j] = np.frompyfunc(pred, 1, 1)(columns[i]).astype(bool)
+        matched = (hits @ self.mask.T) == self._required
+        first = matched.argmax(axis=1)
+        out = []
+        for row, rule_idx in enumerate(first):
+            out.append(self._decision(self.rules[rule_idx], [c[row] for c in columns]))
+        return out
+
+
+def merge_rules(tenant_rules: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Defaults + reglas del tenant: mismo name reemplaza a la default; is_active=False la desactiva."""
+    merged = {r["name"]: r for r in DEFAULT_RULES}
+    for r in tenant_rules:
+        if r.get("is_active", True):
+            merged[r["name"]] = r
+        else:
+            merged.pop(r["name"], None)
+    return list(merged.values())
+
+
+def compile_rules(rules: Iterable[Dict[str, Any]]) -> RuleTable:
+    return RuleTable(rules)
+
+
+DEFAULT_TABLE = RuleTable(DEFAULT_RULES)
+
+_compiled: Dict[str, Tuple[Any, RuleTable]] = {}
+
+
+def _load_tenant_rules(tenant) -> List[Dict[str, Any]]:
+    from whatsapp_inbound.catalog_cache import get_catalog
+    from whatsapp_inbound.models import TenantRouterRule
+
+    def load():
+        qs = TenantRouterRule.objects.filter(tenant=tenant).order_by("priority", "name")
+        return [r.as_rule() for r in qs]
+
+    return get_catalog("router_rules", tenant.pk, load)
+
+
+def table_for(tenant) -> RuleTable:
+    """Tabla del tenant, compilada una vez por versión del catálogo (get_catalog devuelve el mismo objeto)."""
+    if tenant is None:
+        return DEFAULT_TABLE
+    rules = _load_tenant_rules(tenant)
+    if not rules:
+        return DEFAULT_TABLE
+    key = str(tenant.pk)
+    hit = _compiled.get(key)
+    if hit is not None and hit[0] is rules:
+        return hit[1]
+    try:
+        table = RuleTable(merge_rules(rules))
+    except RuleError as e:
+        # las reglas se validan al sembrarlas; si algo inválido llegó a la DB (admin), el default sigue andando
+        logger.warning("[ROUTER RULES] tenant=%s invalid rules, using defaults: %s", tenant.pk, e)
+        table = DEFAULT_TABLE
+    _compiled[key] = (rules, table)
+    return table
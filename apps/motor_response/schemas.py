@@ -76,6 +76,24 @@ class MotorRespondOut(BaseModel):
     warning: Optional[str] = None
 
 
+class MotorJobOut(BaseModel):
+    ok: bool = True
+    job_id: str
+    status: str  # pending | processing | done | failed
+    turn_wamid: Optional[str] = None
+    attempts: int = 0
+    result: Optional[MotorRespondOut] = None
+    error: Optional[str] = None
+
+
+class DraftStreamIn(BaseModel):
+    # mismo input_json que la acción CALL_TEXT_AI
+    input_json: Dict[str, Any]
+    # tokens: un evento por fragmento del modelo | sentences: un evento por oración (un mensaje de WhatsApp)
+    chunking: str = "tokens"
+    min_chars: int = 20
+
+
 # --- NUEVOS CONTRATOS INTERNOS (PREIMPLEMENTACIÓN MOTOR HÍBRIDO) ---
 
 class VehicleInterest(BaseModel):
@@ -8,8 +8,14 @@ def update_sales_state(current: SalesState, signals: Signals) -> SalesState:
     Actualiza el estado comercial basado en nuevas señales.
     Aplica lógica de merge, recálculo de missing y determinación de next_action.
     """
-    # 1. Copia base para no mutar in-place accidentalmente
-    new_state = current.model_copy(deep=True)
+    # 1. Copia base para no mutar in-place accidentalmente.
+    # Sólo vehicle/commercial/missing son mutables: copiarlos explícitamente evita el deepcopy genérico
+    # (la mitad del costo del turno en replay_motor).
+    new_state = current.model_copy(update={
+        "vehicle": current.vehicle.model_copy(),
+        "commercial": current.commercial.model_copy(),
+        "missing": list(current.missing),
+    })
 
     # 2. Actualizar Intent (A. Intent)
     if signals.intent and signals.intent not in ["OTHER", "GENERAL"]:
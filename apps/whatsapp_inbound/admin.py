@@ -1,7 +1,10 @@
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
 import json
-from .models import Tenant, Contact, Conversation, Message, Attribution, MemoryRecord, Template
+from .models import Tenant, Contact, Conversation, Message, Attribution, MemoryRecord, Template, OutboxEvent, MotorJob, MotorDecision, TenantRouterRule, TenantVehicle
+from .search import search_messages
+from .admin_helpers import EstimatedCountPaginator, TenantKeyFilter, OutboxTenantFilter, MessageTypeFilter
 
 
 @admin.register(Tenant)
@@ -14,10 +17,13 @@ class TenantAdmin(admin.ModelAdmin):
 @admin.register(Contact)
 class ContactAdmin(admin.ModelAdmin):
     list_display = ("contact_key", "tenant", "wa_id", "phone_e164", "profile_name", "created_at", "updated_at")
-    list_filter = ("tenant",)
+    list_filter = (TenantKeyFilter,)
+    list_select_related = ("tenant",)
     search_fields = ("contact_key", "wa_id", "phone_e164", "profile_name")
     ordering = ("-updated_at",)
     raw_id_fields = ("tenant",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Conversation)
@@ -32,18 +38,40 @@ class ConversationAdmin(admin.ModelAdmin):
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
     list_display = ("timestamp", "tenant", "contact", "direction", "type", "channel", "wamid", "short_text")
-    list_filter = ("tenant", "direction", "type", "channel")
+    # Sin date_hierarchy ni filtros por valores (type/channel): ambos agregan sobre toda la tabla en cada carga
+    list_filter = (TenantKeyFilter, "direction", MessageTypeFilter)
+    list_select_related = ("tenant", "contact")
     search_fields = ("wamid", "contact__contact_key", "text_body")
-    date_hierarchy = "timestamp"
     ordering = ("-timestamp",)
     raw_id_fields = ("tenant", "conversation", "contact")
     readonly_fields = ("payload_pretty",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # payload_json solo se carga (lazy) en la vista de detalle
+        return super().get_queryset(request).defer("payload_json")
+
+    def get_search_results(self, request, queryset, search_term):
+        # Evita el OR de ILIKE sobre wamid/contact/text_body (con JOIN) que escanea toda la tabla:
+        # ids exactos por igualdad, texto libre vía índice trigram.
+        term = (search_term or "").strip()
+        if not term:
+            return queryset, False
+        if term.startswith("wamid."):
+            return queryset.filter(wamid=term), False
+        if term.startswith("wa:"):
+            return queryset.filter(contact__contact_key=term), False
+        return search_messages(queryset, term), False
 
     def short_text(self, obj):
         return (obj.text_body or "")[:80]
 
     def payload_pretty(self, obj):
-        return format_html("<pre style='white-space:pre-wrap'>{}</pre>", json.dumps(obj.payload_json, indent=2, ensure_ascii=False))
+        # El envelope se descomprime solo acá (vista de detalle), nunca en el changelist
+        payload = dict(obj.payload_json or {})
+        payload["value_raw"] = obj.get_value_raw()
+        return format_html("<pre style='white-space:pre-wrap'>{}</pre>", json.dumps(payload, indent=2, ensure_ascii=False))
 
 
 @admin.register(Attribution)
@@ -71,3 +99,99 @@ class TemplateAdmin(admin.ModelAdmin):
     search_fields = ("name",)
     ordering = ("-updated_at",)
     raw_id_fields = ("tenant",)
+
+
+@admin.register(TenantVehicle)
+class TenantVehicleAdmin(admin.ModelAdmin):
+    list_display = ("tenant", "make", "model", "is_active", "updated_at")
+    list_filter = ("tenant", "make", "is_active")
+    search_fields = ("name", "make", "model")
+    ordering = ("make", "model")
+
+
+@admin.register(TenantRouterRule)
+class TenantRouterRuleAdmin(admin.ModelAdmin):
+    list_display = ("tenant", "priority", "name", "playbook_key", "is_active", "updated_at")
+    list_filter = ("tenant", "playbook_key", "is_active")
+    search_fields = ("name", "playbook_key")
+    ordering = ("tenant", "priority", "name")
+    raw_id_fields = ("tenant",)
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "topic", "tenant_id", "contact_key", "turn_wamid", "status", "attempts", "next_retry_at", "locked_by")
+    list_filter = ("status", "topic", OutboxTenantFilter)
+    search_fields = ("=turn_wamid", "=dedupe_key", "=contact_key")
+    ordering = ("-created_at",)
+    readonly_fields = ("payload_pretty",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ("requeue_events", "mark_dead")
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer("payload_json")
+
+    def payload_pretty(self, obj):
+        return format_html("<pre style='white-space:pre-wrap'>{}</pre>", json.dumps(obj.payload_json, indent=2, ensure_ascii=False))
+
+    @admin.action(description="Re-encolar (pending, reintento inmediato)")
+    def requeue_events(self, request, queryset):
+        # Un único UPDATE para toda la selección
+        now = timezone.now()
+        n = queryset.update(
+            status=OutboxEvent.STATUS_PENDING,
+            attempts=0,
+            next_retry_at=now,
+            locked_at=None,
+            locked_by=None,
+            updated_at=now,
+        )
+        self.message_user(request, f"{n} eventos re-encolados.")
+
+    @admin.action(description="Marcar como dead")
+    def mark_dead(self, request, queryset):
+        n = queryset.update(status=OutboxEvent.STATUS_DEAD, locked_at=None, locked_by=None, updated_at=timezone.now())
+        self.message_user(request, f"{n} eventos marcados como dead.")
+
+
+@admin.register(MotorJob)
+class MotorJobAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "tenant_id", "contact_key", "turn_wamid", "status", "attempts", "next_retry_at", "locked_by")
+    list_filter = ("status",)
+    search_fields = ("=turn_wamid", "=dedupe_key", "=contact_key")
+    ordering = ("-created_at",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ("requeue_jobs",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer("payload_json", "result_json")
+
+    @admin.action(description="Re-encolar (pending, reintento inmediato)")
+    def requeue_jobs(self, request, queryset):
+        now = timezone.now()
+        n = queryset.update(
+            status=MotorJob.STATUS_PENDING, attempts=0, next_retry_at=now, locked_at=None, locked_by=None, updated_at=now
+        )
+        self.message_user(request, f"{n} jobs re-encolados.")
+
+
+@admin.register(MotorDecision)
+class MotorDecisionAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "tenant_id", "contact_key", "primary_event", "playbook_key", "classifier", "extractor", "total_tokens", "warning")
+    list_filter = ("classifier", "extractor")
+    search_fields = ("=turn_wamid", "=contact_key", "=tenant_id")
+    ordering = ("-created_at",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer("signals_json", "next_actions_json")
+
+    # append-only: auditoría, no se edita
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
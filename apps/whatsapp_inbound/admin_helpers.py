@@ -0,0 +1,89 @@
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator que evita COUNT(*) sobre tablas grandes sin filtros.
+
+    En PostgreSQL usa pg_class.reltuples (tabla + particiones) cuando la estimación
+    supera `threshold`; con filtros o por debajo del umbral cuenta de verdad.
+    """
+    threshold = 100_000
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if isinstance(qs, QuerySet) and not qs.query.where:
+            connection = connections[qs.db]
+            if connection.vendor == "postgresql":
+                estimate = self._estimate(connection, qs.model._meta.db_table)
+                if estimate >= self.threshold:
+                    return estimate
+        return super().count
+
+    @staticmethod
+    def _estimate(connection, table: str) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint FROM pg_class c
+                WHERE c.oid = %s::regclass
+                   OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)
+                """,
+                [table, table],
+            )
+            return cursor.fetchone()[0]
+
+
+class InputFilter(admin.SimpleListFilter):
+    """
+    Filtro de texto libre: no enumera valores (evita SELECT DISTINCT / listar tenants en cada carga).
+    Subclases definen title, parameter_name y lookup.
+    """
+    template = "admin/whatsapp_inbound/input_filter.html"
+    lookup = None
+
+    def lookups(self, request, model_admin):
+        # Un placeholder: SimpleListFilter solo se renderiza si hay lookups
+        return [("", "")]
+
+    def queryset(self, request, queryset):
+        value = (self.value() or "").strip()
+        if value:
+            return queryset.filter(**{self.lookup: value})
+        return queryset
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        query_parts = []
+        for key, values in changelist.get_filters_params().items():
+            if key == self.parameter_name:
+                continue
+            for v in values if isinstance(values, list) else [values]:
+                query_parts.append((key, v))
+        all_choice["query_parts"] = query_parts
+        all_choice["parameter_name"] = self.parameter_name
+        all_choice["value"] = self.value()
+        yield all_choice
+
+
+class TenantKeyFilter(InputFilter):
+    title = "tenant"
+    parameter_name = "tenant_key"
+    lookup = "tenant__tenant_key"
+
+
+class OutboxTenantFilter(InputFilter):
+    title = "tenant"
+    parameter_name = "tenant_key"
+    lookup = "tenant_id"
+
+
+class MessageTypeFilter(InputFilter):
+    title = "type"
+    parameter_name = "msg_type"
+    lookup = "type"
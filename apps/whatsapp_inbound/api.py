@@ -1,31 +1,55 @@
 from ninja import Router, NinjaAPI
 import os
 import time
+import uuid
+import base64
 import httpx
 from typing import Any, Dict, List
+from pydantic import ValidationError as PydanticValidationError
 import asyncio
-from django.db import transaction, IntegrityError, connection
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction, DataError, IntegrityError, connection
+from django.http import StreamingHttpResponse
+from django.db.models import Count, Exists, OuterRef, Q, Subquery
 from django.utils.dateparse import parse_datetime
 from django.utils import timezone
+from datetime import timedelta, timezone as dt_timezone
 
 from .schemas import (
     WANormalizedInbound,
     MessageLogResponse,
     MessageLogItem,
     SeedEventsIn,
+    SeedRouterRulesIn,
     SeedTemplatesIn,
+    SeedVehiclesIn,
+    TrafficHourlyItem,
+    TrafficDailyItem,
+    AttributionDailyItem,
 )
 from .models import (
     Tenant,
     Contact,
     Conversation,
     Message,
+    MessageDedupe,
     Attribution,
     MemoryRecord,
     TenantEvent,
     Template,
     OutboxEvent,
+    TrafficHourly,
+    TrafficDaily,
+    AttributionDaily,
 )
+from .catalog_sync import upsert_router_rules, upsert_tenant_events, upsert_templates, upsert_vehicles
+from .counters import bump_tenant_counters, get_tenant_totals
+from .raw_store import store_raw_webhook
+from .rollups import EPOCH
+from .search import search_tenant_messages
+from .dedupe_cache import mark_seen, was_seen
+from .export import EXPORTS, FORMATS, aiter_sync, export_filename, iter_export, parquet_available
+from .ingest_queue import FLUSH_ERROR, WRITE_BEHIND, get_queue
 
 router = Router()
 
@@ -57,33 +81,20 @@ def seed_events(request, payload: SeedEventsIn):
         tenant.business_name = payload.business_name
         tenant.save(update_fields=["business_name", "updated_at"])
 
-    created = 0
-    updated = 0
-
-    # 2) upsert eventos
-    for ev in payload.events:
-        _, was_created = TenantEvent.objects.update_or_create(
-            tenant=tenant,
-            name=ev.name,
-            defaults={
-                "max_points": ev.max_points,
-                "triggers": [t.model_dump() for t in ev.triggers],
-                "freeform_reply": ev.freeform_reply,
-                "template_key": ev.template_key or "",
-                "is_active": True,
-            },
-        )
-        if was_created:
-            created += 1
-        else:
-            updated += 1
+    # 2) upsert masivo de eventos (una transacción)
+    counts = upsert_tenant_events(
+        tenant,
+        [ev.model_dump() for ev in payload.events],
+        full_sync=payload.full_sync,
+    )
 
     return {
         "ok": True,
         "tenant_id": tenant.tenant_key or payload.tenant_id,
-        "created": created,
-        "updated": updated,
-        "total": created + updated,
+        "created": counts["created"],
+        "updated": counts["updated"],
+        "deactivated": counts["deactivated"],
+        "total": counts["created"] + counts["updated"],
     }
 
 
@@ -92,58 +103,99 @@ def seed_templates(request, payload: SeedTemplatesIn):
     # 1) tenant
     tenant = _get_or_create_tenant(payload.tenant_id)
 
-    created = 0
-    updated = 0
-
-    # 2) upsert templates
-    for tmpl in payload.templates:
-        _, was_created = Template.objects.update_or_create(
-            tenant=tenant,
-            name=tmpl.name,
-            defaults={
-                "category": tmpl.category,
-                "language": tmpl.language,
-                "components_json": tmpl.components_json,
-                "meta_status": tmpl.meta_status,
-                "active": True,
-                "updated_at": timezone.now(),
-            },
-        )
-        if was_created:
-            created += 1
-        else:
-            updated += 1
+    # 2) upsert masivo de templates (una transacción)
+    counts = upsert_templates(
+        tenant,
+        [tmpl.model_dump() for tmpl in payload.templates],
+        full_sync=payload.full_sync,
+    )
 
     return {
         "ok": True,
         "tenant_id": tenant.tenant_key or payload.tenant_id,
-        "created": created,
-        "updated": updated,
-        "total": created + updated,
+        "created": counts["created"],
+        "updated": counts["updated"],
+        "deactivated": counts["deactivated"],
+        "total": counts["created"] + counts["updated"],
+    }
+
+
+@router.post("/v1/tenants/router/rules/seed", response={200: Dict[str, Any], 400: Dict[str, Any]})
+def seed_router_rules(request, payload: SeedRouterRulesIn):
+    # Reglas del router del motor: se compilan antes de guardar, así nunca llega a la DB una tabla inválida
+    from motor_response.router_rules import RuleError, compile_rules, merge_rules
+
+    rules = [r.model_dump() for r in payload.rules]
+    try:
+        compile_rules(merge_rules(rules))
+    except RuleError as e:
+        return 400, {"ok": False, "error": str(e)}
+
+    tenant = _get_or_create_tenant(payload.tenant_id)
+    counts = upsert_router_rules(tenant, rules, full_sync=payload.full_sync)
+
+    return {
+        "ok": True,
+        "tenant_id": tenant.tenant_key or payload.tenant_id,
+        "created": counts["created"],
+        "updated": counts["updated"],
+        "deactivated": counts["deactivated"],
+        "total": counts["created"] + counts["updated"],
+    }
+
+
+@router.post("/v1/tenants/vehicles/seed")
+def seed_vehicles(request, payload: SeedVehiclesIn):
+    # Gazetteer del extractor local del motor (marcas/modelos/versiones del tenant)
+    tenant = _get_or_create_tenant(payload.tenant_id)
+
+    counts = upsert_vehicles(
+        tenant,
+        [v.model_dump() for v in payload.vehicles],
+        full_sync=payload.full_sync,
+    )
+
+    return {
+        "ok": True,
+        "tenant_id": tenant.tenant_key or payload.tenant_id,
+        "created": counts["created"],
+        "updated": counts["updated"],
+        "deactivated": counts["deactivated"],
+        "total": counts["created"] + counts["updated"],
     }
 
 
 from asgiref.sync import sync_to_async
 
-def _process_inbound_db_sync(payload: WANormalizedInbound, tenant_id_in: str):
-    tenant = _get_or_create_tenant(tenant_id_in)
+def _parse_inbound_ts(payload: WANormalizedInbound):
+    # timestamp ISO -> datetime (aware)
+    ts = parse_datetime(payload.message.timestamp)
+    if ts is not None and timezone.is_naive(ts):
+        ts = timezone.make_aware(ts, timezone=dt_timezone.utc)
+    return ts
+
+
+INVALID_TS_BODY = {"ok": False, "error": "invalid message.timestamp (expected ISO datetime)"}
+
 
+def _process_inbound_db_sync(payload: WANormalizedInbound, tenant_id_in: str):
     contact_key = payload.contact.contact_key
     wamid = payload.message.wamid
 
-    # timestamp ISO -> datetime
-    ts = parse_datetime(payload.message.timestamp)
+    ts = _parse_inbound_ts(payload)
     if ts is None:
-        return {"status": 400, "body": {"ok": False, "error": "invalid message.timestamp (expected ISO datetime)"}}
-    if timezone.is_naive(ts):
-        ts = timezone.make_aware(ts, timezone=timezone.utc)
+        return {"status": 400, "body": INVALID_TS_BODY}
+
+    tenant = _get_or_create_tenant(tenant_id_in)
 
     # 1) DEDUPE rápido (si ya existe mensaje, corto)
-    # We rely on DB IntegrityError for Message(tenant, wamid) unique constraint.
-    # This saves 1 query.
+    # MessageDedupe(tenant, wamid) es la fuente de verdad de unicidad (Message está particionada).
+    # Se inserta primero: un duplicado falla con IntegrityError antes de tocar Contact/Conversation.
 
     try:
         with transaction.atomic():
+            MessageDedupe.objects.create(tenant=tenant, wamid=wamid)
+
             # 2) Upsert Contact
             contact, created = Contact.objects.get_or_create(
                 tenant=tenant,
@@ -167,23 +219,24 @@ def _process_inbound_db_sync(payload: WANormalizedInbound, tenant_id_in: str):
                     contact.save(update_fields=["wa_id", "profile_name", "updated_at"])
 
             # 3) Conversation activa (opcional, se mantiene por auditoría)
-            conv = (
-                Conversation.objects.filter(tenant=tenant, contact=contact, status=Conversation.STATUS_ACTIVE)
-                .order_by("-opened_at")
-                .first()
-            )
-            if conv is None:
-                conv = Conversation.objects.create(tenant=tenant, contact=contact, status=Conversation.STATUS_ACTIVE)
+            # El id viene denormalizado en Contact: sin query extra salvo al abrir una nueva.
+            conv_id = contact.active_conversation_id
+            if conv_id is None:
+                conv_id = Conversation.objects.create(tenant=tenant, contact=contact, status=Conversation.STATUS_ACTIVE).id
+                contact.active_conversation_id = conv_id
+                contact.save(update_fields=["active_conversation"])
 
             # 4) Insert Message inbound (solo audit, SIN decisiones)
             text_body = None
             if payload.message.type == "text":
                 text_body = (payload.message.text.body if payload.message.text else None)
 
-            # This might raise IntegrityError if wamid exists -> caught below
+            # Envelope crudo: una fila por contenido (hash), comprimida; el Message solo la referencia
+            raw_webhook_id = store_raw_webhook(payload.raw)
+
             Message.objects.create(
                 tenant=tenant,
-                conversation=conv,
+                conversation_id=conv_id,
                 contact=contact,
                 direction=Message.DIR_IN,
                 channel=payload.channel,
@@ -195,9 +248,9 @@ def _process_inbound_db_sync(payload: WANormalizedInbound, tenant_id_in: str):
                     "metadata": payload.metadata.model_dump(),
                     "message_raw": payload.message.raw,
                     "referral": payload.referral,
-                    "value_raw": payload.raw,
                     "trace_id": payload.trace_id,
                 },
+                raw_webhook_id=raw_webhook_id,
             )
 
             # 5) Attribution (si existe referral real) — opcional
@@ -265,6 +318,11 @@ def _process_inbound_db_sync(payload: WANormalizedInbound, tenant_id_in: str):
                     pass
 
             transaction.on_commit(enqueue_outbox)
+            # Recién con el commit el wamid cuenta como visto para el fast path
+            transaction.on_commit(lambda: mark_seen(tenant_id_in, wamid))
+
+            # 8) Contadores agregados del tenant (shard por wamid: inbound concurrentes no comparten fila)
+            bump_tenant_counters(tenant, contacts=1 if created else 0, messages=1, key=wamid)
 
         return {
             "status": 200, 
@@ -280,11 +338,57 @@ def _process_inbound_db_sync(payload: WANormalizedInbound, tenant_id_in: str):
         }
 
     except IntegrityError:
-        # Esto atrapa duplicados de Message (unique wamid)
+        # Solo un duplicado de MessageDedupe (unique tenant+wamid) es un reintento. Cualquier otra
+        # violación (Contact, Conversation, ...) no guardó el mensaje: se propaga para que Meta reintente.
+        if not MessageDedupe.objects.filter(tenant=tenant, wamid=wamid).exists():
+            raise
+        # on_commit: en el group commit del write-behind, recién con el commit del lote cuenta como visto
+        transaction.on_commit(lambda: mark_seen(tenant_id_in, wamid))
         return {"status": 200, "body": {"ok": True, "deduped": True, "tenant_id": tenant.tenant_key or tenant_id_in, "turn_wamid": wamid}}
 
 
-@router.post("/v1/whatsapp/inbound")
+def process_inbound_batch(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Group commit del modo write-behind: persiste N inbounds encolados en UNA transacción.
+    Cada item corre en su propio savepoint (el atomic interno de _process_inbound_db_sync),
+    así un duplicado o un item roto no tumba el lote. Los on_commit (outbox, mark_seen)
+    se disparan todos juntos al commit del lote.
+    Devuelve {"saved", "deduped", "failed", "retry"}:
+    - failed: fallos determinísticos (payload inválido, respuesta != 200); reintentarlos no sirve.
+    - retry: cualquier otra excepción (deadlock, lock timeout, conexión...); vuelven a la cola.
+    Los dos llevan el motivo en item[FLUSH_ERROR].
+    """
+    saved = deduped = 0
+    failed: List[Dict[str, Any]] = []
+    retry: List[Dict[str, Any]] = []
+    with transaction.atomic():
+        for item in items:
+            wamid = item.get("message", {}).get("wamid")
+            try:
+                # raw viene serializado por nosotros en el endpoint: sin re-parsearlo
+                payload = WANormalizedInbound.model_validate(item, context={"raw_json_trusted": True})
+                result = _process_inbound_db_sync(payload, payload.tenant_id)
+            except (PydanticValidationError, DataError) as e:
+                print(f"[INBOUND-FLUSH] Invalid item {wamid}: {e}")
+                item[FLUSH_ERROR] = str(e)[:500]
+                failed.append(item)
+                continue
+            except Exception as e:
+                print(f"[INBOUND-FLUSH] Transient failure for {wamid}, will retry: {e!r}")
+                item[FLUSH_ERROR] = repr(e)[:500]
+                retry.append(item)
+                continue
+            if result.get("status", 200) != 200:
+                item[FLUSH_ERROR] = str(result.get("body", {}).get("error"))[:500]
+                failed.append(item)
+            elif result["body"].get("deduped"):
+                deduped += 1
+            else:
+                saved += 1
+    return {"saved": saved, "deduped": deduped, "failed": failed, "retry": retry}
+
+
+@router.post("/v1/whatsapp/inbound", response={200: Dict[str, Any], 400: Dict[str, Any]})
 async def whatsapp_inbound(request, payload: List[WANormalizedInbound]):
     t_start_req = time.time()
     
@@ -297,6 +401,32 @@ async def whatsapp_inbound(request, payload: List[WANormalizedInbound]):
     
     print(f"[API-INBOUND] {t_start_req:.4f} | WAMID: {normalized_payload.message.wamid} | Received Request (List Batch size: {len(payload)})")
 
+    # 0) Fast path de reintentos de Meta: un lookup en cache en vez de una transacción que hace rollback
+    if await was_seen(normalized_payload.tenant_id, normalized_payload.message.wamid):
+        print(f"[API-DEDUPE] WAMID: {normalized_payload.message.wamid} | Seen in cache, skipping DB")
+        return {
+            "ok": True,
+            "deduped": True,
+            "tenant_id": normalized_payload.tenant_id,
+            "turn_wamid": normalized_payload.message.wamid,
+        }
+
+    # 0b) Write-behind: validar, encolar y responder; run_inbound_flusher hace el group commit
+    queue = get_queue() if WRITE_BEHIND else None
+    if queue is not None:
+        if _parse_inbound_ts(normalized_payload) is None:
+            return 400, INVALID_TS_BODY
+        await queue.apush(normalized_payload.model_dump(mode="json"))
+        t_api_end = time.time()
+        print(f"[API-RESPONSE] {t_api_end:.4f} | WAMID: {normalized_payload.message.wamid} | Queued (write-behind) | Total Request Time: {t_api_end - t_start_req:.4f}s")
+        return {
+            "ok": True,
+            "queued": True,
+            "deduped": False,
+            "tenant_id": normalized_payload.tenant_id,
+            "turn_wamid": normalized_payload.message.wamid,
+        }
+
     # 1) DB Operations (Sync -> Async wrapper)
     # Ahora esto incluye la creación del OutboxEvent en la misma transacción lógica
     t_db_start = time.time()
@@ -335,18 +465,259 @@ def health_db(request):
         return 500, {"db_ok": False, "error": str(e)}
 
 
-@router.get("/v1/whatsapp/inbound/logs", response=MessageLogResponse)
-def whatsapp_inbound_logs(request, tenant_id: str | None = None, limit: int = 50):
-    qs = Message.objects.order_by("-timestamp")
+def _encode_logs_cursor(m: Message) -> str:
+    raw = f"{m.timestamp.isoformat()}|{m.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_logs_cursor(cursor: str):
+    try:
+        ts_raw, id_raw = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        ts = parse_datetime(ts_raw)
+        if ts is None:
+            return None
+        return ts, uuid.UUID(id_raw)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _parse_aware(value: str):
+    ts = parse_datetime(value)
+    if ts is not None and timezone.is_naive(ts):
+        ts = timezone.make_aware(ts, timezone=dt_timezone.utc)
+    return ts
+
+
+@router.get("/v1/whatsapp/inbound/logs", response={200: MessageLogResponse, 400: Dict[str, Any]})
+def whatsapp_inbound_logs(
+    request,
+    tenant_id: str | None = None,
+    contact_key: str | None = None,
+    direction: str | None = None,
+    type: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    cursor: str | None = None,
+    limit: int = 50,
+):
+    # Keyset pagination sobre (timestamp, id) desc, respaldada por messages_tenant_time_idx.
+    # Cada página cuesta lo mismo sin importar qué tan profundo se pagine.
+    qs = Message.objects.all()
     if tenant_id:
         t = Tenant.objects.filter(tenant_key=tenant_id).first() or Tenant.objects.filter(name=tenant_id).first()
         if not t:
-            return {"items": []}
+            return {"items": [], "next_cursor": None}
         qs = qs.filter(tenant=t)
-    qs = qs.select_related("tenant", "contact")[: max(1, min(limit, 200))]
+    if contact_key:
+        qs = qs.filter(contact__contact_key=contact_key)
+    if direction:
+        qs = qs.filter(direction=direction)
+    if type:
+        qs = qs.filter(type=type)
+    if since:
+        since_ts = _parse_aware(since)
+        if since_ts is None:
+            return 400, {"ok": False, "error": "invalid since (expected ISO datetime)"}
+        qs = qs.filter(timestamp__gte=since_ts)
+    if until:
+        until_ts = _parse_aware(until)
+        if until_ts is None:
+            return 400, {"ok": False, "error": "invalid until (expected ISO datetime)"}
+        qs = qs.filter(timestamp__lt=until_ts)
+    if cursor:
+        decoded = _decode_logs_cursor(cursor)
+        if decoded is None:
+            return 400, {"ok": False, "error": "invalid cursor"}
+        c_ts, c_id = decoded
+        qs = qs.filter(Q(timestamp__lt=c_ts) | Q(timestamp=c_ts, id__lt=c_id))
+
+    page_size = max(1, min(limit, 200))
+    qs = (
+        qs.select_related("tenant", "contact")
+        .only(
+            "id", "wamid", "timestamp", "type", "text_body", "channel", "direction",
+            "tenant__tenant_key", "tenant__name", "contact__contact_key",
+        )
+        .order_by("-timestamp", "-id")[: page_size + 1]
+    )
+    rows = list(qs)
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    items = []
+    for m in rows:
+        items.append(
+            MessageLogItem(
+                tenant=(m.tenant.tenant_key or m.tenant.name or ""),
+                contact_key=m.contact.contact_key,
+                wamid=m.wamid,
+                timestamp=m.timestamp.isoformat(),
+                type=m.type,
+                text_body=m.text_body,
+                channel=m.channel,
+                direction=m.direction,
+            )
+        )
+    return {"items": items, "next_cursor": _encode_logs_cursor(rows[-1]) if has_more else None}
+
+
+@router.get("/v1/whatsapp/inbound/export", response={400: Dict[str, Any], 404: Dict[str, Any]})
+def whatsapp_inbound_export(
+    request,
+    tenant_id: str,
+    kind: str = "messages",
+    format: str = "jsonl",
+    since: str | None = None,
+    until: str | None = None,
+):
+    # Export masivo en streaming (JSONL o Parquet): memoria constante sin importar el volumen.
+    if kind not in EXPORTS:
+        return 400, {"ok": False, "error": f"invalid kind (expected one of {sorted(EXPORTS)})"}
+    if format not in FORMATS:
+        return 400, {"ok": False, "error": f"invalid format (expected one of {sorted(FORMATS)})"}
+    if format == "parquet" and not parquet_available():
+        return 400, {"ok": False, "error": "parquet export requires pyarrow"}
+
+    since_ts = until_ts = None
+    if since:
+        since_ts = _parse_aware(since)
+        if since_ts is None:
+            return 400, {"ok": False, "error": "invalid since (expected ISO datetime)"}
+    if until:
+        until_ts = _parse_aware(until)
+        if until_ts is None:
+            return 400, {"ok": False, "error": "invalid until (expected ISO datetime)"}
+
+    t = Tenant.objects.filter(tenant_key=tenant_id).first() or Tenant.objects.filter(name=tenant_id).first()
+    if not t:
+        return 404, {"ok": False, "error": "tenant_not_found"}
+
+    chunks = iter_export(t, kind, format, since=since_ts, until=until_ts)
+    if isinstance(request, ASGIRequest):
+        chunks = aiter_sync(chunks)
+    response = StreamingHttpResponse(chunks, content_type=FORMATS[format][0])
+    response["Content-Disposition"] = f'attachment; filename="{export_filename(t, kind, format, since_ts)}"'
+    return response
+
+
+ANALYTICS_MAX_DAYS = 92
+
+
+def _analytics_range(since: str | None, until: str | None):
+    """(since, until) aware; default últimos 7 días. None si el rango es inválido o supera ANALYTICS_MAX_DAYS."""
+    until_ts = _parse_aware(until) if until else timezone.now()
+    since_ts = _parse_aware(since) if since else (until_ts - timedelta(days=7) if until_ts else None)
+    if since_ts is None or until_ts is None or since_ts > until_ts:
+        return None
+    if until_ts - since_ts > timedelta(days=ANALYTICS_MAX_DAYS):
+        return None
+    return since_ts, until_ts
+
+
+def _analytics_buckets(rng, step: timedelta):
+    """
+    Límites de buckets UTC para el rango semiabierto [since, until): entra todo bucket que se solapa
+    con el rango (since se redondea hacia abajo y until hacia arriba al borde del bucket).
+    """
+    since, until = (ts.astimezone(dt_timezone.utc) for ts in rng)
+    start = EPOCH + (since - EPOCH) // step * step
+    end = EPOCH + (until - EPOCH) // step * step
+    if end < until:
+        end += step
+    return start, end
+
+
+def _analytics_tenant(tenant_id: str):
+    return Tenant.objects.filter(tenant_key=tenant_id).first() or Tenant.objects.filter(name=tenant_id).first()
+
+
+RANGE_ERROR = {"ok": False, "error": f"invalid since/until (ISO datetimes, at most {ANALYTICS_MAX_DAYS} days)"}
+
+
+# Analytics de solo lectura sobre los rollups (manage.py rollup_traffic), nunca sobre Message/Attribution.
+
+@router.get("/v1/analytics/traffic/hourly", response={200: List[TrafficHourlyItem], 400: Dict[str, Any], 404: Dict[str, Any]})
+def analytics_traffic_hourly(
+    request, tenant_id: str, since: str | None = None, until: str | None = None,
+    direction: str | None = None, type: str | None = None,
+):
+    """
+    Mensajes / contactos por hora UTC. Rango semiabierto [since, until): entran las horas que se solapan
+    con él (until=10:00 excluye la hora 10; until=10:30 la incluye).
+    """
+    rng = _analytics_range(since, until)
+    if rng is None:
+        return 400, RANGE_ERROR
+    t = _analytics_tenant(tenant_id)
+    if not t:
+        return 404, {"ok": False, "error": "tenant_not_found"}
+
+    start, end = _analytics_buckets(rng, timedelta(hours=1))
+    qs = TrafficHourly.objects.filter(tenant=t, bucket__gte=start, bucket__lt=end)
+    if direction:
+        qs = qs.filter(direction=direction)
+    if type:
+        qs = qs.filter(type=type)
+    return [
+        {"bucket": r.bucket.isoformat(), "direction": r.direction, "type": r.type, "messages": r.messages, "contacts": r.contacts}
+        for r in qs.order_by("bucket", "direction", "type")
+    ]
+
+
+@router.get("/v1/analytics/traffic/daily", response={200: List[TrafficDailyItem], 400: Dict[str, Any], 404: Dict[str, Any]})
+def analytics_traffic_daily(request, tenant_id: str, since: str | None = None, until: str | None = None):
+    """
+    Mensajes in/out y contactos únicos por día UTC. Rango semiabierto [since, until): entran los días que se
+    solapan con él (until=2026-10-02T00:00 excluye el 2; until=2026-10-02T10:00 lo incluye).
+    """
+    rng = _analytics_range(since, until)
+    if rng is None:
+        return 400, RANGE_ERROR
+    t = _analytics_tenant(tenant_id)
+    if not t:
+        return 404, {"ok": False, "error": "tenant_not_found"}
+
+    start, end = _analytics_buckets(rng, timedelta(days=1))
+    qs = TrafficDaily.objects.filter(tenant=t, day__gte=start.date(), day__lt=end.date()).order_by("day")
+    return [
+        {"day": r.day.isoformat(), "messages_in": r.messages_in, "messages_out": r.messages_out, "unique_contacts": r.unique_contacts}
+        for r in qs
+    ]
+
+
+@router.get("/v1/analytics/attributions/daily", response={200: List[AttributionDailyItem], 400: Dict[str, Any], 404: Dict[str, Any]})
+def analytics_attributions_daily(
+    request, tenant_id: str, since: str | None = None, until: str | None = None, source_id: str | None = None,
+):
+    """Atribuciones / clicks / contactos por día UTC y fuente. Mismo rango [since, until) que traffic/daily."""
+    rng = _analytics_range(since, until)
+    if rng is None:
+        return 400, RANGE_ERROR
+    t = _analytics_tenant(tenant_id)
+    if not t:
+        return 404, {"ok": False, "error": "tenant_not_found"}
+
+    start, end = _analytics_buckets(rng, timedelta(days=1))
+    qs = AttributionDaily.objects.filter(tenant=t, day__gte=start.date(), day__lt=end.date())
+    if source_id is not None:
+        qs = qs.filter(source_id=source_id)
+    return [
+        {
+            "day": r.day.isoformat(), "source_type": r.source_type, "source_id": r.source_id,
+            "attributions": r.attributions, "clicks": r.clicks, "contacts": r.contacts,
+        }
+        for r in qs.order_by("day", "source_type", "source_id")
+    ]
+
+
+@router.get("/v1/whatsapp/inbound/search", response={200: MessageLogResponse, 404: Dict[str, Any]})
+def whatsapp_inbound_search(request, tenant_id: str, q: str, contact_key: str | None = None, limit: int = 50):
+    t = Tenant.objects.filter(tenant_key=tenant_id).first() or Tenant.objects.filter(name=tenant_id).first()
+    if not t:
+        return 404, {"ok": False, "error": "tenant_not_found"}
 
     items = []
-    for m in qs:
+    for m in search_tenant_messages(t, q, contact_key=contact_key, limit=limit):
         items.append(
             MessageLogItem(
                 tenant=(m.tenant.tenant_key or m.tenant.name or ""),
@@ -356,9 +727,10 @@ def whatsapp_inbound_logs(request, tenant_id: str | None = None, limit: int = 50
                 type=m.type,
                 text_body=m.text_body,
                 channel=m.channel,
+                direction=m.direction,
             )
         )
-    return {"items": items}
+    return {"items": items, "next_cursor": None}
 
 
 @router.get("/v1/whatsapp/inbound/verify")
@@ -373,12 +745,11 @@ def whatsapp_inbound_verify(
     if not t:
         return {"ok": False, "error": "tenant_not_found"}
 
-    contacts_total = Contact.objects.filter(tenant=t).count()
-    messages_total = Message.objects.filter(tenant=t).count()
+    totals = get_tenant_totals(t)
 
     dedupe_for_wamid = None
     if wamid:
-        dedupe_for_wamid = Message.objects.filter(tenant=t, wamid=wamid).count()
+        dedupe_for_wamid = int(Message.objects.filter(tenant=t, wamid=wamid).exists())
 
     contact_summary = None
     last_message_summary = None
@@ -386,42 +757,57 @@ def whatsapp_inbound_verify(
     outbox_status = None
 
     if contact_key:
-        c = Contact.objects.filter(tenant=t, contact_key=contact_key).first()
-        if c:
-            active_conv = (
-                Conversation.objects.filter(tenant=t, contact=c, status=Conversation.STATUS_ACTIVE)
-                .order_by("-opened_at")
-                .first()
+        # Una sola query para contacto + conversación activa (puntero denormalizado) + conteo + memoria
+        c = (
+            Contact.objects.filter(tenant=t, contact_key=contact_key)
+            .select_related("active_conversation")
+            .annotate(
+                msgs_count=Subquery(
+                    Message.objects.filter(tenant=t, contact=OuterRef("pk"))
+                    .order_by()
+                    .values("contact")
+                    .annotate(n=Count("id"))
+                    .values("n")[:1]
+                ),
+                mem_last=Subquery(
+                    MemoryRecord.objects.filter(tenant=t, contact=OuterRef("pk")).values("last_user_message_at")[:1]
+                ),
             )
-            msgs_qs = Message.objects.filter(tenant=t, contact=c).order_by("-timestamp")
-            msgs_count = msgs_qs.count()
-            last_msg = msgs_qs.first()
-
-            mem = MemoryRecord.objects.filter(tenant=t, contact=c).first()
-            mem_last = mem.last_user_message_at.isoformat() if mem and mem.last_user_message_at else None
-
+            .first()
+        )
+        if c:
             contact_summary = {
                 "exists": True,
                 "wa_id": c.wa_id,
                 "contact_key": c.contact_key,
                 "profile_name": c.profile_name,
-                "messages_count": msgs_count,
-                "active_conversation_id": active_conv.id if active_conv else None,
-                "active_conversation_opened_at": active_conv.opened_at.isoformat() if active_conv else None,
-                "memory_last_user_message_at": mem_last,
+                "messages_count": c.msgs_count or 0,
+                "active_conversation_id": c.active_conversation_id,
+                "active_conversation_opened_at": (
+                    c.active_conversation.opened_at.isoformat() if c.active_conversation else None
+                ),
+                "memory_last_user_message_at": c.mem_last.isoformat() if c.mem_last else None,
             }
 
+            last_msg = (
+                Message.objects.filter(tenant=t, contact=c)
+                .annotate(
+                    has_attribution=Exists(
+                        Attribution.objects.filter(tenant=t, contact=c, message_wamid=OuterRef("wamid"))
+                    )
+                )
+                .order_by("-timestamp")
+                .first()
+            )
+
             if last_msg:
-                attrib_exists = Attribution.objects.filter(
-                    tenant=t, contact=c, message_wamid=last_msg.wamid
-                ).exists()
                 last_message_summary = {
                     "wamid": last_msg.wamid,
                     "timestamp": last_msg.timestamp.isoformat(),
                     "type": last_msg.type,
                     "text_body": last_msg.text_body,
                     "channel": last_msg.channel,
-                    "has_attribution": attrib_exists,
+                    "has_attribution": last_msg.has_attribution,
                 }
                 md = {}
                 try:
@@ -439,8 +825,12 @@ def whatsapp_inbound_verify(
                     "channel": last_msg.channel,
                 }
                 
-                # Check Outbox
-                outbox_evt = OutboxEvent.objects.filter(turn_wamid=last_msg.wamid).first()
+                # Check Outbox (scoped al tenant: OutboxEvent.tenant_id guarda el tenant_key)
+                outbox_evt = (
+                    OutboxEvent.objects.filter(tenant_id=t.tenant_key or tenant_id, turn_wamid=last_msg.wamid)
+                    .only("status", "topic", "created_at")
+                    .first()
+                )
                 if outbox_evt:
                     outbox_status = {
                         "exists": True,
@@ -457,8 +847,8 @@ def whatsapp_inbound_verify(
         "ok": True,
         "tenant_id": t.tenant_key or tenant_id,
         "totals": {
-            "contacts": contacts_total,
-            "messages": messages_total,
+            "contacts": totals["contacts_total"],
+            "messages": totals["messages_total"],
         },
         "dedupe_for_wamid": dedupe_for_wamid,
         "contact": contact_summary,
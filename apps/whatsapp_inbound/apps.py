@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class WhatsappInboundConfig(AppConfig):
     name = 'whatsapp_inbound'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,68 @@
+import time
+import logging
+from typing import Any, Callable, Dict, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# L1 en proceso: (kind, tenant_pk) -> (version, data).
+# La versión va en la clave lógica, así que una entrada vieja nunca se sirve: se pisa.
+_local: Dict[Tuple[str, str], Tuple[int, Any]] = {}
+
+
+def _version_key(tenant_pk) -> str:
+    return f"tenant:{tenant_pk}:catalog:version"
+
+
+def get_catalog_version(tenant_pk) -> int:
+    """
+    Versión actual del catálogo (eventos + templates) del tenant.
+    Si la clave no existe (cache vacío o evicted) se inicializa con un valor
+    basado en tiempo, para no reutilizar versiones de entradas que aún vivan.
+    """
+    key = _version_key(tenant_pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_now(tenant_pk):
+    key = _version_key(tenant_pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def bump_catalog_version(tenant_pk):
+    """
+    Invalida el catálogo del tenant. Se ejecuta on_commit: si incrementáramos
+    antes del commit, un lector concurrente podría cachear datos viejos bajo la versión nueva.
+    """
+    transaction.on_commit(lambda: _bump_now(tenant_pk))
+
+
+def get_catalog(kind: str, tenant_pk, loader: Callable[[], Any]) -> Any:
+    """
+    Devuelve el catálogo `kind` ("events" | "templates") del tenant.
+    L1 local -> cache compartido (sin TTL, clave versionada) -> loader (DB).
+    """
+    version = get_catalog_version(tenant_pk)
+
+    local_key = (kind, str(tenant_pk))
+    hit = _local.get(local_key)
+    if hit is not None and hit[0] == version:
+        return hit[1]
+
+    cache_key = f"tenant:{tenant_pk}:{kind}:v{version}"
+    data = cache.get(cache_key)
+    if data is None:
+        data = loader()
+        cache.set(cache_key, data, timeout=None)
+
+    _local[local_key] = (version, data)
+    return data
@@ -0,0 +1,158 @@
+from typing import Any, Dict, List
+
+from django.db import transaction
+from django.utils import timezone
+
+from .catalog_cache import bump_catalog_version
+from .models import Tenant, TenantEvent, TenantRouterRule, TenantVehicle, Template
+
+
+def _dedupe_by_name(items: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    # Último gana (mismo comportamiento que update_or_create en loop).
+    # Además evita "ON CONFLICT DO UPDATE cannot affect row a second time" en Postgres.
+    by_name: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        by_name[item["name"]] = item
+    return by_name
+
+
+def _upsert(model, tenant: Tenant, items: List[Dict[str, Any]], update_fields: List[str], active_field: str, full_sync: bool):
+    by_name = _dedupe_by_name(items)
+    names = list(by_name)
+
+    with transaction.atomic():
+        existing = set(
+            model.objects.filter(tenant=tenant, name__in=names).values_list("name", flat=True)
+        )
+        model.objects.bulk_create(
+            [model(tenant=tenant, **fields) for fields in by_name.values()],
+            update_conflicts=True,
+            unique_fields=["tenant", "name"],
+            update_fields=update_fields,
+        )
+
+        deactivated = 0
+        if full_sync:
+            deactivated = (
+                model.objects.filter(tenant=tenant, **{active_field: True})
+                .exclude(name__in=names)
+                .update(**{active_field: False, "updated_at": timezone.now()})
+            )
+
+        # bulk_create/update no disparan signals: invalidamos el catálogo a mano.
+        bump_catalog_version(tenant.pk)
+
+    created = len(names) - len(existing)
+    return {"created": created, "updated": len(existing), "deactivated": deactivated}
+
+
+def upsert_tenant_events(tenant: Tenant, events: List[Dict[str, Any]], full_sync: bool = False) -> Dict[str, int]:
+    """
+    Upsert masivo de TenantEvent en una transacción (INSERT ... ON CONFLICT DO UPDATE).
+    full_sync=True desactiva los eventos del tenant que no vienen en el payload.
+    """
+    items = [
+        {
+            "name": ev["name"],
+            "max_points": ev["max_points"],
+            "triggers": ev["triggers"],
+            "freeform_reply": ev["freeform_reply"],
+            "template_key": ev.get("template_key") or "",
+            "is_active": True,
+        }
+        for ev in events
+    ]
+    return _upsert(
+        TenantEvent,
+        tenant,
+        items,
+        update_fields=["max_points", "triggers", "freeform_reply", "template_key", "is_active", "updated_at"],
+        active_field="is_active",
+        full_sync=full_sync,
+    )
+
+
+def upsert_templates(tenant: Tenant, templates: List[Dict[str, Any]], full_sync: bool = False) -> Dict[str, int]:
+    """
+    Upsert masivo de Template en una transacción (INSERT ... ON CONFLICT DO UPDATE).
+    full_sync=True desactiva los templates del tenant que no vienen en el payload.
+    """
+    now = timezone.now()
+    items = [
+        {
+            "name": tmpl["name"],
+            "category": tmpl.get("category"),
+            "language": tmpl.get("language"),
+            "components_json": tmpl.get("components_json") or [],
+            "meta_status": tmpl.get("meta_status") or "",
+            "active": True,
+            "updated_at": now,
+        }
+        for tmpl in templates
+    ]
+    return _upsert(
+        Template,
+        tenant,
+        items,
+        update_fields=["category", "language", "components_json", "meta_status", "active", "updated_at"],
+        active_field="active",
+        full_sync=full_sync,
+    )
+
+
+def upsert_vehicles(tenant: Tenant, vehicles: List[Dict[str, Any]], full_sync: bool = False) -> Dict[str, int]:
+    """
+    Upsert masivo del gazetteer de vehículos (TenantVehicle) en una transacción.
+    full_sync=True desactiva los vehículos del tenant que no vienen en el payload.
+    """
+    now = timezone.now()
+    items = [
+        {
+            "name": f"{v['make']} {v['model']}".strip().lower(),
+            "make": v["make"].strip(),
+            "model": v["model"].strip(),
+            "trims": v.get("trims") or [],
+            "aliases": v.get("aliases") or [],
+            "is_active": True,
+            "updated_at": now,
+        }
+        for v in vehicles
+    ]
+    return _upsert(
+        TenantVehicle,
+        tenant,
+        items,
+        update_fields=["make", "model", "trims", "aliases", "is_active", "updated_at"],
+        active_field="is_active",
+        full_sync=full_sync,
+    )
+
+
+def upsert_router_rules(tenant: Tenant, rules: List[Dict[str, Any]], full_sync: bool = False) -> Dict[str, int]:
+    """
+    Upsert masivo de TenantRouterRule en una transacción (se validan antes con router_rules.compile_rules).
+    is_active viene del payload (False desactiva una regla default del mismo name).
+    full_sync=True desactiva las reglas del tenant que no vienen en el payload.
+    """
+    now = timezone.now()
+    items = [
+        {
+            "name": r["name"],
+            "priority": r["priority"],
+            "when_json": r.get("when") or {},
+            "playbook_key": r["playbook_key"],
+            "reason": r.get("reason") or "",
+            "level": r.get("level", 5),
+            "is_active": r.get("is_active", True),
+            "updated_at": now,
+        }
+        for r in rules
+    ]
+    return _upsert(
+        TenantRouterRule,
+        tenant,
+        items,
+        update_fields=["priority", "when_json", "playbook_key", "reason", "level", "is_active", "updated_at"],
+        active_field="is_active",
+        full_sync=full_sync,
+    )
@@ -0,0 +1,63 @@
+import os
+import zlib
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Contact, Message, Tenant, TenantCounterShard
+
+# Filas por tenant: más shards = menos contención entre inbound concurrentes, lectura = SUM de N filas
+COUNTER_SHARDS = max(1, int(os.getenv("TENANT_COUNTER_SHARDS", "16")))
+
+
+def compute_tenant_totals(tenant: Tenant) -> dict:
+    return {
+        "contacts_total": Contact.objects.filter(tenant=tenant).count(),
+        "messages_total": Message.objects.filter(tenant=tenant).count(),
+    }
+
+
+def counter_shard(key: str) -> int:
+    return zlib.crc32((key or "").encode("utf-8")) % COUNTER_SHARDS
+
+
+def bump_tenant_counters(tenant: Tenant, *, contacts: int = 0, messages: int = 0, key: str = ""):
+    """
+    UPDATE ... SET n = n + k sobre UNO de los shards del tenant (elegido por `key`, p.ej. el wamid),
+    así dos inbound del mismo tenant casi nunca esperan el lock de la misma fila.
+    El shard 0 guarda la base: si todavía no existe, se inicializa una única vez con los totales reales
+    (que ya incluyen lo escrito en esta transacción, por eso en ese caso no se suma el incremento).
+    """
+    if not contacts and not messages:
+        return
+    shard = counter_shard(key)
+    rows = TenantCounterShard.objects.filter(tenant=tenant, shard=shard).update(
+        contacts_total=F("contacts_total") + contacts,
+        messages_total=F("messages_total") + messages,
+        updated_at=timezone.now(),
+    )
+    if rows:
+        return
+    try:
+        with transaction.atomic():
+            if not TenantCounterShard.objects.filter(tenant=tenant, shard=0).exists():
+                TenantCounterShard.objects.create(
+                    tenant=tenant, shard=0, updated_at=timezone.now(), **compute_tenant_totals(tenant)
+                )
+                return
+            TenantCounterShard.objects.create(
+                tenant=tenant, shard=shard, contacts_total=contacts, messages_total=messages, updated_at=timezone.now()
+            )
+    except IntegrityError:
+        # otro request creó la fila en paralelo
+        bump_tenant_counters(tenant, contacts=contacts, messages=messages, key=key)
+
+
+def get_tenant_totals(tenant: Tenant) -> dict:
+    totals = TenantCounterShard.objects.filter(tenant=tenant).aggregate(
+        contacts_total=Sum("contacts_total"), messages_total=Sum("messages_total")
+    )
+    if totals["messages_total"] is None:
+        return compute_tenant_totals(tenant)
+    return totals
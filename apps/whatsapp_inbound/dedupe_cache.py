@@ -0,0 +1,29 @@
+import os
+
+from django.core.cache import cache
+
+# Meta reintenta el mismo webhook durante horas/días; 48h cubre la ventana de reintentos.
+SEEN_TTL_SEC = int(os.getenv("INBOUND_DEDUPE_TTL_SEC", "172800"))
+
+
+def _seen_key(tenant_id: str, wamid: str) -> str:
+    return f"inbound:seen:{tenant_id}:{wamid}"
+
+
+async def was_seen(tenant_id: str, wamid: str) -> bool:
+    """
+    Fast path previo a la transacción. Es solo una pista: la fuente de verdad
+    sigue siendo el UNIQUE de MessageDedupe.
+    """
+    try:
+        return bool(await cache.aget(_seen_key(tenant_id, wamid)))
+    except Exception:
+        # cache caído: seguimos por el camino normal
+        return False
+
+
+def mark_seen(tenant_id: str, wamid: str):
+    try:
+        cache.set(_seen_key(tenant_id, wamid), 1, timeout=SEEN_TTL_SEC)
+    except Exception:
+        pass
@@ -0,0 +1,215 @@
+import io
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import orjson
+from asgiref.sync import sync_to_async
+from django.db.models import F
+
+from . import fastjson
+from .models import Attribution, MemoryRecord, Message, Tenant
+
+# Filas que Django trae por viaje al servidor (server-side cursor en PostgreSQL)
+CHUNK_SIZE = 2000
+# Filas por row group de Parquet: acota la memoria del writer
+PARQUET_ROW_GROUP = 20000
+# Bytes acumulados antes de emitir un chunk JSONL
+JSONL_FLUSH_BYTES = 256 * 1024
+
+# kind -> modelo, campo de tiempo (filtros since/until y orden) y columnas tipadas.
+# Tipos: str | uuid | ts | int | json (json se exporta como string en Parquet).
+EXPORTS: Dict[str, Dict[str, Any]] = {
+    "messages": {
+        "model": Message,
+        "time_field": "timestamp",
+        "columns": {
+            "id": "uuid",
+            "wamid": "str",
+            "timestamp": "ts",
+            "direction": "str",
+            "type": "str",
+            "channel": "str",
+            "text_body": "str",
+            "contact_key": "str",
+            "conversation_id": "uuid",
+            "payload_json": "json",
+        },
+    },
+    "attributions": {
+        "model": Attribution,
+        "time_field": "captured_at",
+        "columns": {
+            "id": "uuid",
+            "captured_at": "ts",
+            "contact_key": "str",
+            "message_wamid": "str",
+            "source_type": "str",
+            "source_id": "str",
+            "ctwa_clid": "str",
+            "headline": "str",
+            "body": "str",
+            "raw_json": "json",
+        },
+    },
+    "memory": {
+        "model": MemoryRecord,
+        "time_field": "updated_at",
+        "columns": {
+            "id": "int",
+            "updated_at": "ts",
+            "contact_key": "str",
+            "summary": "str",
+            "active_primary_event": "str",
+            "active_secondary_events": "json",
+            "recent_events": "json",
+            "facts_json": "json",
+            "scores_json": "json",
+            "sales_state_json": "json",
+            "last_user_message_at": "ts",
+        },
+    },
+}
+
+FORMATS = {
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def export_rows(tenant: Tenant, kind: str, since=None, until=None) -> Iterator[Dict[str, Any]]:
+    """
+    Filas (dicts) de `kind` del tenant en orden (tiempo, pk), sin instanciar modelos.
+    .iterator() no cachea el queryset: memoria constante sin importar el volumen.
+    """
+    spec = EXPORTS[kind]
+    time_field = spec["time_field"]
+    fields = [c for c in spec["columns"] if c != "contact_key"]
+
+    qs = spec["model"].objects.filter(tenant=tenant)
+    if since is not None:
+        qs = qs.filter(**{f"{time_field}__gte": since})
+    if until is not None:
+        qs = qs.filter(**{f"{time_field}__lt": until})
+    qs = qs.order_by(time_field, "pk").values(*fields, contact_key=F("contact__contact_key"))
+    return qs.iterator(chunk_size=CHUNK_SIZE)
+
+
+def iter_jsonl(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    buf: List[bytes] = []
+    size = 0
+    for row in rows:
+        line = orjson.dumps(row, default=str, option=orjson.OPT_APPEND_NEWLINE)
+        buf.append(line)
+        size += len(line)
+        if size >= JSONL_FLUSH_BYTES:
+            yield b"".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield b"".join(buf)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Sink write-only para ParquetWriter: acumula lo escrito y lo entrega por partes (drain)."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self):
+        # Parquet guarda offsets absolutos en el footer: la posición no se reinicia al drenar
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _parquet_schema(kind: str):
+    import pyarrow as pa
+
+    types = {
+        "str": pa.string(),
+        "uuid": pa.string(),
+        "json": pa.string(),
+        "int": pa.int64(),
+        "ts": pa.timestamp("us", tz="UTC"),
+    }
+    return pa.schema([(name, types[t]) for name, t in EXPORTS[kind]["columns"].items()])
+
+
+def _parquet_table(batch: List[Dict[str, Any]], kind: str, schema):
+    import pyarrow as pa
+
+    columns = {}
+    for name, t in EXPORTS[kind]["columns"].items():
+        values = [row.get(name) for row in batch]
+        if t == "uuid":
+            values = [str(v) if v is not None else None for v in values]
+        elif t == "json":
+            values = [fastjson.dumps(v) if v is not None else None for v in values]
+        columns[name] = values
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+def iter_parquet(rows: Iterable[Dict[str, Any]], kind: str, row_group_size: int = PARQUET_ROW_GROUP) -> Iterator[bytes]:
+    """Parquet (zstd) emitido por row group: en memoria vive a lo sumo un row group."""
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema(kind)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    batch: List[Dict[str, Any]] = []
+    try:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= row_group_size:
+                writer.write_table(_parquet_table(batch, kind, schema))
+                batch = []
+                yield sink.drain()
+        if batch:
+            writer.write_table(_parquet_table(batch, kind, schema))
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def iter_export(tenant: Tenant, kind: str, fmt: str, since=None, until=None) -> Iterator[bytes]:
+    rows = export_rows(tenant, kind, since=since, until=until)
+    if fmt == "parquet":
+        return iter_parquet(rows, kind)
+    return iter_jsonl(rows)
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+async def aiter_sync(iterator: Iterator[bytes]):
+    """
+    Adapta un generador sync a async para StreamingHttpResponse bajo ASGI
+    (con un iterador sync Django lo consume entero en memoria antes de enviar).
+    thread_sensitive: todos los next() corren en el mismo hilo, el dueño del cursor.
+    """
+    sentinel = object()
+    while True:
+        chunk = await sync_to_async(next)(iterator, sentinel)
+        if chunk is sentinel:
+            return
+        yield chunk
+
+
+def export_filename(tenant: Tenant, kind: str, fmt: str, since: Optional[Any] = None) -> str:
+    tag = since.strftime("%Y%m%d") if since is not None else "all"
+    return f"{tenant.tenant_key or tenant.pk}_{kind}_{tag}.{FORMATS[fmt][1]}"
@@ -0,0 +1,64 @@
+import json
+from typing import Any
+
+import orjson
+from django.http import HttpRequest
+from ninja.parser import Parser
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+# Datetimes pasan por default= (encoder de Django/Ninja o stdlib): mismo formato/comportamiento
+# que antes (milisegundos, "Z"); orjson los formatearía distinto.
+_OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def dumps(value: Any, *, sort_keys: bool = False) -> str:
+    """orjson con fallback a stdlib para lo que orjson no soporta (ej. ints > 64 bits)."""
+    try:
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS if sort_keys else None).decode()
+    except TypeError:
+        return json.dumps(value, ensure_ascii=False, sort_keys=sort_keys, separators=(",", ":"))
+
+
+loads = orjson.loads
+
+
+class ORJSONParser(Parser):
+    """Parser de Ninja con orjson (orjson.JSONDecodeError hereda de json.JSONDecodeError)."""
+
+    def parse_body(self, request: HttpRequest):
+        return orjson.loads(request.body)
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+
+    def __init__(self):
+        self._default = NinjaJSONEncoder().default
+
+    def render(self, request: HttpRequest, data: Any, *, response_status: int) -> Any:
+        try:
+            return orjson.dumps(data, default=self._default, option=_OPTS)
+        except TypeError:
+            return json.dumps(data, cls=NinjaJSONEncoder)
+
+
+class ORJSONFieldEncoder(json.JSONEncoder):
+    """
+    encoder= de los JSONField. Django llama json.dumps(value, cls=encoder), que a su vez
+    llama encoder(...).encode(value): reemplazamos encode() y mantenemos default() de stdlib
+    (lo que antes no era serializable lo sigue sin ser).
+    """
+
+    def encode(self, o: Any) -> str:
+        try:
+            return orjson.dumps(o, default=self.default, option=_OPTS).decode()
+        except TypeError:
+            return super().encode(o)
+
+
+class ORJSONFieldDecoder(json.JSONDecoder):
+    """decoder= de los JSONField: Django llama json.loads(value, cls=decoder)."""
+
+    def decode(self, s, *args, **kwargs):
+        return orjson.loads(s)
@@ -0,0 +1,38 @@
+import os
+import threading
+import time
+import uuid
+
+# UUIDv7 (RFC 9562): 48 bits de timestamp unix en ms + versión + 74 bits aleatorios.
+# Los ids nuevos quedan ordenados por tiempo, así que los INSERT caen al final del B-tree de la PK
+# (sin page splits aleatorios como con uuid4). Dentro del mismo ms, rand_a actúa como contador
+# para mantener el orden monótono en el proceso.
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7() -> uuid.UUID:
+    global _last_ms, _counter
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms = ms
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF  # deja margen para incrementar
+        else:
+            # mismo ms (o reloj que retrocede): seguimos sobre el último ms emitido
+            _counter += 1
+            if _counter > 0xFFF:
+                _last_ms += 1
+                _counter = 0
+            ms = _last_ms
+        counter = _counter
+
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    value = (ms & ((1 << 48) - 1)) << 80
+    value |= 0x7 << 76
+    value |= counter << 64
+    value |= 0b10 << 62
+    value |= rand_b
+    return uuid.UUID(int=value)
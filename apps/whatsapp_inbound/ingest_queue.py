@@ -0,0 +1,178 @@
+import json
+import os
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+# Modo write-behind: el endpoint valida, encola en Redis y responde; run_inbound_flusher
+# persiste lo encolado en lotes (un commit por lote en vez de uno por webhook).
+WRITE_BEHIND = os.getenv("INBOUND_WRITE_BEHIND", "0") == "1"
+QUEUE_KEY = os.getenv("INBOUND_QUEUE_KEY", "inbound:queue")
+# Fallos transitorios (deadlock, lock timeout, DB caída): el item vuelve a la cola hasta N veces antes de :dead
+MAX_FLUSH_ATTEMPTS = max(1, int(os.getenv("INBOUND_FLUSH_MAX_ATTEMPTS", "5")))
+# Metadata del flusher dentro del item (el schema la ignora); requeue_dead() la limpia
+FLUSH_ATTEMPTS = "flush_attempts"
+FLUSH_ERROR = "flush_error"
+
+
+class RedisIngestQueue:
+    """
+    Cola durable de inbounds normalizados sobre una lista de Redis (AOF activo en docker-compose).
+
+    Entrega at-least-once: claim() mueve los items (LMOVE) a una lista de procesamiento propia del
+    flusher y ack() la borra recién después del commit. El ack no es posicional sobre la cola
+    compartida: un flusher nunca descarta items que no reclamó. Si uno muere (o pierde el lock por un
+    lote lento), el próximo dueño del lock devuelve su lista a la cola con recover() y MessageDedupe
+    descarta lo que ya se había guardado.
+    Lo que no se pudo guardar nunca se pierde: los fallos transitorios vuelven al frente de la cola y
+    los determinísticos quedan en `{key}:dead` hasta que `manage.py requeue_dead_inbounds` los reinyecta.
+    """
+
+    def __init__(self, url: str, key: str = QUEUE_KEY):
+        self.url = url
+        self.key = key
+        self._client = None
+        self._aclient = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self.url)
+        return self._client
+
+    async def apush(self, item: Dict[str, Any]):
+        if self._aclient is None:
+            import redis.asyncio
+
+            self._aclient = redis.asyncio.Redis.from_url(self.url)
+        await self._aclient.rpush(self.key, json.dumps(item))
+
+    def push(self, item: Dict[str, Any]):
+        self.client.rpush(self.key, json.dumps(item))
+
+    def _processing_key(self, owner: str) -> str:
+        return f"{self.key}:processing:{owner}"
+
+    def claim(self, owner: str, n: int) -> List[Dict[str, Any]]:
+        """Reclama hasta n items del frente de la cola, en orden, moviéndolos a la lista de `owner`."""
+        available = min(n, self.client.llen(self.key))
+        if not available:
+            return []
+        processing = self._processing_key(owner)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.sadd(f"{self.key}:owners", owner)
+        for _ in range(available):
+            pipe.lmove(self.key, processing, "LEFT", "RIGHT")
+        # None: otro consumidor se llevó el item entre el LLEN y el LMOVE
+        return [json.loads(raw) for raw in pipe.execute()[1:] if raw is not None]
+
+    @property
+    def dead_key(self) -> str:
+        return f"{self.key}:dead"
+
+    def ack(self, owner: str, retry: Iterable[Dict[str, Any]] = (), dead: Iterable[Dict[str, Any]] = ()):
+        """
+        Confirma todo lo reclamado por `owner` (el lote ya commiteó), en una sola transacción de Redis:
+        `retry` vuelve al frente de la cola (en orden, con el contador de intentos +1; agotados => :dead)
+        y `dead` va a la lista :dead.
+        """
+        dead = list(dead)
+        again = []
+        for item in retry:
+            item[FLUSH_ATTEMPTS] = item.get(FLUSH_ATTEMPTS, 0) + 1
+            (dead if item[FLUSH_ATTEMPTS] >= MAX_FLUSH_ATTEMPTS else again).append(item)
+        pipe = self.client.pipeline(transaction=True)
+        if dead:
+            pipe.rpush(self.dead_key, *(json.dumps(item) for item in dead))
+        if again:
+            # LPUSH apila de a uno: en orden inverso para que el frente quede como estaba
+            pipe.lpush(self.key, *(json.dumps(item) for item in reversed(again)))
+        pipe.delete(self._processing_key(owner))
+        pipe.execute()
+
+    def _return_to_queue(self, owner: str) -> int:
+        moved = 0
+        processing = self._processing_key(owner)
+        while self.client.lmove(processing, self.key, "RIGHT", "LEFT") is not None:
+            moved += 1
+        return moved
+
+    def release(self, owner: str) -> int:
+        """Devuelve al frente de la cola lo reclamado por `owner` sin confirmarlo (el lote no commiteó)."""
+        return self._return_to_queue(owner)
+
+    def recover(self, owner: str) -> int:
+        """Devuelve al frente de la cola, en orden, lo reclamado por otros flushers sin ack."""
+        moved = 0
+        owners_key = f"{self.key}:owners"
+        for other in self.client.smembers(owners_key):
+            other = other.decode()
+            if other == owner:
+                continue
+            moved += self._return_to_queue(other)
+            self.client.srem(owners_key, other)
+        return moved
+
+    def dead(self, limit: int = 10) -> List[Dict[str, Any]]:
+        return [json.loads(raw) for raw in self.client.lrange(self.dead_key, 0, limit - 1)]
+
+    def dead_count(self) -> int:
+        return self.client.llen(self.dead_key)
+
+    def requeue_dead(self, limit: Optional[int] = None) -> int:
+        """Reinyecta los items de :dead (los más viejos primero) al final de la cola, con los intentos en cero."""
+        from redis.exceptions import WatchError
+
+        moved = 0
+        with self.client.pipeline() as pipe:
+            while limit is None or moved < limit:
+                try:
+                    # WATCH + MULTI: si :dead cambió entre leer el primero y sacarlo, se reintenta
+                    pipe.watch(self.dead_key)
+                    raw = pipe.lindex(self.dead_key, 0)
+                    if raw is None:
+                        break
+                    item = json.loads(raw)
+                    item.pop(FLUSH_ATTEMPTS, None)
+                    item.pop(FLUSH_ERROR, None)
+                    pipe.multi()
+                    pipe.rpush(self.key, json.dumps(item))
+                    pipe.lpop(self.dead_key)
+                    pipe.execute()
+                    moved += 1
+                except WatchError:
+                    continue
+        return moved
+
+    def acquire_lock(self, owner: str, ttl: int) -> bool:
+        """Lock de flusher único; el dueño lo renueva llamándolo de nuevo antes del TTL."""
+        lock_key = f"{self.key}:flusher"
+        if self.client.set(lock_key, owner, nx=True, ex=ttl):
+            return True
+        current = self.client.get(lock_key)
+        if current is not None and current.decode() == owner:
+            self.client.expire(lock_key, ttl)
+            return True
+        return False
+
+    def __len__(self):
+        return self.client.llen(self.key)
+
+
+_queue: Optional[RedisIngestQueue] = None
+
+
+def get_queue() -> Optional[RedisIngestQueue]:
+    """Cola compartida del proceso; None si no hay REDIS_URL (write-behind no disponible)."""
+    global _queue
+    if _queue is None:
+        url = os.getenv("REDIS_URL")
+        if not url:
+            return None
+        _queue = RedisIngestQueue(url)
+    return _queue
+
+
+def new_flusher_id() -> str:
+    return f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
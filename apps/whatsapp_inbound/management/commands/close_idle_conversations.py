@@ -0,0 +1,69 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from whatsapp_inbound.models import Contact, Conversation, Message
+
+
+class Command(BaseCommand):
+    help = "Cierra conversaciones activas sin mensajes recientes, en lotes (UPDATE set-based por lote)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--idle-hours", type=float, default=24.0, help="Horas sin mensajes para cerrar (default 24)")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--sleep", type=float, default=0.0, help="Pausa entre lotes (segundos)")
+
+    def handle(self, *args, **opts):
+        batch_size = opts["batch_size"]
+        total = 0
+        # candidatas que no se cerraron (lockeadas por otra corrida o con un inbound nuevo):
+        # no se vuelven a pedir, así un lote corto no corta la corrida ni se reintenta en loop
+        skipped = set()
+
+        while True:
+            cutoff = timezone.now() - timedelta(hours=opts["idle_hours"])
+            ids = self._idle_ids(cutoff, batch_size, skipped)
+            if not ids:
+                break
+            closed = self._close_batch(ids, cutoff)
+            total += len(closed)
+            skipped.update(set(ids) - set(closed))
+            if opts["sleep"]:
+                time.sleep(opts["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Closed {total} idle conversations."))
+
+    def _idle_ids(self, cutoff, batch_size: int, exclude=()):
+        qs = Conversation.objects.filter(status=Conversation.STATUS_ACTIVE, opened_at__lt=cutoff)
+        if exclude:
+            qs = qs.exclude(id__in=exclude)
+        return list(qs.filter(~Exists(_recent(cutoff))).values_list("id", flat=True)[:batch_size])
+
+    def _close_batch(self, ids, cutoff) -> list:
+        with transaction.atomic():
+            # Re-chequeo con las filas lockeadas: una conversación que recibió un inbound después del SELECT
+            # de arriba no se cierra. skip_locked: dos corridas en paralelo no se pisan los lotes.
+            # (Un inbound todavía sin commit no es visible acá: su Message queda en la conversación
+            # cerrada y el siguiente inbound abre una nueva.)
+            ids = list(
+                Conversation.objects.select_for_update(skip_locked=True)
+                .filter(id__in=ids, status=Conversation.STATUS_ACTIVE)
+                .filter(~Exists(_recent(cutoff)))
+                .values_list("id", flat=True)
+            )
+            if not ids:
+                return []
+            Conversation.objects.filter(id__in=ids).update(
+                status=Conversation.STATUS_CLOSED, closed_at=timezone.now()
+            )
+            # El próximo inbound del contacto abrirá una conversación nueva
+            Contact.objects.filter(active_conversation_id__in=ids).update(active_conversation=None)
+        return ids
+
+
+def _recent(cutoff):
+    return Message.objects.filter(tenant=OuterRef("tenant"), contact=OuterRef("contact"), timestamp__gte=cutoff)
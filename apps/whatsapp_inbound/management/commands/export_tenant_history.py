@@ -0,0 +1,60 @@
+import os
+from datetime import timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+
+from whatsapp_inbound.export import EXPORTS, FORMATS, export_filename, iter_export, parquet_available
+from whatsapp_inbound.models import Tenant
+
+
+def _parse_aware(value):
+    if not value:
+        return None
+    ts = parse_datetime(value)
+    if ts is None:
+        raise CommandError(f"Invalid datetime: {value!r} (expected ISO datetime)")
+    if timezone.is_naive(ts):
+        ts = timezone.make_aware(ts, timezone=dt_timezone.utc)
+    return ts
+
+
+class Command(BaseCommand):
+    help = "Exporta Message/Attribution/MemoryRecord de un tenant a JSONL o Parquet en streaming (memoria constante)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tenant-id", required=True, help="tenant_key (o name) del tenant")
+        parser.add_argument("--kinds", default=",".join(EXPORTS), help=f"Lista separada por comas ({', '.join(EXPORTS)})")
+        parser.add_argument("--format", default="jsonl", choices=sorted(FORMATS))
+        parser.add_argument("--since", default=None, help="ISO datetime inclusivo")
+        parser.add_argument("--until", default=None, help="ISO datetime exclusivo")
+        parser.add_argument("--out-dir", default=".", help="Directorio de salida")
+
+    def handle(self, *args, **opts):
+        tenant_id = opts["tenant_id"]
+        tenant = Tenant.objects.filter(tenant_key=tenant_id).first() or Tenant.objects.filter(name=tenant_id).first()
+        if tenant is None:
+            raise CommandError(f"Tenant not found: {tenant_id}")
+
+        kinds = [k.strip() for k in opts["kinds"].split(",") if k.strip()]
+        unknown = [k for k in kinds if k not in EXPORTS]
+        if unknown:
+            raise CommandError(f"Unknown kinds: {', '.join(unknown)}")
+
+        fmt = opts["format"]
+        if fmt == "parquet" and not parquet_available():
+            raise CommandError("Parquet export requires pyarrow")
+
+        since = _parse_aware(opts["since"])
+        until = _parse_aware(opts["until"])
+        os.makedirs(opts["out_dir"], exist_ok=True)
+
+        for kind in kinds:
+            path = os.path.join(opts["out_dir"], export_filename(tenant, kind, fmt, since))
+            size = 0
+            with open(path, "wb") as f:
+                for chunk in iter_export(tenant, kind, fmt, since=since, until=until):
+                    f.write(chunk)
+                    size += len(chunk)
+            self.stdout.write(f"Exported {kind} -> {path} ({size:,} bytes)")
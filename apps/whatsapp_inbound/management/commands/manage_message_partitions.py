@@ -0,0 +1,111 @@
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from whatsapp_inbound.models import Message, MessageDedupe
+
+PARENT = Message._meta.db_table
+PREFIX = f"{PARENT}_"
+
+
+def add_months(d: date, n: int) -> date:
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PREFIX}{month:%Y%m}"
+
+
+def month_from_partition(name: str):
+    suffix = name[len(PREFIX):]
+    if not name.startswith(PREFIX) or len(suffix) != 6 or not suffix.isdigit():
+        return None  # ej: la partición DEFAULT
+    return date(int(suffix[:4]), int(suffix[4:]), 1)
+
+
+class Command(BaseCommand):
+    help = "Crea particiones mensuales futuras de Message y desacopla/archiva las viejas (solo PostgreSQL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ahead", type=int, default=3, help="Meses futuros a pre-crear (default 3)")
+        parser.add_argument("--retain-months", type=int, default=0, help="Meses a conservar adjuntos; 0 = no desacoplar")
+        parser.add_argument("--archive-schema", default=None, help="Mover particiones desacopladas a este schema")
+        parser.add_argument("--drop", action="store_true", help="Eliminar particiones desacopladas (en vez de conservarlas)")
+        parser.add_argument("--dry-run", action="store_true", help="Solo mostrar lo que se haría")
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "postgresql":
+            self.stdout.write(f"Backend {connection.vendor}: Message no está particionada, nada que hacer.")
+            return
+
+        self.dry_run = opts["dry_run"]
+        this_month = timezone.now().astimezone(dt_timezone.utc).date().replace(day=1)
+        existing = self._partitions()
+
+        # 1) Pre-crear particiones futuras
+        for i in range(opts["ahead"] + 1):
+            month = add_months(this_month, i)
+            name = partition_name(month)
+            if name in existing:
+                continue
+            start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+            nxt = add_months(month, 1)
+            end = datetime(nxt.year, nxt.month, 1, tzinfo=dt_timezone.utc)
+            try:
+                self._exec(
+                    f'CREATE TABLE "{name}" PARTITION OF "{PARENT}" FOR VALUES FROM (%s) TO (%s)',
+                    [start.isoformat(), end.isoformat()],
+                )
+                self.stdout.write(f"Created partition {name}")
+            except DatabaseError as e:
+                # típicamente: la partición DEFAULT ya tiene filas en ese rango
+                self.stderr.write(f"Could not create {name}: {e}")
+
+        # 2) Desacoplar / archivar particiones fuera de retención
+        if opts["retain_months"] <= 0:
+            return
+        cutoff = add_months(this_month, -opts["retain_months"])
+        for name in sorted(existing):
+            month = month_from_partition(name)
+            if month is None or add_months(month, 1) > cutoff:
+                continue
+            self._exec(f'ALTER TABLE "{PARENT}" DETACH PARTITION "{name}"')
+            if opts["drop"]:
+                self._exec(f'DROP TABLE "{name}"')
+                self.stdout.write(f"Detached and dropped {name}")
+            elif opts["archive_schema"]:
+                schema = opts["archive_schema"]
+                self._exec(f'CREATE SCHEMA IF NOT EXISTS "{schema}"')
+                self._exec(f'ALTER TABLE "{name}" SET SCHEMA "{schema}"')
+                self.stdout.write(f"Detached {name} -> {schema}.{name}")
+            else:
+                self.stdout.write(f"Detached {name}")
+
+        # Las claves de dedupe de mensajes ya desacoplados no protegen nada activo
+        cutoff_dt = datetime(cutoff.year, cutoff.month, 1, tzinfo=dt_timezone.utc)
+        if not self.dry_run:
+            pruned, _ = MessageDedupe.objects.filter(created_at__lt=cutoff_dt).delete()
+            self.stdout.write(f"Pruned {pruned} dedupe keys older than {cutoff_dt.date()}")
+
+    def _partitions(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT c.relname FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                JOIN pg_class p ON p.oid = i.inhparent
+                WHERE p.relname = %s
+                """,
+                [PARENT],
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    def _exec(self, sql, params=None):
+        if self.dry_run:
+            self.stdout.write(f"[dry-run] {sql} {params or ''}")
+            return
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, params)
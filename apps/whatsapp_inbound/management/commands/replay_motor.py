@@ -0,0 +1,124 @@
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from motor_response.replay import SIGNAL_MODES, DecisionDiff, replay_contacts
+from whatsapp_inbound import fastjson
+from whatsapp_inbound.models import Contact, Tenant
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-ejecuta estado -> router -> playbook -> acciones sobre los Messages inbound históricos (sin LLM), "
+        "en un pool de procesos. Con --out guarda las decisiones; con --baseline reporta qué cambió."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tenant-id", help="tenant_key (default: todos)")
+        parser.add_argument("--since", help="ISO datetime (default: --days atrás)")
+        parser.add_argument("--until", help="ISO datetime")
+        parser.add_argument("--days", type=int, default=30)
+        parser.add_argument("--signals", choices=SIGNAL_MODES, default="local",
+                            help="local: extractor de reglas; stub: intent OTHER sin entidades (sólo máquina de estados); "
+                                 "recorded: señales del log de decisiones (local si el turno no está)")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos (1 = en el proceso actual)")
+        parser.add_argument("--batch-contacts", type=int, default=200)
+        parser.add_argument("--out", help="JSONL con una decisión por turno (baseline de la próxima corrida)")
+        parser.add_argument("--baseline", help="JSONL de una corrida anterior para comparar")
+        parser.add_argument("--top", type=int, default=10, help="Transiciones más frecuentes a mostrar")
+
+    def handle(self, *args, **opts):
+        since = _parse(opts["since"]) if opts["since"] else timezone.now() - timedelta(days=opts["days"])
+        until = _parse(opts["until"]) if opts["until"] else None
+
+        contacts = Contact.objects.order_by("tenant_id", "id")
+        if opts["tenant_id"]:
+            tenant = Tenant.objects.filter(tenant_key=opts["tenant_id"]).first()
+            if tenant is None:
+                raise CommandError(f"Tenant not found: {opts['tenant_id']}")
+            contacts = contacts.filter(tenant=tenant)
+        tasks = list(_batches(contacts.values_list("tenant_id", "id").iterator(chunk_size=10000), opts["batch_contacts"]))
+
+        diff = DecisionDiff(_load_baseline(opts["baseline"])) if opts["baseline"] else None
+        out = open(opts["out"], "w", encoding="utf-8") if opts["out"] else None
+        playbooks: Counter = Counter()
+        turns = 0
+        started = time.monotonic()
+
+        def consume(decisions):
+            nonlocal turns
+            turns += len(decisions)
+            playbooks.update(d[1] for d in decisions)
+            if diff is not None:
+                diff.add(decisions)
+            if out is not None:
+                out.writelines(
+                    fastjson.dumps({"wamid": w, "playbook": p, "stage": s, "next_action": n, "actions": a}) + "\n"
+                    for w, p, s, n, a in decisions
+                )
+
+        args = (opts["signals"], since, until)
+        try:
+            if opts["workers"] <= 1:
+                for tenant_id, ids in tasks:
+                    consume(replay_contacts(tenant_id, ids, *args))
+            else:
+                # fork: los hijos heredan Django configurado; cada uno abre su propia conexión
+                connections.close_all()
+                ctx = multiprocessing.get_context("fork")
+                with ProcessPoolExecutor(max_workers=opts["workers"], mp_context=ctx) as pool:
+                    futures = [pool.submit(replay_contacts, tenant_id, ids, *args) for tenant_id, ids in tasks]
+                    for f in as_completed(futures):
+                        consume(f.result())
+        finally:
+            if out is not None:
+                out.close()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"Replayed {turns} turns / {sum(len(ids) for _, ids in tasks)} contacts in {elapsed:.1f}s "
+            f"({turns / elapsed if elapsed else 0:.0f} turns/s, workers={opts['workers']}, signals={opts['signals']})."
+        )
+        for key, n in playbooks.most_common():
+            self.stdout.write(f"  {key}: {n}")
+
+        if diff is not None:
+            self.stdout.write(
+                f"Diff vs baseline: {diff.changed}/{diff.compared} changed, {diff.missing} turns not in baseline."
+            )
+            for key, n, example in diff.top(opts["top"]):
+                self.stdout.write(f"  {n:>8}  {key}  (e.g. {example})")
+
+
+def _parse(value):
+    dt = parse_datetime(value)
+    if dt is None:
+        raise CommandError(f"Invalid datetime: {value}")
+    return dt if timezone.is_aware(dt) else timezone.make_aware(dt)
+
+
+def _batches(rows, size):
+    """(tenant_id, [contact_ids]) de a `size`, sin mezclar tenants en un lote."""
+    current, ids = None, []
+    for tenant_id, contact_id in rows:
+        if tenant_id != current or len(ids) >= size:
+            if ids:
+                yield current, ids
+            current, ids = tenant_id, []
+        ids.append(contact_id)
+    if ids:
+        yield current, ids
+
+
+def _load_baseline(path):
+    with open(path, encoding="utf-8") as fh:
+        rows = (fastjson.loads(line) for line in fh if line.strip())
+        return {r["wamid"]: (r["playbook"], tuple(r["actions"])) for r in rows}
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from whatsapp_inbound.ingest_queue import FLUSH_ATTEMPTS, FLUSH_ERROR, get_queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Reinyecta en la cola write-behind los inbounds que el flusher dejó en la lista :dead "
+        "(fallos determinísticos o sin intentos). Revisar el motivo con --dry-run antes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None, help="Máximo de items a reinyectar (default: todos)")
+        parser.add_argument("--dry-run", action="store_true", help="Solo mostrar cuántos hay y los primeros motivos")
+
+    def handle(self, *args, **opts):
+        queue = get_queue()
+        if queue is None:
+            raise CommandError("REDIS_URL no configurado: el modo write-behind necesita Redis.")
+
+        if opts["dry_run"]:
+            self.stdout.write(f"{queue.dead_count()} dead inbounds")
+            for item in queue.dead(10):
+                wamid = item.get("message", {}).get("wamid")
+                self.stdout.write(f"  {wamid} attempts={item.get(FLUSH_ATTEMPTS, 0)} error={item.get(FLUSH_ERROR)}")
+            return
+
+        moved = queue.requeue_dead(opts["limit"])
+        self.stdout.write(self.style.SUCCESS(f"Requeued {moved} dead inbounds."))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from whatsapp_inbound.counters import compute_tenant_totals
+from whatsapp_inbound.models import Tenant, TenantCounterShard
+
+
+class Command(BaseCommand):
+    help = "Recalcula los TenantCounterShard desde Contact/Message y los consolida en el shard 0 (backfill o drift)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tenant", default=None, help="tenant_key (default: todos)")
+
+    def handle(self, *args, **opts):
+        qs = Tenant.objects.all()
+        if opts["tenant"]:
+            qs = qs.filter(tenant_key=opts["tenant"])
+
+        for tenant in qs.iterator():
+            with transaction.atomic():
+                # lock de los shards para no perder incrementos concurrentes del inbound
+                TenantCounterShard.objects.get_or_create(tenant=tenant, shard=0)
+                list(TenantCounterShard.objects.select_for_update().filter(tenant=tenant).values_list("pk", flat=True))
+                totals = compute_tenant_totals(tenant)
+                now = timezone.now()
+                TenantCounterShard.objects.filter(tenant=tenant, shard=0).update(updated_at=now, **totals)
+                TenantCounterShard.objects.filter(tenant=tenant).exclude(shard=0).update(
+                    contacts_total=0, messages_total=0, updated_at=now
+                )
+            self.stdout.write(
+                f"tenant={tenant.tenant_key} contacts={totals['contacts_total']} messages={totals['messages_total']}"
+            )
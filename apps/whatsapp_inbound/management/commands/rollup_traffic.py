@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from whatsapp_inbound.rollups import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = "Actualiza los rollups de tráfico (TrafficHourly/TrafficDaily/AttributionDaily) desde el último watermark."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Recalcular todo desde el inicio (backfill)")
+        parser.add_argument("--loop", type=float, default=0, help="Repetir cada N segundos (0 = una corrida)")
+
+    def handle(self, *args, **opts):
+        full = opts["full"]
+        while True:
+            t0 = time.time()
+            stats = refresh_rollups(full=full)
+            self.stdout.write(
+                f"Rollups: hourly={stats['hourly']} daily={stats['daily']} "
+                f"attribution_daily={stats['attribution_daily']} ({time.time() - t0:.2f}s)"
+            )
+            if not opts["loop"]:
+                return
+            full = False
+            time.sleep(opts["loop"])
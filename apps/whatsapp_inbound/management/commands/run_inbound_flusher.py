@@ -0,0 +1,86 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections
+
+from whatsapp_inbound.api import process_inbound_batch
+from whatsapp_inbound.ingest_queue import get_queue, new_flusher_id
+
+
+class Command(BaseCommand):
+    help = "Persiste los inbounds encolados en modo write-behind (INBOUND_WRITE_BEHIND=1) con group commit."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-batch", type=int, default=int(os.getenv("INBOUND_FLUSH_MAX_BATCH", "200")),
+                            help="Máximo de inbounds por transacción (default 200)")
+        parser.add_argument("--linger-ms", type=float, default=float(os.getenv("INBOUND_FLUSH_LINGER_MS", "5")),
+                            help="Espera entre polls con la cola vacía (default 5ms)")
+        parser.add_argument("--retry-backoff", type=float, default=float(os.getenv("INBOUND_FLUSH_RETRY_BACKOFF", "1")),
+                            help="Pausa tras un fallo transitorio de la DB antes de reintentar (default 1s)")
+        parser.add_argument("--once", action="store_true", help="Procesar un lote y salir")
+
+    def handle(self, *args, **opts):
+        queue = get_queue()
+        if queue is None:
+            raise CommandError("REDIS_URL no configurado: el modo write-behind necesita Redis.")
+
+        owner = new_flusher_id()
+        lock_ttl = 30
+        linger = opts["linger_ms"] / 1000.0
+        max_batch = opts["max_batch"]
+        self.stdout.write(f"Inbound flusher {owner} started (max_batch={max_batch}, linger={opts['linger_ms']}ms)")
+
+        last_lock = 0.0
+        held = False
+        while True:
+            # Un solo flusher activo (orden de llegada, sin contención); la corrección no depende del
+            # lock: cada flusher confirma solo lo que reclamó en su propia lista de procesamiento.
+            now = time.time()
+            if not held or now - last_lock >= lock_ttl / 3:
+                if not queue.acquire_lock(owner, lock_ttl):
+                    held = False
+                    if opts["once"]:
+                        self.stdout.write("Another flusher holds the lock. Exiting (--once).")
+                        return
+                    time.sleep(1.0)
+                    continue
+                if not held:
+                    # lock recién tomado: lo que dejaron flushers anteriores sin ack vuelve a la cola
+                    requeued = queue.recover(owner)
+                    if requeued:
+                        self.stdout.write(f"Requeued {requeued} unacked inbounds from previous flushers")
+                    held = True
+                last_lock = now
+
+            items = queue.claim(owner, max_batch)
+            if not items:
+                if opts["once"]:
+                    self.stdout.write("Queue empty. Exiting (--once).")
+                    return
+                time.sleep(linger)
+                continue
+
+            # Mientras commiteamos este lote se acumula el siguiente: el tamaño del lote
+            # crece solo con la carga, sin agregar latencia cuando hay poco tráfico.
+            close_old_connections()
+            try:
+                result = process_inbound_batch(items)
+            except DatabaseError as e:
+                # el lote no commiteó (conexión caída, commit rechazado): vuelve entero a la cola
+                requeued = queue.release(owner)
+                self.stderr.write(f"Batch failed, requeued {requeued} inbounds: {e!r}")
+                if opts["once"]:
+                    return
+                time.sleep(opts["retry_backoff"])
+                continue
+            queue.ack(owner, retry=result["retry"], dead=result["failed"])
+
+            self.stdout.write(
+                f"Flushed {len(items)} inbounds: saved={result['saved']} deduped={result['deduped']} "
+                f"retry={len(result['retry'])} failed={len(result['failed'])}"
+            )
+            if opts["once"]:
+                return
+            if result["retry"]:
+                time.sleep(opts["retry_backoff"])
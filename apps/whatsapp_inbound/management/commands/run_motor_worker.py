@@ -0,0 +1,66 @@
+import os
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from motor_response.jobs import claim_jobs, reap_stuck_jobs, run_motor_job
+
+
+class Command(BaseCommand):
+    help = "Ejecuta MotorJob pendientes (modo async de /v1/motor/respond) y publica MOTOR_DECIDED en el outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=int(os.getenv("MOTOR_WORKER_CONCURRENCY", "4")),
+            help="Turnos en paralelo (hilos: el trabajo es esperar al LLM)",
+        )
+        parser.add_argument("--once", action="store_true", help="Procesar un lote en el hilo actual y salir")
+
+    def handle(self, *args, **opts):
+        worker_id = os.getenv("WORKER_ID", str(uuid.uuid4())[:8])
+        concurrency = max(1, opts["concurrency"])
+        poll_sleep = float(os.getenv("MOTOR_WORKER_POLL_SLEEP", "0.5"))
+        reaper_every = int(os.getenv("MOTOR_JOB_REAPER_EVERY_SEC", "60"))
+        processing_ttl = int(os.getenv("MOTOR_JOB_PROCESSING_TTL_SEC", "300"))
+
+        if opts["once"]:
+            jobs = claim_jobs(concurrency, worker_id)
+            ok = sum(run_motor_job(job) for job in jobs)
+            self.stdout.write(f"Motor jobs: {ok}/{len(jobs)} done (--once).")
+            return
+
+        self.stdout.write(f"Motor worker {worker_id} started (concurrency={concurrency}).")
+        last_reaper = 0.0
+        inflight = set()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="motor") as pool:
+            while True:
+                now = time.time()
+                if now - last_reaper >= reaper_every:
+                    n = reap_stuck_jobs(processing_ttl)
+                    if n:
+                        self.stdout.write(f"Reaper: Reset {n} stuck motor jobs to PENDING.")
+                    last_reaper = now
+
+                # Rellenar los slots libres sin esperar a que termine el lote anterior
+                free = concurrency - len(inflight)
+                if free:
+                    inflight |= {pool.submit(self._run, job) for job in claim_jobs(free, worker_id)}
+
+                if not inflight:
+                    time.sleep(poll_sleep)
+                    continue
+                _, inflight = wait(inflight, timeout=poll_sleep, return_when=FIRST_COMPLETED)
+
+    @staticmethod
+    def _run(job):
+        close_old_connections()
+        try:
+            return run_motor_job(job)
+        finally:
+            # cada hilo del pool tiene su propia conexión
+            connection.close()
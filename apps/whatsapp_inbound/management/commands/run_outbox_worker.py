@@ -23,6 +23,8 @@ class Command(BaseCommand):
         worker_id = os.getenv("WORKER_ID", str(uuid.uuid4())[:8])
         # URL por defecto basada en tu docker-compose
         url = os.getenv("N8N_WEBHOOK_URL", "http://n8n:5678/webhook/whatsapp-inbound-event")
+        # Webhook por topic (default: el mismo; n8n puede rutear por X-Topic)
+        topic_urls = {OutboxEvent.TOPIC_MOTOR_DECIDED: os.getenv("N8N_MOTOR_WEBHOOK_URL") or url}
 
         poll_sleep = float(os.getenv("OUTBOX_POLL_SLEEP", "1.0"))
         batch_size = int(os.getenv("OUTBOX_BATCH_SIZE", "25"))
@@ -57,7 +59,7 @@ class Command(BaseCommand):
                 # 3. Procesar lote
                 self.stdout.write(f"Processing batch of {len(events)} events...")
                 for evt in events:
-                    ok, err, status_code = self._deliver(client, url, evt)
+                    ok, err, status_code = self._deliver(client, topic_urls.get(evt.topic, url), evt)
                     self._finalize(evt, ok, err, status_code, max_attempts)
 
                 if opts.get("once"):
@@ -2,7 +2,8 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
-from whatsapp_inbound.models import Tenant, TenantEvent  # <-- CAMBIAR si tu app se llama distinto
+from whatsapp_inbound.models import Tenant  # <-- CAMBIAR si tu app se llama distinto
+from whatsapp_inbound.catalog_sync import upsert_tenant_events
 
 
 DEFAULT_EVENTS_DISTRI_CIG = [
@@ -130,6 +131,7 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument("--tenant", required=True, help="tenant_key (ej: distri_cig_001)")
         parser.add_argument("--name", default=None, help="business_name si el tenant no existe (opcional)")
+        parser.add_argument("--full-sync", action="store_true", help="Desactiva eventos del tenant que no estén en la lista base")
 
     @transaction.atomic
     def handle(self, *args, **opts):
@@ -141,26 +143,8 @@ class Command(BaseCommand):
             defaults={"business_name": business_name, "name": business_name},
         )
 
-        created = 0
-        updated = 0
-
-        for ev in DEFAULT_EVENTS_DISTRI_CIG:
-            obj, was_created = TenantEvent.objects.update_or_create(
-                tenant=tenant,
-                name=ev["name"],
-                defaults={
-                    "max_points": ev["max_points"],
-                    "triggers": ev["triggers"],
-                    "freeform_reply": ev["freeform_reply"],
-                    "template_key": ev["template_key"],
-                    "is_active": True,
-                },
-            )
-            if was_created:
-                created += 1
-            else:
-                updated += 1
+        counts = upsert_tenant_events(tenant, DEFAULT_EVENTS_DISTRI_CIG, full_sync=opts["full_sync"])
 
         self.stdout.write(self.style.SUCCESS(
-            f"OK tenant={tenant.tenant_key} | created={created} updated={updated}"
+            f"OK tenant={tenant.tenant_key} | created={counts['created']} updated={counts['updated']} deactivated={counts['deactivated']}"
         ))
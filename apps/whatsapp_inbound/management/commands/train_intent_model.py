@@ -0,0 +1,60 @@
+import json
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from motor_response.intent_model import DIM_BITS, MIN_CONFIDENCE, model_path, train, training_pairs
+from whatsapp_inbound.models import Tenant
+
+
+class Command(BaseCommand):
+    help = (
+        "Entrena el clasificador local de primary_event de un tenant (n-gramas hasheados + regresión logística, "
+        "sólo NumPy) sobre los turnos del log de decisiones resueltos por el LLM y lo guarda en MOTOR_INTENT_MODEL_DIR."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tenant-id", required=True, help="tenant_key")
+        parser.add_argument("--since-days", type=int, default=90)
+        parser.add_argument("--jsonl", help='Pares extra, una línea JSON por turno: {"text": ..., "label": ...}')
+        parser.add_argument("--min-examples", type=int, default=50)
+        parser.add_argument("--min-per-label", type=int, default=5, help="Etiquetas más raras se descartan (quedan para el LLM)")
+        parser.add_argument("--dim-bits", type=int, default=DIM_BITS)
+        parser.add_argument("--epochs", type=int, default=150)
+        parser.add_argument("--dry-run", action="store_true", help="Entrenar y reportar sin escribir el archivo")
+
+    def handle(self, *args, **opts):
+        tenant = Tenant.objects.filter(tenant_key=opts["tenant_id"]).first()
+        if tenant is None:
+            raise CommandError(f"Tenant not found: {opts['tenant_id']}")
+
+        pairs = training_pairs(tenant, opts["since_days"])
+        if opts["jsonl"]:
+            with open(opts["jsonl"], encoding="utf-8") as fh:
+                rows = (json.loads(line) for line in fh if line.strip())
+                pairs += [(r["text"], r["label"]) for r in rows if r.get("text") and r.get("label")]
+
+        counts = Counter(label for _, label in pairs)
+        keep = {label for label, n in counts.items() if n >= opts["min_per_label"]}
+        pairs = [(text, label) for text, label in pairs if label in keep]
+        if len(pairs) < opts["min_examples"] or len(keep) < 2:
+            raise CommandError(
+                f"Not enough data: {len(pairs)} examples / {len(keep)} labels "
+                f"(need {opts['min_examples']} / 2)."
+            )
+
+        texts, labels = zip(*pairs)
+        model, metrics = train(texts, labels, dim_bits=opts["dim_bits"], epochs=opts["epochs"])
+        self.stdout.write(
+            f"{tenant.tenant_key}: {len(pairs)} examples, {len(keep)} labels, T={metrics['temperature']:.2f}"
+        )
+        if metrics["holdout"]:
+            self.stdout.write(
+                f"Holdout ({int(metrics['holdout'])}): accuracy {metrics['accuracy']:.3f} | "
+                f"coverage@{MIN_CONFIDENCE} {metrics['coverage']:.3f} | accuracy@{MIN_CONFIDENCE} {metrics['covered_accuracy']:.3f}"
+            )
+        if opts["dry_run"]:
+            return
+        path = model_path(tenant.tenant_key)
+        size = model.save(path)
+        self.stdout.write(self.style.SUCCESS(f"Saved {path} ({size / 1024:.1f} KiB)."))
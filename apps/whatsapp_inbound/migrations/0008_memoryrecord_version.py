@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_inbound', '0007_memoryrecord_sales_state_json'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='memoryrecord',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_inbound', '0008_memoryrecord_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['tenant', '-timestamp', '-id'], name='messages_tenant_time_idx'),
+        ),
+    ]
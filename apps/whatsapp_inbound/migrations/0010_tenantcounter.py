@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:51
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_inbound', '0009_message_tenant_time_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantCounter',
+            fields=[
+                ('tenant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to='whatsapp_inbound.tenant')),
+                ('contacts_total', models.BigIntegerField(default=0)),
+                ('messages_total', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
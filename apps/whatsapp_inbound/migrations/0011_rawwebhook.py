@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_inbound', '0010_tenantcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RawWebhook',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('codec', models.CharField(default='zlib', max_length=16)),
+                ('body', models.BinaryField()),
+                ('size_raw', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='raw_webhook',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='whatsapp_inbound.rawwebhook'),
+        ),
+    ]
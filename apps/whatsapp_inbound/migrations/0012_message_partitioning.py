@@ -0,0 +1,108 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_dedupe(apps, schema_editor):
+    Message = apps.get_model("whatsapp_inbound", "Message")
+    MessageDedupe = apps.get_model("whatsapp_inbound", "MessageDedupe")
+    schema_editor.execute(
+        f"INSERT INTO {MessageDedupe._meta.db_table} (tenant_id, wamid, created_at) "
+        f"SELECT tenant_id, wamid, created_at FROM {Message._meta.db_table}"
+    )
+
+
+# Conversión a tabla particionada por mes (solo PostgreSQL).
+# - PK (id, timestamp): en tablas particionadas la PK debe incluir la clave de partición.
+#   Django sigue tratando `id` como PK (los UUID son únicos de por sí).
+# - Se crean particiones mensuales desde el mes más viejo con datos hasta 3 meses adelante,
+#   más una partición DEFAULT para lo que caiga fuera de rango.
+# - Reescribe la tabla completa: en instalaciones grandes correr en ventana de mantenimiento.
+PARTITION_SQL = """
+ALTER TABLE whatsapp_inbound_message RENAME TO whatsapp_inbound_message_old;
+
+CREATE TABLE whatsapp_inbound_message (LIKE whatsapp_inbound_message_old INCLUDING DEFAULTS)
+    PARTITION BY RANGE ("timestamp");
+ALTER TABLE whatsapp_inbound_message ADD CONSTRAINT whatsapp_inbound_message_pkey_part PRIMARY KEY (id, "timestamp");
+
+DO $$
+DECLARE
+    m date;
+    last_month date;
+BEGIN
+    SELECT date_trunc('month', COALESCE(min("timestamp"), now()) AT TIME ZONE 'UTC')::date
+        INTO m FROM whatsapp_inbound_message_old;
+    last_month := (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months')::date;
+    WHILE m <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF whatsapp_inbound_message FOR VALUES FROM (%L) TO (%L)',
+            'whatsapp_inbound_message_' || to_char(m, 'YYYYMM'),
+            to_char(m, 'YYYY-MM-DD') || ' 00:00:00+00',
+            to_char((m + interval '1 month')::date, 'YYYY-MM-DD') || ' 00:00:00+00'
+        );
+        m := (m + interval '1 month')::date;
+    END LOOP;
+END $$;
+
+CREATE TABLE whatsapp_inbound_message_default PARTITION OF whatsapp_inbound_message DEFAULT;
+
+INSERT INTO whatsapp_inbound_message SELECT * FROM whatsapp_inbound_message_old;
+DROP TABLE whatsapp_inbound_message_old;
+
+CREATE INDEX messages_wamid_idx ON whatsapp_inbound_message (tenant_id, wamid);
+CREATE INDEX messages_contact_time_idx ON whatsapp_inbound_message (tenant_id, contact_id, "timestamp" DESC);
+CREATE INDEX messages_tenant_time_idx ON whatsapp_inbound_message (tenant_id, "timestamp" DESC, id DESC);
+CREATE INDEX whatsapp_inbound_message_conversation_id_idx ON whatsapp_inbound_message (conversation_id);
+CREATE INDEX whatsapp_inbound_message_contact_id_idx ON whatsapp_inbound_message (contact_id);
+CREATE INDEX whatsapp_inbound_message_raw_webhook_id_idx ON whatsapp_inbound_message (raw_webhook_id);
+
+ALTER TABLE whatsapp_inbound_message ADD CONSTRAINT whatsapp_inbound_message_tenant_id_fk
+    FOREIGN KEY (tenant_id) REFERENCES whatsapp_inbound_tenant (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE whatsapp_inbound_message ADD CONSTRAINT whatsapp_inbound_message_conversation_id_fk
+    FOREIGN KEY (conversation_id) REFERENCES whatsapp_inbound_conversation (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE whatsapp_inbound_message ADD CONSTRAINT whatsapp_inbound_message_contact_id_fk
+    FOREIGN KEY (contact_id) REFERENCES whatsapp_inbound_contact (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE whatsapp_inbound_message ADD CONSTRAINT whatsapp_inbound_message_raw_webhook_id_fk
+    FOREIGN KEY (raw_webhook_id) REFERENCES whatsapp_inbound_rawwebhook (sha256) DEFERRABLE INITIALLY DEFERRED;
+"""
+
+
+def partition_message_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    # params=None: sin interpolación del driver, los %I/%L de format() llegan intactos a PL/pgSQL
+    schema_editor.execute(PARTITION_SQL, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_inbound', '0011_rawwebhook'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageDedupe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='whatsapp_inbound.tenant')),
+                ('wamid', models.TextField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'wamid'), name='uniq_dedupe_wamid_per_tenant')],
+            },
+        ),
+        migrations.RunPython(backfill_dedupe, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='message',
+            name='uniq_wamid_per_tenant',
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['tenant', 'wamid'], name='messages_wamid_idx'),
+        ),
+        migrations.RunPython(partition_message_table, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:56
+
+import whatsapp_inbound.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Solo cambia el default Python de la PK (uuid4 -> uuid7): las filas existentes
+    conservan su id y no hay cambio de esquema, así que se evita cualquier
+    reescritura de tabla (en SQLite AlterField reconstruye la tabla).
+    """
+
+    dependencies = [
+        ('whatsapp_inbound', '0012_message_partitioning'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='contact',
+                    name='id',
+                    field=models.UUIDField(default=whatsapp_inbound.ids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='conversation',
+                    name='id',
+                    field=models.UUIDField(default=whatsapp_inbound.ids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='message',
+                    name='id',
+                    field=models.UUIDField(default=whatsapp_inbound.ids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+            database_operations=[],
+        ),
+    ]
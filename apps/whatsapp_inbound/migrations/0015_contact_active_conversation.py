@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_active_conversation(apps, schema_editor):
+    Contact = apps.get_model("whatsapp_inbound", "Contact")
+    Conversation = apps.get_model("whatsapp_inbound", "Conversation")
+    latest_active = (
+        Conversation.objects.filter(tenant=OuterRef("tenant"), contact=OuterRef("pk"), status="active")
+        .order_by("-opened_at")
+        .values("id")[:1]
+    )
+    Contact.objects.update(active_conversation=Subquery(latest_active))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_inbound', '0014_message_text_trgm_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contact',
+            name='active_conversation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='whatsapp_inbound.conversation'),
+        ),
+        migrations.RunPython(backfill_active_conversation, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:12
+
+import whatsapp_inbound.fastjson
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    encoder/decoder de JSONField son solo Python (orjson): sin cambio de esquema,
+    así que no se reescribe ninguna tabla (en SQLite AlterField la reconstruye).
+    """
+
+    dependencies = [
+        ('whatsapp_inbound', '0015_contact_active_conversation'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='attribution',
+                    name='raw_json',
+                    field=models.JSONField(decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=dict, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder),
+                ),
+                migrations.AlterField(
+                    model_name='memoryrecord',
+                    name='active_secondary_events',
+                    field=models.JSONField(decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=list, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder),
+                ),
+                migrations.AlterField(
+                    model_name='memoryrecord',
+                    name='facts_json',
+                    field=models.JSONField(decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=list, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder),
+                ),
+                migrations.AlterField(
+                    model_name='memoryrecord',
+                    name='recent_events',
+                    field=models.JSONField(decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=list, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder),
+                ),
+                migrations.AlterField(
+                    model_name='memoryrecord',
+                    name='sales_state_json',
+                    field=models.JSONField(decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=dict, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder),
+                ),
+                migrations.AlterField(
+                    model_name='memoryrecord',
+                    name='scores_json',
+                    field=models.JSONField(decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=dict, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder),
+                ),
+                migrations.AlterField(
+                    model_name='message',
+                    name='payload_json',
+                    field=models.JSONField(decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=dict, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder),
+                ),
+                migrations.AlterField(
+                    model_name='outboxevent',
+                    name='payload_json',
+                    field=models.JSONField(decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=dict, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder),
+                ),
+                migrations.AlterField(
+                    model_name='template',
+                    name='components_json',
+                    field=models.JSONField(decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=list, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder),
+                ),
+                migrations.AlterField(
+                    model_name='tenantevent',
+                    name='triggers',
+                    field=models.JSONField(blank=True, decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=list, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder),
+                ),
+            ],
+            database_operations=[],
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_inbound', '0016_jsonfield_orjson'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttributionDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('source_type', models.TextField()),
+                ('source_id', models.TextField(blank=True, default='')),
+                ('attributions', models.BigIntegerField(default=0)),
+                ('clicks', models.BigIntegerField(default=0)),
+                ('contacts', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('value', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrafficDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('messages_in', models.BigIntegerField(default=0)),
+                ('messages_out', models.BigIntegerField(default=0)),
+                ('unique_contacts', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrafficHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('direction', models.CharField(max_length=3)),
+                ('type', models.TextField()),
+                ('messages', models.BigIntegerField(default=0)),
+                ('contacts', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='attribution',
+            index=models.Index(fields=['captured_at'], name='attrib_captured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['created_at'], name='messages_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='attributiondaily',
+            name='tenant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='whatsapp_inbound.tenant'),
+        ),
+        migrations.AddField(
+            model_name='trafficdaily',
+            name='tenant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='whatsapp_inbound.tenant'),
+        ),
+        migrations.AddField(
+            model_name='traffichourly',
+            name='tenant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='whatsapp_inbound.tenant'),
+        ),
+        migrations.AddConstraint(
+            model_name='attributiondaily',
+            constraint=models.UniqueConstraint(fields=('tenant', 'day', 'source_type', 'source_id'), name='uniq_attribution_daily'),
+        ),
+        migrations.AddConstraint(
+            model_name='trafficdaily',
+            constraint=models.UniqueConstraint(fields=('tenant', 'day'), name='uniq_traffic_daily'),
+        ),
+        migrations.AddConstraint(
+            model_name='traffichourly',
+            constraint=models.UniqueConstraint(fields=('tenant', 'bucket', 'direction', 'type'), name='uniq_traffic_hourly'),
+        ),
+    ]
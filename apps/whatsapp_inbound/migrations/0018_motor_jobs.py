@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:29
+
+import django.utils.timezone
+import whatsapp_inbound.fastjson
+import whatsapp_inbound.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_inbound', '0017_traffic_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MotorJob',
+            fields=[
+                ('id', models.UUIDField(default=whatsapp_inbound.ids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('tenant_id', models.CharField(db_index=True, max_length=128)),
+                ('contact_key', models.CharField(max_length=128)),
+                ('turn_wamid', models.CharField(max_length=256)),
+                ('dedupe_key', models.CharField(max_length=512, unique=True)),
+                ('payload_json', models.JSONField(decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=dict, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder)),
+                ('result_json', models.JSONField(blank=True, decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('processing', 'processing'), ('done', 'done'), ('failed', 'failed')], db_index=True, default='pending', max_length=16)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_retry_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('locked_by', models.CharField(blank=True, max_length=128, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='outboxevent',
+            name='topic',
+            field=models.CharField(choices=[('INBOUND_SAVED', 'INBOUND_SAVED'), ('MOTOR_DECIDED', 'MOTOR_DECIDED')], max_length=64),
+        ),
+    ]
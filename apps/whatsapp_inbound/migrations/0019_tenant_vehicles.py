@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:37
+
+import django.db.models.deletion
+import django.utils.timezone
+import whatsapp_inbound.fastjson
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_inbound', '0018_motor_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantVehicle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=160)),
+                ('make', models.CharField(max_length=80)),
+                ('model', models.CharField(max_length=80)),
+                ('trims', models.JSONField(blank=True, decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=list, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder)),
+                ('aliases', models.JSONField(blank=True, decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=list, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder)),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vehicles', to='whatsapp_inbound.tenant')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'name'), name='uniq_vehicle_per_tenant')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:49
+
+import django.utils.timezone
+import whatsapp_inbound.fastjson
+import whatsapp_inbound.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_inbound', '0019_tenant_vehicles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MotorDecision',
+            fields=[
+                ('id', models.UUIDField(default=whatsapp_inbound.ids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('tenant_id', models.CharField(max_length=128)),
+                ('contact_key', models.CharField(max_length=128)),
+                ('turn_wamid', models.CharField(blank=True, default='', max_length=256)),
+                ('text_in', models.TextField(blank=True, default='')),
+                ('primary_event', models.CharField(max_length=80)),
+                ('secondary_events', models.JSONField(blank=True, decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=list, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder)),
+                ('confidence', models.FloatField(default=0.0)),
+                ('playbook_key', models.CharField(blank=True, default='', max_length=64)),
+                ('classifier', models.CharField(blank=True, default='', max_length=16)),
+                ('extractor', models.CharField(blank=True, default='', max_length=16)),
+                ('signals_json', models.JSONField(blank=True, decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder, null=True)),
+                ('policy_json', models.JSONField(decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=dict, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder)),
+                ('next_actions_json', models.JSONField(decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=list, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder)),
+                ('timings_json', models.JSONField(decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=dict, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder)),
+                ('usage_json', models.JSONField(decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=dict, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder)),
+                ('total_tokens', models.PositiveIntegerField(default=0)),
+                ('warning', models.CharField(blank=True, default='', max_length=64)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tenant_id', 'created_at'], name='motor_decision_tenant_time_idx'), models.Index(fields=['tenant_id', 'contact_key', 'created_at'], name='motor_decision_contact_idx'), models.Index(fields=['turn_wamid'], name='motor_decision_wamid_idx')],
+            },
+        ),
+    ]
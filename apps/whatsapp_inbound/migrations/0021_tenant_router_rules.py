@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:54
+
+import django.db.models.deletion
+import django.utils.timezone
+import whatsapp_inbound.fastjson
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_inbound', '0020_motor_decisions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantRouterRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=80)),
+                ('priority', models.IntegerField(default=100)),
+                ('when_json', models.JSONField(blank=True, decoder=whatsapp_inbound.fastjson.ORJSONFieldDecoder, default=dict, encoder=whatsapp_inbound.fastjson.ORJSONFieldEncoder)),
+                ('playbook_key', models.CharField(max_length=64)),
+                ('reason', models.TextField(blank=True, default='')),
+                ('level', models.PositiveSmallIntegerField(default=5)),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='router_rules', to='whatsapp_inbound.tenant')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'name'), name='uniq_router_rule_per_tenant')],
+            },
+        ),
+    ]
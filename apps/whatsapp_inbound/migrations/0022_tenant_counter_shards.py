@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:03
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_counters_to_shard_zero(apps, schema_editor):
+    TenantCounter = apps.get_model("whatsapp_inbound", "TenantCounter")
+    TenantCounterShard = apps.get_model("whatsapp_inbound", "TenantCounterShard")
+    TenantCounterShard.objects.bulk_create(
+        [
+            TenantCounterShard(
+                tenant_id=c.tenant_id, shard=0, contacts_total=c.contacts_total,
+                messages_total=c.messages_total, updated_at=c.updated_at,
+            )
+            for c in TenantCounter.objects.all().iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_inbound', '0021_tenant_router_rules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantCounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(default=0)),
+                ('contacts_total', models.BigIntegerField(default=0)),
+                ('messages_total', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counter_shards', to='whatsapp_inbound.tenant')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='tenantcountershard',
+            constraint=models.UniqueConstraint(fields=('tenant', 'shard'), name='uniq_counter_shard_per_tenant'),
+        ),
+        migrations.RunPython(copy_counters_to_shard_zero, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='TenantCounter',
+        ),
+    ]
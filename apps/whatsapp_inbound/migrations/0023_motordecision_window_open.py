@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_inbound', '0022_tenant_counter_shards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='motordecision',
+            name='window_open',
+            field=models.BooleanField(blank=True, null=True),
+        ),
+    ]
@@ -1,10 +1,17 @@
 import uuid
 import logging
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils import timezone
 
+from .fastjson import ORJSONFieldDecoder, ORJSONFieldEncoder
+from .ids import uuid7
+
 logger = logging.getLogger(__name__)
 
+# Todos los JSONField (de)serializan con orjson en vez de stdlib json
+FAST_JSON = {"encoder": ORJSONFieldEncoder, "decoder": ORJSONFieldDecoder}
+
 
 class Tenant(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -22,14 +29,37 @@ class Tenant(models.Model):
         return f"{key} - {bn}"
 
 
+class TenantCounterShard(models.Model):
+    """
+    Totales agregados por tenant, repartidos en N filas (shard = crc32(wamid) % TENANT_COUNTER_SHARDS):
+    los inbound concurrentes de un mismo tenant incrementan filas distintas en vez de serializarse en una.
+    El total es la suma de los shards; `manage.py rollup_tenant_counters` los recalcula y consolida en el 0.
+    """
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name="counter_shards")
+    shard = models.PositiveSmallIntegerField(default=0)
+    contacts_total = models.BigIntegerField(default=0)
+    messages_total = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tenant", "shard"], name="uniq_counter_shard_per_tenant")
+        ]
+
+
 class Contact(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
     contact_key = models.TextField()  # "wa:549..."
     wa_id = models.TextField(null=True, blank=True)
     phone_e164 = models.TextField(null=True, blank=True)
     profile_name = models.TextField(null=True, blank=True)
     crm_contact_id = models.TextField(null=True, blank=True)
+    # conversación activa denormalizada: el inbound la lee junto con el upsert del contacto.
+    # La limpia `manage.py close_idle_conversations` al cerrar por inactividad.
+    active_conversation = models.ForeignKey(
+        "Conversation", null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(default=timezone.now)
 
@@ -47,7 +77,7 @@ class Conversation(models.Model):
     STATUS_CLOSED = "closed"
     STATUS_CHOICES = [(STATUS_ACTIVE, "active"), (STATUS_CLOSED, "closed")]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
     contact = models.ForeignKey(Contact, on_delete=models.CASCADE)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_ACTIVE)
@@ -61,12 +91,30 @@ class Conversation(models.Model):
         ]
 
 
+class RawWebhook(models.Model):
+    """
+    Envelope crudo del webhook de Meta, guardado una sola vez por contenido
+    (sha256 del JSON canónico) y comprimido. Los Message lo referencian.
+    """
+    CODEC_ZLIB = "zlib"
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    codec = models.CharField(max_length=16, default=CODEC_ZLIB)
+    body = models.BinaryField()
+    size_raw = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def decode(self) -> dict:
+        from .raw_store import decompress_envelope
+        return decompress_envelope(self.codec, bytes(self.body))
+
+
 class Message(models.Model):
     DIR_IN = "in"
     DIR_OUT = "out"
     DIR_CHOICES = [(DIR_IN, "in"), (DIR_OUT, "out")]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE)
     contact = models.ForeignKey(Contact, on_delete=models.CASCADE)
@@ -78,15 +126,44 @@ class Message(models.Model):
     type = models.TextField()
     text_body = models.TextField(null=True, blank=True)
 
-    payload_json = models.JSONField(default=dict)
+    payload_json = models.JSONField(default=dict, **FAST_JSON)
+    # envelope completo del webhook (deduplicado/comprimido); antes vivía en payload_json["value_raw"]
+    raw_webhook = models.ForeignKey(RawWebhook, null=True, blank=True, on_delete=models.SET_NULL)
     created_at = models.DateTimeField(default=timezone.now)
 
+    def get_value_raw(self) -> dict:
+        """Envelope crudo; se descomprime solo cuando se pide (admin / debugging)."""
+        if self.raw_webhook_id:
+            rw = self.raw_webhook
+            return rw.decode() if rw else {}
+        return (self.payload_json or {}).get("value_raw") or {}
+
     class Meta:
-        constraints = [
-            models.UniqueConstraint(fields=["tenant", "wamid"], name="uniq_wamid_per_tenant")
-        ]
+        # En PostgreSQL la tabla está particionada por mes sobre `timestamp` (migración 0012,
+        # `manage.py manage_message_partitions`). Un UNIQUE en tabla particionada debe incluir
+        # la clave de partición, así que la unicidad (tenant, wamid) vive en MessageDedupe.
         indexes = [
+            models.Index(fields=["tenant", "wamid"], name="messages_wamid_idx"),
             models.Index(fields=["tenant", "contact", "-timestamp"], name="messages_contact_time_idx"),
+            # keyset pagination de /v1/whatsapp/inbound/logs
+            models.Index(fields=["tenant", "-timestamp", "-id"], name="messages_tenant_time_idx"),
+            # watermark de rollup_traffic (filas insertadas desde la última corrida)
+            models.Index(fields=["created_at"], name="messages_created_idx"),
+        ]
+
+
+class MessageDedupe(models.Model):
+    """
+    Fuente de verdad de la unicidad (tenant, wamid) de Message.
+    Se inserta antes que el Message en la misma transacción; un duplicado falla acá con IntegrityError.
+    """
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
+    wamid = models.TextField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tenant", "wamid"], name="uniq_dedupe_wamid_per_tenant")
         ]
 
 
@@ -102,12 +179,13 @@ class Attribution(models.Model):
     headline = models.TextField(null=True, blank=True)
     body = models.TextField(null=True, blank=True)
 
-    raw_json = models.JSONField(default=dict)
+    raw_json = models.JSONField(default=dict, **FAST_JSON)
     captured_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         indexes = [
             models.Index(fields=["tenant", "contact", "-captured_at"], name="attrib_contact_idx"),
+            models.Index(fields=["captured_at"], name="attrib_captured_idx"),
         ]
 
 
@@ -116,17 +194,20 @@ class MemoryRecord(models.Model):
     contact = models.ForeignKey(Contact, on_delete=models.CASCADE)
 
     summary = models.TextField(default="")
-    facts_json = models.JSONField(default=list)
+    facts_json = models.JSONField(default=list, **FAST_JSON)
 
     active_primary_event = models.TextField(null=True, blank=True)
-    active_secondary_events = models.JSONField(default=list)
-    recent_events = models.JSONField(default=list)
-    scores_json = models.JSONField(default=dict)
-    sales_state_json = models.JSONField(default=dict)
+    active_secondary_events = models.JSONField(default=list, **FAST_JSON)
+    recent_events = models.JSONField(default=list, **FAST_JSON)
+    scores_json = models.JSONField(default=dict, **FAST_JSON)
+    sales_state_json = models.JSONField(default=dict, **FAST_JSON)
 
     last_user_message_at = models.DateTimeField(null=True, blank=True)
     updated_at = models.DateTimeField(default=timezone.now)
 
+    # concurrencia optimista (MemoryRepository.flush)
+    version = models.PositiveIntegerField(default=0)
+
     def save(self, *args, **kwargs):
         # Defense in depth: Ensure JSON fields are never None
         if self.active_secondary_events is None:
@@ -153,7 +234,7 @@ class Template(models.Model):
     name = models.TextField()
     category = models.TextField(null=True, blank=True)
     language = models.TextField(null=True, blank=True, default="es_AR")
-    components_json = models.JSONField(default=list)
+    components_json = models.JSONField(default=list, **FAST_JSON)
     meta_status = models.CharField(max_length=40, blank=True, default="")
     active = models.BooleanField(default=True)
     updated_at = models.DateTimeField(default=timezone.now)
@@ -172,7 +253,7 @@ class TenantEvent(models.Model):
     max_points = models.PositiveIntegerField(default=10)
 
     # lista JSON: [{ "type":"kw", "value":"precio", "points":5 }, ...]
-    triggers = models.JSONField(default=list, blank=True)
+    triggers = models.JSONField(default=list, blank=True, **FAST_JSON)
 
     freeform_reply = models.TextField(blank=True, default="")
     template_key = models.CharField(max_length=120, blank=True, default="")
@@ -192,9 +273,83 @@ class TenantEvent(models.Model):
         return f"{self.tenant.tenant_key}:{self.name}"
 
 
+class TenantVehicle(models.Model):
+    """
+    Gazetteer de vehículos del tenant (marca/modelo/versiones/alias) para el extractor local del motor.
+    name = "<marca> <modelo>" normalizado: clave de upsert del seed.
+    """
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name="vehicles")
+    name = models.CharField(max_length=160)
+    make = models.CharField(max_length=80)
+    model = models.CharField(max_length=80)
+    trims = models.JSONField(default=list, blank=True, **FAST_JSON)  # ["XEI", "SEG", "GR-Sport"]
+    aliases = models.JSONField(default=list, blank=True, **FAST_JSON)  # ["corola"]
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tenant", "name"], name="uniq_vehicle_per_tenant")
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.make} {self.model}"
+
+
+class TenantRouterRule(models.Model):
+    """
+    Regla del router híbrido del motor para un tenant (motor_response.router_rules).
+    Mismo name que una regla default => la reemplaza; is_active=False => la desactiva.
+    when_json: {"feature": valor | [valores] | {"in"|"not_in"|"any"|"contains"|"present": arg}} (AND).
+    """
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name="router_rules")
+    name = models.CharField(max_length=80)
+    priority = models.IntegerField(default=100)  # menor = se evalúa antes
+    when_json = models.JSONField(default=dict, blank=True, **FAST_JSON)
+    playbook_key = models.CharField(max_length=64)
+    reason = models.TextField(blank=True, default="")
+    level = models.PositiveSmallIntegerField(default=5)  # RouterDecision.priority_level
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tenant", "name"], name="uniq_router_rule_per_tenant")
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.name} -> {self.playbook_key}"
+
+    def as_rule(self) -> dict:
+        return {
+            "name": self.name,
+            "priority": self.priority,
+            "when": self.when_json or {},
+            "playbook_key": self.playbook_key,
+            "reason": self.reason,
+            "level": self.level,
+            "is_active": self.is_active,
+        }
+
+    def clean(self):
+        # Misma validación que el seed: se compila la tabla del tenant con esta fila (nueva o editada),
+        # así el admin no guarda una regla que table_for tendría que descartar.
+        from motor_response.router_rules import RuleError, compile_rules, merge_rules
+
+        others = TenantRouterRule.objects.filter(tenant_id=self.tenant_id).exclude(pk=self.pk).order_by("priority", "name")
+        try:
+            compile_rules(merge_rules([r.as_rule() for r in others] + [self.as_rule()]))
+        except RuleError as e:
+            raise ValidationError(str(e))
+
+
 class OutboxEvent(models.Model):
     TOPIC_INBOUND_SAVED = "INBOUND_SAVED"
-    TOPIC_CHOICES = [(TOPIC_INBOUND_SAVED, TOPIC_INBOUND_SAVED)]
+    TOPIC_MOTOR_DECIDED = "MOTOR_DECIDED"
+    TOPIC_CHOICES = [
+        (TOPIC_INBOUND_SAVED, TOPIC_INBOUND_SAVED),
+        (TOPIC_MOTOR_DECIDED, TOPIC_MOTOR_DECIDED),
+    ]
 
     STATUS_PENDING = "pending"
     STATUS_PROCESSING = "processing"
@@ -217,7 +372,7 @@ class OutboxEvent(models.Model):
     # idempotencia por etapa
     dedupe_key = models.CharField(max_length=512, unique=True)
 
-    payload_json = models.JSONField(default=dict)
+    payload_json = models.JSONField(default=dict, **FAST_JSON)
 
     status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
     attempts = models.PositiveIntegerField(default=0)
@@ -228,3 +383,133 @@ class OutboxEvent(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+
+class MotorJob(models.Model):
+    """
+    Turno del motor encolado por `/v1/motor/respond?mode=async`. Lo ejecuta `manage.py run_motor_worker`
+    y el resultado sale como OutboxEvent MOTOR_DECIDED (mismo canal de entrega a n8n que INBOUND_SAVED).
+    """
+    STATUS_PENDING = "pending"
+    STATUS_PROCESSING = "processing"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, STATUS_PENDING),
+        (STATUS_PROCESSING, STATUS_PROCESSING),
+        (STATUS_DONE, STATUS_DONE),
+        (STATUS_FAILED, STATUS_FAILED),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    tenant_id = models.CharField(max_length=128, db_index=True)
+    contact_key = models.CharField(max_length=128)
+    turn_wamid = models.CharField(max_length=256)
+
+    # un job por turno: reintentos de n8n devuelven el mismo job
+    dedupe_key = models.CharField(max_length=512, unique=True)
+
+    payload_json = models.JSONField(default=dict, **FAST_JSON)  # MotorRespondIn
+    result_json = models.JSONField(null=True, blank=True, **FAST_JSON)  # MotorRespondOut
+    error = models.TextField(null=True, blank=True)
+
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_retry_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=128, null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class MotorDecision(models.Model):
+    """
+    Log append-only de cada turno resuelto por el motor (sync o async; los hits de cache no se repiten).
+    Se escribe fuera del request path con `motor_response.decision_log` (bulk_create por lotes).
+    """
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    tenant_id = models.CharField(max_length=128)
+    contact_key = models.CharField(max_length=128)
+    turn_wamid = models.CharField(max_length=256, blank=True, default="")
+    text_in = models.TextField(blank=True, default="")
+
+    primary_event = models.CharField(max_length=80)
+    secondary_events = models.JSONField(default=list, blank=True, **FAST_JSON)
+    confidence = models.FloatField(default=0.0)
+    playbook_key = models.CharField(max_length=64, blank=True, default="")  # router híbrido (shadow)
+    classifier = models.CharField(max_length=16, blank=True, default="")  # llm | local | "" (reglas previas)
+    extractor = models.CharField(max_length=16, blank=True, default="")  # llm | local
+    window_open = models.BooleanField(null=True, blank=True)  # null: turnos logueados antes de guardarlo
+
+    signals_json = models.JSONField(null=True, blank=True, **FAST_JSON)
+    policy_json = models.JSONField(default=dict, **FAST_JSON)
+    next_actions_json = models.JSONField(default=list, **FAST_JSON)
+    timings_json = models.JSONField(default=dict, **FAST_JSON)  # deadline: budget/elapsed/expired/stages_ms
+    usage_json = models.JSONField(default=dict, **FAST_JSON)  # tokens por etapa
+    total_tokens = models.PositiveIntegerField(default=0)
+    warning = models.CharField(max_length=64, blank=True, default="")
+
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["tenant_id", "created_at"], name="motor_decision_tenant_time_idx"),
+            models.Index(fields=["tenant_id", "contact_key", "created_at"], name="motor_decision_contact_idx"),
+            models.Index(fields=["turn_wamid"], name="motor_decision_wamid_idx"),
+        ]
+
+
+class TrafficHourly(models.Model):
+    """
+    Rollup: mensajes por hora (UTC) por tenant/dirección/tipo.
+    Lo mantiene `manage.py rollup_traffic` recalculando solo los buckets tocados desde el último watermark.
+    """
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
+    bucket = models.DateTimeField()  # inicio de la hora
+    direction = models.CharField(max_length=3)
+    type = models.TextField()
+    messages = models.BigIntegerField(default=0)
+    contacts = models.BigIntegerField(default=0)  # distintos dentro de la hora (no sumable entre horas)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tenant", "bucket", "direction", "type"], name="uniq_traffic_hourly"),
+        ]
+
+
+class TrafficDaily(models.Model):
+    """Rollup diario (UTC) por tenant, con contactos únicos del día."""
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
+    day = models.DateField()
+    messages_in = models.BigIntegerField(default=0)
+    messages_out = models.BigIntegerField(default=0)
+    unique_contacts = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tenant", "day"], name="uniq_traffic_daily"),
+        ]
+
+
+class AttributionDaily(models.Model):
+    """Rollup diario (UTC) de Attribution por anuncio (source_id); clicks = ctwa_clid distintos."""
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
+    day = models.DateField()
+    source_type = models.TextField()
+    source_id = models.TextField(default="", blank=True)  # "" = sin source_id (NULL rompería el UNIQUE)
+    attributions = models.BigIntegerField(default=0)
+    clicks = models.BigIntegerField(default=0)
+    contacts = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tenant", "day", "source_type", "source_id"], name="uniq_attribution_daily"),
+        ]
+
+
+class RollupWatermark(models.Model):
+    """Hasta dónde (created_at / captured_at) ya se agregó cada fuente."""
+    name = models.CharField(max_length=64, primary_key=True)
+    value = models.DateTimeField()
@@ -0,0 +1,103 @@
+from typing import Any, Dict, Optional
+
+from pydantic_core import core_schema
+
+from . import fastjson
+
+_UNSET = object()
+
+
+def canonical_dumps(value: Any) -> str:
+    # Claves ordenadas, sin espacios, UTF-8 sin escapar: el mismo envelope da siempre el mismo sha256.
+    return fastjson.dumps(value, sort_keys=True)
+
+
+class RawJSON:
+    """
+    Objeto JSON que se persiste tal cual (envelope de Meta).
+
+    Guarda el texto serializado y/o el valor parseado, y calcula el otro solo si alguien
+    lo pide. Si el normalizador manda el envelope como string JSON, se escribe en la BD
+    sin round trip decode/encode; si llega como objeto, se serializa una única vez
+    (canonical_dumps) y ese texto lo reutilizan el hash, la compresión y la cola write-behind.
+    """
+
+    __slots__ = ("_text", "_value")
+
+    def __init__(self, text: Optional[str] = None, value: Any = _UNSET):
+        self._text = text
+        self._value = value
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = canonical_dumps(self._value)
+        return self._text
+
+    @property
+    def value(self) -> Dict[str, Any]:
+        if self._value is _UNSET:
+            self._value = fastjson.loads(self._text)
+        return self._value
+
+    def __bool__(self):
+        if self._value is not _UNSET:
+            return bool(self._value)
+        return self._text not in ("", "{}")
+
+    def __eq__(self, other):
+        if isinstance(other, RawJSON):
+            other = other.value
+        return self.value == other
+
+    def __repr__(self):
+        return f"RawJSON({self.text[:80]!r})"
+
+    @classmethod
+    def _validate(cls, v: Any, info: core_schema.ValidationInfo) -> "RawJSON":
+        if isinstance(v, cls):
+            return v
+        if isinstance(v, dict):
+            return cls(value=v)
+        if isinstance(v, (str, bytes)):
+            text = v.decode("utf-8") if isinstance(v, bytes) else v
+            # Texto que escribimos nosotros (cola write-behind): no hace falta re-chequearlo
+            if info.context and info.context.get("raw_json_trusted"):
+                return cls(text=text)
+            # Solo well-formedness: el valor queda cacheado por si alguien lo lee
+            try:
+                value = fastjson.loads(text)
+            except ValueError as e:
+                raise ValueError(f"invalid JSON: {e}") from e
+            if not isinstance(value, dict):
+                raise ValueError("expected a JSON object")
+            return cls(text=text, value=value)
+        raise ValueError("expected a JSON object or its serialized text")
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler):
+        return core_schema.with_info_plain_validator_function(
+            cls._validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda v: v.text, when_used="json"
+            ),
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(cls, schema, handler):
+        return {
+            "anyOf": [
+                {"type": "object"},
+                {"type": "string", "contentMediaType": "application/json"},
+            ]
+        }
+
+
+def passthrough_object(v: Any) -> Dict[str, Any]:
+    """
+    Validador de objetos JSON arbitrarios chicos (message.raw, referral, ...):
+    solo chequea que sea un objeto; no recorre ni copia su contenido.
+    """
+    if not isinstance(v, dict):
+        raise ValueError("expected a JSON object")
+    return v
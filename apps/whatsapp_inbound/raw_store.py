@@ -0,0 +1,40 @@
+import hashlib
+import zlib
+from typing import Any, Dict, Optional, Tuple, Union
+
+from . import fastjson
+from .models import RawWebhook
+from .raw_json import RawJSON, canonical_dumps
+
+ZLIB_LEVEL = 6
+
+
+def encode_envelope(raw: Union[RawJSON, Dict[str, Any]]) -> Tuple[str, bytes, int]:
+    """
+    JSON canónico (sort_keys) -> (sha256, blob comprimido, tamaño sin comprimir).
+    El mismo envelope produce siempre el mismo hash, así que un batch de Meta se guarda una vez.
+    Un RawJSON que llegó como texto se hashea/comprime tal cual, sin re-serializar.
+    """
+    text = raw.text if isinstance(raw, RawJSON) else canonical_dumps(raw)
+    data = text.encode("utf-8")
+    return hashlib.sha256(data).hexdigest(), zlib.compress(data, ZLIB_LEVEL), len(data)
+
+
+def decompress_envelope(codec: str, body: bytes) -> Dict[str, Any]:
+    if codec != RawWebhook.CODEC_ZLIB:
+        raise ValueError(f"Unknown raw webhook codec: {codec}")
+    return fastjson.loads(zlib.decompress(body))
+
+
+def store_raw_webhook(raw: Optional[Union[RawJSON, Dict[str, Any]]]) -> Optional[str]:
+    """
+    INSERT ... ON CONFLICT DO NOTHING del envelope. Devuelve el sha256 (o None si no hay envelope).
+    """
+    if not raw:
+        return None
+    sha, blob, size = encode_envelope(raw)
+    RawWebhook.objects.bulk_create(
+        [RawWebhook(sha256=sha, codec=RawWebhook.CODEC_ZLIB, body=blob, size_raw=size)],
+        ignore_conflicts=True,
+    )
+    return sha
@@ -1,5 +1,11 @@
 from ninja import Schema
-from typing import Any, Dict, Optional, List
+from pydantic import PlainValidator, WithJsonSchema
+from typing import Annotated, Any, Dict, Optional, List
+
+from .raw_json import RawJSON, passthrough_object
+
+# Objetos JSON arbitrarios de Meta: se chequea que sean objeto, sin recorrer ni copiar su contenido
+RawObject = Annotated[Dict[str, Any], PlainValidator(passthrough_object), WithJsonSchema({"type": "object"})]
 
 
 class WANormalizedContact(Schema):
@@ -17,9 +23,9 @@ class WANormalizedMessage(Schema):
     timestamp: str  # ISO
     type: str
     text: Optional[WANormalizedMessageText] = None
-    interactive: Optional[Dict[str, Any]] = None
-    media: Optional[Dict[str, Any]] = None
-    raw: Dict[str, Any]
+    interactive: Optional[RawObject] = None
+    media: Optional[RawObject] = None
+    raw: RawObject
 
 
 class WANormalizedMetadata(Schema):
@@ -39,8 +45,9 @@ class WANormalizedInbound(Schema):
     contact: WANormalizedContact
     message: WANormalizedMessage
 
-    referral: Optional[Dict[str, Any]] = None
-    raw: Dict[str, Any]
+    referral: Optional[RawObject] = None
+    # Envelope completo: objeto o su texto JSON; se guarda sin round trip (ver RawJSON)
+    raw: RawJSON
 
 
 class MessageLogItem(Schema):
@@ -51,10 +58,36 @@ class MessageLogItem(Schema):
     type: str
     text_body: Optional[str] = None
     channel: str
+    direction: Optional[str] = None
 
 
 class MessageLogResponse(Schema):
     items: list[MessageLogItem]
+    next_cursor: Optional[str] = None
+
+
+class TrafficHourlyItem(Schema):
+    bucket: str
+    direction: str
+    type: str
+    messages: int
+    contacts: int
+
+
+class TrafficDailyItem(Schema):
+    day: str
+    messages_in: int
+    messages_out: int
+    unique_contacts: int
+
+
+class AttributionDailyItem(Schema):
+    day: str
+    source_type: str
+    source_id: str
+    attributions: int
+    clicks: int
+    contacts: int
 
 
 class TriggerIn(Schema):
@@ -71,11 +104,27 @@ class TenantEventIn(Schema):
     template_key: Optional[str] = ""
 
 
+class VehicleIn(Schema):
+    make: str
+    model: str
+    trims: List[str] = []
+    aliases: List[str] = []
+
+
+class SeedVehiclesIn(Schema):
+    tenant_id: str
+    vehicles: List[VehicleIn]
+    # full sync: desactiva los vehículos del tenant que no vengan en el payload
+    full_sync: bool = False
+
+
 class SeedEventsIn(Schema):
     tenant_id: str
     business_name: Optional[str] = None
     domain: Optional[str] = "generic"
     events: List[TenantEventIn]
+    # full sync: desactiva los eventos del tenant que no vengan en el payload
+    full_sync: bool = False
 
 
 class TemplateIn(Schema):
@@ -89,3 +138,24 @@ class TemplateIn(Schema):
 class SeedTemplatesIn(Schema):
     tenant_id: str
     templates: List[TemplateIn]
+    # full sync: desactiva los templates del tenant que no vengan en el payload
+    full_sync: bool = False
+
+
+class RouterRuleIn(Schema):
+    # mismo name que una regla default del router (motor_response.router_rules.DEFAULT_RULES) la reemplaza
+    name: str
+    priority: int
+    when: Dict[str, Any] = {}
+    playbook_key: str
+    reason: str = ""
+    level: int = 5
+    # False desactiva la regla (o la default del mismo name)
+    is_active: bool = True
+
+
+class SeedRouterRulesIn(Schema):
+    tenant_id: str
+    rules: List[RouterRuleIn]
+    # full sync: desactiva las reglas del tenant que no vengan en el payload
+    full_sync: bool = False
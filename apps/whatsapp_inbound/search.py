@@ -0,0 +1,53 @@
+from django.db.models import F, QuerySet
+from django.db.models.lookups import IContains
+
+from .models import Message, Tenant
+
+# pg_trgm no puede usar el índice con patrones de menos de 3 caracteres
+MIN_QUERY_LEN = 3
+
+
+class TrigramIContains(IContains):
+    """
+    icontains que en PostgreSQL compila a `text_body ILIKE '%q%'`: el icontains de Django genera
+    `UPPER(text_body::text) LIKE UPPER(...)`, que el índice `gin (text_body gin_trgm_ops)` no sirve.
+    En otros motores es el icontains de siempre.
+    """
+    lookup_name = "trgm_icontains"
+
+    def as_postgresql(self, compiler, connection):
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs_sql} ILIKE {rhs_sql}", (*lhs_params, *rhs_params)
+
+    def as_sql(self, compiler, connection):
+        return IContains(self.lhs, self.rhs).as_sql(compiler, connection)
+
+
+def search_messages(qs: QuerySet, query: str) -> QuerySet:
+    """
+    Filtra `qs` por texto en Message.text_body.
+
+    En PostgreSQL el ILIKE '%...%' de TrigramIContains usa el índice GIN pg_trgm
+    `messages_text_trgm_idx` (migración 0014); en SQLite (tests) cae en LIKE normal.
+    Patrones cortos devuelven vacío en vez de escanear toda la tabla.
+    """
+    query = (query or "").strip()
+    if len(query) < MIN_QUERY_LEN:
+        return qs.none()
+    return qs.filter(TrigramIContains(F("text_body"), query))
+
+
+def search_tenant_messages(tenant: Tenant, query: str, contact_key: str | None = None, limit: int = 50):
+    qs = Message.objects.filter(tenant=tenant)
+    if contact_key:
+        qs = qs.filter(contact__contact_key=contact_key)
+    qs = search_messages(qs, query)
+    return (
+        qs.select_related("tenant", "contact")
+        .only(
+            "id", "wamid", "timestamp", "type", "text_body", "channel", "direction",
+            "tenant__tenant_key", "tenant__name", "contact__contact_key",
+        )
+        .order_by("-timestamp", "-id")[: max(1, min(limit, 200))]
+    )
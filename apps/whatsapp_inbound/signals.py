@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog_cache import bump_catalog_version
+from .models import Template, TenantEvent, TenantRouterRule, TenantVehicle
+
+
+@receiver(post_save, sender=TenantEvent)
+@receiver(post_delete, sender=TenantEvent)
+@receiver(post_save, sender=Template)
+@receiver(post_delete, sender=Template)
+@receiver(post_save, sender=TenantVehicle)
+@receiver(post_delete, sender=TenantVehicle)
+@receiver(post_save, sender=TenantRouterRule)
+@receiver(post_delete, sender=TenantRouterRule)
+def invalidate_tenant_catalog(sender, instance, **kwargs):
+    bump_catalog_version(instance.tenant_id)
@@ -1,8 +1,9 @@
 from ninja import NinjaAPI
 from whatsapp_inbound.api import router as inbound_router
+from whatsapp_inbound.fastjson import ORJSONParser, ORJSONRenderer
 from motor_response.api import router as motor_router
 
-api = NinjaAPI()
+api = NinjaAPI(parser=ORJSONParser(), renderer=ORJSONRenderer())
 
 api.add_router("", inbound_router)
 api.add_router("", motor_router)
@@ -116,6 +116,18 @@ else:
     }
 
 
+# Cache compartido entre workers (dedupe de inbound/motor, versiones de catálogo).
+# Sin REDIS_URL queda el LocMemCache por proceso de Django (dev/tests).
+_redis_url = os.environ.get('REDIS_URL')
+if _redis_url:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': _redis_url,
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -0,0 +1,140 @@
+"""
+Benchmark de la capa JSON: stdlib json vs orjson (parser/renderer de Ninja + encoder/decoder de JSONField).
+
+Hace N requests in-process (django.test.Client) contra /v1/whatsapp/inbound y /v1/motor/respond
+con cada capa y reporta requests/s. Las llamadas LLM del motor (clasificador, extractor,
+drafter) se reemplazan por respuestas fijas para medir solo el costo del request.
+La BD debe estar migrada.
+
+Uso:
+    DATABASE_URL=postgres://... python scripts/bench_json_layer.py --requests 2000 --envelope-kb 64
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.apps import apps
+from django.db import models
+from django.test import Client
+from ninja.parser import Parser
+from ninja.renderers import JSONRenderer
+
+import motor_response.api as motor_api
+import motor_response.llm_classifier as llm_classifier
+from config.api import api
+from whatsapp_inbound.fastjson import ORJSONFieldDecoder, ORJSONFieldEncoder, ORJSONParser, ORJSONRenderer
+
+LAYERS = {
+    "stdlib": (Parser, JSONRenderer, None, None),
+    "orjson": (ORJSONParser, ORJSONRenderer, ORJSONFieldEncoder, ORJSONFieldDecoder),
+}
+
+LLM_STUB = {
+    "ok": True,
+    "decision": {"primary_event": "BENCH", "secondary_events": [], "confidence": 0.9},
+    "policy": {"response_mode": "FREEFORM"},
+    "next_actions": [],
+    "summary": "bench",
+    "facts": [{"key": "k", "value": "v"}],
+}
+
+
+def use_layer(name: str):
+    parser_cls, renderer_cls, encoder, decoder = LAYERS[name]
+    api.parser = parser_cls()
+    api.renderer = renderer_cls()
+    for model in apps.get_app_config("whatsapp_inbound").get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, models.JSONField):
+                field.encoder, field.decoder = encoder, decoder
+
+
+def envelope(kb: int) -> dict:
+    msgs = []
+    while len(str(msgs)) < kb * 1024:
+        i = len(msgs)
+        msgs.append({"id": f"wamid.{i}", "from": "5493511111111", "timestamp": "1700000000",
+                     "type": "text", "text": {"body": "hola, quiero info " * 5}})
+    return {"object": "whatsapp_business_account",
+            "entry": [{"id": "1", "changes": [{"field": "messages", "value": {"messages": msgs}}]}]}
+
+
+def inbound_body(run_id: str, i: int, raw: dict) -> list:
+    wamid = f"wamid.bench.{run_id}.{i}"
+    return [{
+        "tenant_id": "bench_json",
+        "trace_id": "bench",
+        "received_at": "2026-01-01T00:00:00Z",
+        "metadata": {"phone_number_id": "1"},
+        "contact": {"wa_id": "5493511111111", "contact_key": f"wa:{i % 50}"},
+        "message": {"wamid": wamid, "timestamp": "2026-01-01T00:00:00Z", "type": "text",
+                    "text": {"body": "hola"}, "raw": {"id": wamid}},
+        "raw": raw,
+    }]
+
+
+def motor_body(run_id: str, i: int) -> dict:
+    return {
+        "tenant_id": "bench_json",
+        "contact_key": f"wa:{i % 50}",
+        "wa_id": "5493511111111",
+        "phone_number_id": "1",
+        "turn_wamid": f"wamid.motor.{run_id}.{i}",
+        "text": "hola, quiero info del plan",
+        "timestamp_in": "2026-01-01T00:00:00Z",
+        "channel": "whatsapp",
+    }
+
+
+def run(client: Client, path: str, bodies: list) -> tuple:
+    """-> (requests/s, µs de CPU por request). El CPU excluye la espera de I/O (commits)."""
+    # Serializar fuera del cronómetro: solo medimos el lado servidor
+    encoded = [json.dumps(b) for b in bodies]
+    t0, c0 = time.perf_counter(), time.process_time()
+    for body in encoded:
+        r = client.post(path, data=body, content_type="application/json")
+        assert r.status_code == 200, r.content[:200]
+    wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+    return len(bodies) / wall, cpu / len(bodies) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--envelope-kb", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    motor_api.classify_with_openai = lambda **kw: dict(LLM_STUB)
+    llm_classifier.extract_signals = lambda **kw: {"intent": "INFO", "objection": None, "risk": False, "entities": {}}
+    llm_classifier.generate_draft = lambda **kw: "Hola! Te cuento del plan."
+    raw = envelope(args.envelope_kb)
+    client = Client()
+
+    print(f"requests={args.requests} envelope≈{args.envelope_kb}KB rounds={args.rounds}")
+    # Rondas alternadas: la BD crece durante el bench y no queremos favorecer a una capa
+    results = {name: [] for name in LAYERS}
+    for _ in range(args.rounds):
+        for name in LAYERS:
+            use_layer(name)
+            run_id = uuid.uuid4().hex[:8]
+            inbound = run(client, "/v1/whatsapp/inbound", [inbound_body(run_id, i, raw) for i in range(args.requests)])
+            motor = run(client, "/v1/motor/respond", [motor_body(run_id, i) for i in range(args.requests)])
+            results[name].append(inbound + motor)
+
+    for name, rows in results.items():
+        avg = [sum(col) / len(col) for col in zip(*rows)]
+        print(
+            f"{name:>6}: inbound {avg[0]:,.0f} req/s ({avg[1]:,.0f} µs CPU/req) | "
+            f"motor/respond {avg[2]:,.0f} req/s ({avg[3]:,.0f} µs CPU/req)"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark de inserción: PK uuid4 (aleatoria) vs uuid7 (ordenada por tiempo).
+
+Crea dos tablas temporales con PK uuid, inserta N filas en lotes y reporta
+filas/s y tamaño del índice de la PK (solo PostgreSQL).
+
+Uso:
+    DATABASE_URL=postgres://... python scripts/bench_uuid_inserts.py --rows 5000000
+"""
+import argparse
+import os
+import time
+import uuid
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.db import connection, transaction
+
+from whatsapp_inbound.ids import uuid7
+
+
+def run(table: str, gen, rows: int, batch: int) -> dict:
+    is_pg = connection.vendor == "postgresql"
+    uuid_type = "uuid" if is_pg else "char(32)"
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        cursor.execute(f"CREATE TABLE {table} (id {uuid_type} PRIMARY KEY, body text NOT NULL)")
+
+    body = "x" * 200
+    t0 = time.perf_counter()
+    done = 0
+    while done < rows:
+        n = min(batch, rows - done)
+        values = [(gen() if is_pg else gen().hex, body) for _ in range(n)]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(f"INSERT INTO {table} (id, body) VALUES (%s, %s)", values)
+        done += n
+    elapsed = time.perf_counter() - t0
+
+    index_mb = None
+    if is_pg:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_relation_size(%s)", [f"{table}_pkey"])
+            index_mb = cursor.fetchone()[0] / (1024 * 1024)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {table}")
+
+    return {"rows_per_s": rows / elapsed, "seconds": elapsed, "pk_index_mb": index_mb}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=5_000)
+    args = parser.parse_args()
+
+    print(f"Backend: {connection.vendor} | rows={args.rows} batch={args.batch}")
+    for name, gen in (("uuid4", uuid.uuid4), ("uuid7", uuid7)):
+        r = run(f"bench_pk_{name}", gen, args.rows, args.batch)
+        idx = f"{r['pk_index_mb']:.1f} MB" if r["pk_index_mb"] is not None else "n/a"
+        print(f"{name}: {r['rows_per_s']:,.0f} rows/s ({r['seconds']:.1f}s) | pk index {idx}")
+
+
+if __name__ == "__main__":
+    main()
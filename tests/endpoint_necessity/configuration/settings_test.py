@@ -1,3 +1,5 @@
+import os
+
 from config.settings import *
 
 # Override Database to use SQLite for tests
@@ -10,3 +12,6 @@ DATABASES = {
 
 # Disable WhiteNoise for tests to speed up
 STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+
+# Log de decisiones del motor en el hilo del test (el hilo de fondo usaría otra conexión fuera de la transacción)
+os.environ.setdefault("MOTOR_DECISION_LOG", "sync")
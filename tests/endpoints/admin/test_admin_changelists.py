@@ -0,0 +1,52 @@
+import pytest
+from django.utils import timezone
+from whatsapp_inbound.models import Conversation, Message, OutboxEvent
+
+
+@pytest.fixture
+def message(tenant, contact):
+    conv = Conversation.objects.create(tenant=tenant, contact=contact)
+    return Message.objects.create(
+        tenant=tenant, conversation=conv, contact=contact, direction=Message.DIR_IN,
+        wamid="wamid.admin", timestamp=timezone.now(), type="text", text_body="hola",
+        payload_json={"big": "x" * 1000},
+    )
+
+
+def _outbox(i, status=OutboxEvent.STATUS_FAILED):
+    return OutboxEvent.objects.create(
+        topic=OutboxEvent.TOPIC_INBOUND_SAVED, tenant_id="test_tenant", contact_key="wa:1",
+        turn_wamid=f"wamid.o.{i}", dedupe_key=f"k{i}", status=status, attempts=8,
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", [
+    "/admin/whatsapp_inbound/message/",
+    "/admin/whatsapp_inbound/contact/",
+    "/admin/whatsapp_inbound/outboxevent/",
+])
+def test_changelists_render(admin_client, message, url):
+    r = admin_client.get(url)
+    assert r.status_code == 200
+
+
+@pytest.mark.django_db
+def test_message_tenant_filter_by_key(admin_client, message):
+    r = admin_client.get("/admin/whatsapp_inbound/message/", {"tenant_key": "test_tenant"})
+    assert r.status_code == 200
+    assert b'name="tenant_key"' in r.content
+    assert list(r.context["cl"].queryset) == [message]
+
+    r = admin_client.get("/admin/whatsapp_inbound/message/", {"tenant_key": "nope"})
+    assert list(r.context["cl"].queryset) == []
+
+
+@pytest.mark.django_db
+def test_outbox_requeue_action(admin_client):
+    events = [_outbox(i) for i in range(3)]
+    data = {"action": "requeue_events", "_selected_action": [e.pk for e in events]}
+    admin_client.post("/admin/whatsapp_inbound/outboxevent/", data)
+
+    assert set(OutboxEvent.objects.values_list("status", flat=True)) == {OutboxEvent.STATUS_PENDING}
+    assert set(OutboxEvent.objects.values_list("attempts", flat=True)) == {0}
@@ -0,0 +1,140 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+from django.utils import timezone
+from whatsapp_inbound.models import Contact, Conversation, Message
+
+
+def _inbound(wamid, ts):
+    return {
+        "tenant_id": "conv_tenant",
+        "trace_id": "trace",
+        "received_at": ts,
+        "metadata": {},
+        "contact": {"wa_id": "1", "contact_key": "wa:1"},
+        "message": {"wamid": wamid, "timestamp": ts, "type": "text", "raw": {}},
+        "raw": {},
+    }
+
+
+@pytest.mark.django_db
+def test_inbound_reuses_denormalized_active_conversation():
+    c = Client()
+    now = timezone.now().isoformat()
+    c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.c.1", now)], content_type="application/json")
+    c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.c.2", now)], content_type="application/json")
+
+    contact = Contact.objects.get(contact_key="wa:1")
+    assert Conversation.objects.count() == 1
+    assert contact.active_conversation_id == Conversation.objects.get().id
+    assert set(Message.objects.values_list("conversation_id", flat=True)) == {contact.active_conversation_id}
+
+
+@pytest.mark.django_db
+def test_close_idle_conversations_clears_pointer():
+    c = Client()
+    old = (timezone.now() - timedelta(days=3)).isoformat()
+    c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.c.old", old)], content_type="application/json")
+    Conversation.objects.update(opened_at=timezone.now() - timedelta(days=3))
+    first_conv = Conversation.objects.get()
+
+    call_command("close_idle_conversations", "--idle-hours", "24", "--batch-size", "1", stdout=StringIO())
+
+    first_conv.refresh_from_db()
+    assert first_conv.status == Conversation.STATUS_CLOSED
+    assert first_conv.closed_at is not None
+    assert Contact.objects.get(contact_key="wa:1").active_conversation_id is None
+
+    c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.c.new", timezone.now().isoformat())], content_type="application/json")
+    assert Conversation.objects.filter(status=Conversation.STATUS_ACTIVE).count() == 1
+    assert Message.objects.get(wamid="wamid.c.new").conversation_id != first_conv.id
+
+
+@pytest.mark.django_db
+def test_close_idle_conversations_keeps_recent(tenant, contact):
+    conv = Conversation.objects.create(tenant=tenant, contact=contact, opened_at=timezone.now() - timedelta(days=3))
+    Message.objects.create(
+        tenant=tenant, conversation=conv, contact=contact, direction=Message.DIR_IN,
+        wamid="wamid.recent", timestamp=timezone.now(), type="text",
+    )
+    call_command("close_idle_conversations", stdout=StringIO())
+    conv.refresh_from_db()
+    assert conv.status == Conversation.STATUS_ACTIVE
+
+
+@pytest.mark.django_db
+def test_close_idle_rechecks_inbound_that_lands_after_select(mocker):
+    c = Client()
+    old = (timezone.now() - timedelta(days=3)).isoformat()
+    c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.c.race0", old)], content_type="application/json")
+    Conversation.objects.update(opened_at=timezone.now() - timedelta(days=3))
+    conv = Conversation.objects.get()
+
+    def stale_select(self, cutoff, batch_size, exclude=()):
+        # el SELECT de candidatos la ve ociosa; el inbound llega antes del UPDATE
+        if conv.id in exclude:
+            return []
+        c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.c.race1", timezone.now().isoformat())], content_type="application/json")
+        return [conv.id]
+
+    mocker.patch("whatsapp_inbound.management.commands.close_idle_conversations.Command._idle_ids", stale_select)
+    call_command("close_idle_conversations", stdout=StringIO())
+
+    conv.refresh_from_db()
+    assert conv.status == Conversation.STATUS_ACTIVE
+    assert Contact.objects.get(contact_key="wa:1").active_conversation_id == conv.id
+    assert Message.objects.get(wamid="wamid.c.race1").conversation_id == conv.id
+
+
+@pytest.mark.django_db
+def test_short_batch_does_not_end_the_run(tenant, mocker):
+    from whatsapp_inbound.management.commands.close_idle_conversations import Command
+
+    convs = []
+    for i in range(3):
+        contact = Contact.objects.create(tenant=tenant, contact_key=f"wa:50{i}", wa_id=f"50{i}")
+        convs.append(Conversation.objects.create(tenant=tenant, contact=contact, opened_at=timezone.now() - timedelta(days=3)))
+    real = Command._idle_ids
+    calls = []
+
+    def racing_select(self, cutoff, batch_size, exclude=()):
+        ids = real(self, cutoff, batch_size, exclude)
+        if not calls:
+            # una del primer lote recibe un inbound antes del UPDATE: el lote cierra 1 de 2
+            raced = Conversation.objects.get(id=ids[0])
+            Message.objects.create(tenant=tenant, conversation=raced, contact=raced.contact, direction=Message.DIR_IN,
+                                   wamid="wamid.c.short", timestamp=timezone.now(), type="text")
+        calls.append(ids)
+        return ids
+
+    mocker.patch.object(Command, "_idle_ids", racing_select)
+    out = StringIO()
+    call_command("close_idle_conversations", "--batch-size", "2", stdout=out)
+
+    assert "Closed 2 idle conversations." in out.getvalue()
+    raced = calls[0][0]
+    assert {c.id: c.status for c in Conversation.objects.all()} == {
+        c.id: (Conversation.STATUS_ACTIVE if c.id == raced else Conversation.STATUS_CLOSED) for c in convs
+    }
+    assert calls[-1] == []
+
+
+@pytest.mark.django_db
+def test_verify_reads_the_denormalized_active_conversation():
+    c = Client()
+    c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.c.v", timezone.now().isoformat())], content_type="application/json")
+    contact = Contact.objects.get(contact_key="wa:1")
+    # una conversación activa más nueva que no es la del puntero (fila vieja / auditoría): manda el puntero
+    Conversation.objects.create(tenant=contact.tenant, contact=contact)
+
+    body = c.get("/v1/whatsapp/inbound/verify", {"tenant_id": "conv_tenant", "contact_key": "wa:1"}).json()
+    assert body["contact"]["active_conversation_id"] == str(contact.active_conversation_id)
+    assert body["contact"]["active_conversation_opened_at"] == contact.active_conversation.opened_at.isoformat()
+
+    Contact.objects.update(active_conversation=None)
+    body = c.get("/v1/whatsapp/inbound/verify", {"tenant_id": "conv_tenant", "contact_key": "wa:1"}).json()
+    assert body["contact"]["active_conversation_id"] is None
+    assert body["contact"]["active_conversation_opened_at"] is None
@@ -0,0 +1,57 @@
+import pytest
+from django.core.cache import cache
+from django.test import Client
+from whatsapp_inbound.models import Message
+
+
+def _inbound(wamid):
+    return {
+        "tenant_id": "fast_tenant",
+        "trace_id": "trace",
+        "received_at": "2026-02-17T12:00:00Z",
+        "metadata": {},
+        "contact": {"wa_id": "1", "contact_key": "wa:1"},
+        "message": {"wamid": wamid, "timestamp": "2026-02-17T12:00:01Z", "type": "text", "raw": {}},
+        "raw": {},
+    }
+
+
+@pytest.mark.django_db
+def test_retry_is_answered_from_cache(django_capture_on_commit_callbacks, django_assert_num_queries):
+    c = Client()
+    with django_capture_on_commit_callbacks(execute=True):
+        first = c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.fast")], content_type="application/json").json()
+    assert first["deduped"] is False
+
+    with django_assert_num_queries(0):
+        retry = c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.fast")], content_type="application/json").json()
+    assert retry["deduped"] is True
+    assert Message.objects.filter(wamid="wamid.fast").count() == 1
+
+
+@pytest.mark.django_db
+def test_db_constraint_still_dedupes_on_cache_miss(django_capture_on_commit_callbacks):
+    c = Client()
+    with django_capture_on_commit_callbacks(execute=True):
+        c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.miss")], content_type="application/json")
+    cache.clear()
+
+    retry = c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.miss")], content_type="application/json").json()
+    assert retry["deduped"] is True
+    assert Message.objects.filter(wamid="wamid.miss").count() == 1
+
+
+@pytest.mark.django_db
+def test_other_integrity_error_is_not_marked_seen(mocker):
+    from django.db import IntegrityError
+
+    c = Client(raise_request_exception=False)
+    mocker.patch("whatsapp_inbound.api.Contact.objects.get_or_create", side_effect=IntegrityError("contact constraint"))
+    r = c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.broken")], content_type="application/json")
+    assert r.status_code == 500
+    mocker.stopall()
+
+    # el reintento de Meta no sale del fast path: se guarda
+    retry = c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.broken")], content_type="application/json").json()
+    assert retry["deduped"] is False
+    assert Message.objects.filter(wamid="wamid.broken").count() == 1
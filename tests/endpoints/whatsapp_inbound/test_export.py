@@ -0,0 +1,87 @@
+import io
+import json
+from datetime import timedelta, timezone as dt_timezone
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+from django.utils import timezone
+from whatsapp_inbound.export import export_rows, iter_parquet
+from whatsapp_inbound.models import Attribution, Conversation, Message
+
+
+@pytest.fixture
+def history(tenant, contact, memory_record):
+    conv = Conversation.objects.create(tenant=tenant, contact=contact)
+    base = timezone.now()
+    for i in range(5):
+        Message.objects.create(
+            tenant=tenant, conversation=conv, contact=contact, direction=Message.DIR_IN,
+            wamid=f"wamid.exp.{i}", timestamp=base - timedelta(days=i), type="text",
+            text_body=f"msg {i}", payload_json={"n": i},
+        )
+    Attribution.objects.create(tenant=tenant, contact=contact, message_wamid="wamid.exp.0",
+                               source_type="ad", source_id="ad-1", raw_json={"source_id": "ad-1"})
+    return base
+
+
+@pytest.mark.django_db
+def test_jsonl_stream_with_time_range(tenant, history):
+    c = Client()
+    since = (history - timedelta(days=2, hours=1)).isoformat()
+    r = c.get("/v1/whatsapp/inbound/export", {"tenant_id": tenant.tenant_key, "kind": "messages", "since": since})
+    assert r.status_code == 200
+    assert r["Content-Type"] == "application/x-ndjson"
+    assert r.streaming
+
+    rows = [json.loads(line) for line in b"".join(r.streaming_content).splitlines()]
+    assert [row["wamid"] for row in rows] == ["wamid.exp.2", "wamid.exp.1", "wamid.exp.0"]
+    assert rows[0]["contact_key"] == "wa:123456789"
+    assert rows[0]["payload_json"] == {"n": 2}
+
+
+@pytest.mark.django_db
+def test_export_rejects_bad_params(tenant):
+    c = Client()
+    assert c.get("/v1/whatsapp/inbound/export", {"tenant_id": tenant.tenant_key, "kind": "nope"}).status_code == 400
+    assert c.get("/v1/whatsapp/inbound/export", {"tenant_id": tenant.tenant_key, "since": "ayer"}).status_code == 400
+    assert c.get("/v1/whatsapp/inbound/export", {"tenant_id": "missing"}).status_code == 404
+
+
+@pytest.mark.django_db
+def test_parquet_row_groups_are_streamed(tenant, history):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    chunks = list(iter_parquet(export_rows(tenant, "messages"), "messages", row_group_size=2))
+    assert len(chunks) == 3  # row groups 2+2, y el último (1) junto con el footer
+
+    table = pq.read_table(io.BytesIO(b"".join(chunks)))
+    assert table.num_rows == 5
+    assert table.column("wamid").to_pylist()[-1] == "wamid.exp.0"
+    assert json.loads(table.column("payload_json").to_pylist()[0]) == {"n": 4}
+
+
+@pytest.mark.django_db
+def test_command_writes_one_file_per_kind(tenant, history, tmp_path):
+    call_command("export_tenant_history", tenant_id=tenant.tenant_key, out_dir=str(tmp_path))
+
+    files = {p.name.split("_")[-2]: p for p in tmp_path.iterdir()}
+    assert set(files) == {"messages", "attributions", "memory"}
+    attributions = [json.loads(line) for line in files["attributions"].read_text().splitlines()]
+    assert attributions[0]["source_id"] == "ad-1"
+    memory = [json.loads(line) for line in files["memory"].read_text().splitlines()]
+    assert memory[0]["summary"] == "User is testing."
+
+
+@pytest.mark.django_db
+def test_naive_since_is_utc_in_command_and_endpoint(tenant, history, tmp_path):
+    # sin offset se interpreta como UTC
+    since = (history - timedelta(days=1, hours=1)).astimezone(dt_timezone.utc).replace(tzinfo=None).isoformat()
+    call_command("export_tenant_history", tenant_id=tenant.tenant_key, kinds="messages", since=since, out_dir=str(tmp_path))
+
+    (path,) = tmp_path.iterdir()
+    assert [json.loads(line)["wamid"] for line in path.read_text().splitlines()] == ["wamid.exp.1", "wamid.exp.0"]
+
+    r = Client().get("/v1/whatsapp/inbound/export", {"tenant_id": tenant.tenant_key, "kind": "messages", "since": since})
+    assert r.status_code == 200
+    assert [json.loads(line)["wamid"] for line in b"".join(r.streaming_content).splitlines()] == ["wamid.exp.1", "wamid.exp.0"]
@@ -0,0 +1,46 @@
+import datetime
+import json
+
+import pytest
+from django.test import Client
+from ninja.renderers import JSONRenderer
+from whatsapp_inbound.fastjson import ORJSONFieldDecoder, ORJSONFieldEncoder, ORJSONRenderer
+from whatsapp_inbound.models import MemoryRecord
+
+
+def test_renderer_matches_stdlib_output():
+    data = {
+        "ts": datetime.datetime(2026, 2, 17, 12, 0, 0, 123456, tzinfo=datetime.timezone.utc),
+        "n": 1,
+        "txt": "ñandú 😀",
+        "items": [{"a": None}],
+        1: "non-str key",
+    }
+    fast = json.loads(ORJSONRenderer().render(None, data, response_status=200))
+    slow = json.loads(JSONRenderer().render(None, data, response_status=200))
+    assert fast == slow
+    assert fast["ts"] == "2026-02-17T12:00:00.123Z"
+
+
+def test_field_encoder_keeps_stdlib_semantics():
+    assert json.loads(json.dumps({"a": [1, 2.5, None]}, cls=ORJSONFieldEncoder)) == {"a": [1, 2.5, None]}
+    assert json.loads(json.dumps({"big": 2**70}, cls=ORJSONFieldEncoder)) == {"big": 2**70}
+    # Lo que stdlib no serializaba (datetime sin encoder de Django) sigue fallando
+    with pytest.raises(TypeError):
+        json.dumps({"ts": datetime.datetime.now()}, cls=ORJSONFieldEncoder)
+    assert json.loads('{"x": [1]}', cls=ORJSONFieldDecoder) == {"x": [1]}
+
+
+@pytest.mark.django_db
+def test_jsonfield_roundtrip(tenant, contact):
+    events = [{"event": "PRICE", "confidence": 0.9, "note": "ñ"}]
+    mem = MemoryRecord.objects.create(tenant=tenant, contact=contact, recent_events=events)
+    assert MemoryRecord.objects.get(pk=mem.pk).recent_events == events
+
+
+@pytest.mark.django_db
+def test_api_uses_orjson_and_reports_bad_json():
+    c = Client()
+    r = c.post("/v1/whatsapp/inbound", data=b"[{not json", content_type="application/json")
+    assert r.status_code == 400
+    assert r["Content-Type"].startswith("application/json")
@@ -0,0 +1,72 @@
+from datetime import timedelta, timezone as dt_timezone
+
+import pytest
+from django.test import Client
+from django.utils import timezone
+from whatsapp_inbound.models import Conversation, Message
+
+
+@pytest.fixture
+def messages(tenant, contact):
+    conv = Conversation.objects.create(tenant=tenant, contact=contact)
+    base = timezone.now()
+    out = []
+    for i in range(5):
+        out.append(Message.objects.create(
+            tenant=tenant, conversation=conv, contact=contact,
+            direction=Message.DIR_IN if i % 2 == 0 else Message.DIR_OUT,
+            wamid=f"wamid.page.{i}",
+            # dos mensajes con el mismo timestamp para ejercitar el desempate por id
+            timestamp=base - timedelta(minutes=min(i, 3)),
+            type="text", text_body=f"msg {i}",
+        ))
+    return out
+
+
+@pytest.mark.django_db
+def test_logs_keyset_pages_cover_all_rows(tenant, messages):
+    c = Client()
+    seen = []
+    cursor = None
+    while True:
+        params = {"tenant_id": tenant.tenant_key, "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        body = c.get("/v1/whatsapp/inbound/logs", params).json()
+        seen.extend(item["wamid"] for item in body["items"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+
+    assert sorted(seen) == sorted(m.wamid for m in messages)
+    assert len(seen) == len(set(seen))
+
+
+@pytest.mark.django_db
+def test_logs_filters(tenant, contact, messages):
+    c = Client()
+    body = c.get("/v1/whatsapp/inbound/logs", {"tenant_id": tenant.tenant_key, "direction": "out"}).json()
+    assert {i["wamid"] for i in body["items"]} == {"wamid.page.1", "wamid.page.3"}
+    assert all(i["direction"] == "out" for i in body["items"])
+
+    body = c.get("/v1/whatsapp/inbound/logs", {"contact_key": contact.contact_key, "since": "2999-01-01T00:00:00Z"}).json()
+    assert body["items"] == []
+
+
+@pytest.mark.django_db
+def test_logs_invalid_cursor_returns_400(tenant):
+    r = Client().get("/v1/whatsapp/inbound/logs", {"cursor": "not-a-cursor"})
+    assert r.status_code == 400
+
+
+@pytest.mark.django_db
+def test_logs_naive_since_until_are_utc(tenant, messages):
+    c = Client()
+    newest = messages[0].timestamp.astimezone(dt_timezone.utc).replace(tzinfo=None)
+    params = {"tenant_id": tenant.tenant_key, "since": (newest - timedelta(minutes=1, seconds=30)).isoformat()}
+    r = c.get("/v1/whatsapp/inbound/logs", params)
+    assert r.status_code == 200
+    assert {i["wamid"] for i in r.json()["items"]} == {"wamid.page.0", "wamid.page.1"}
+
+    r = c.get("/v1/whatsapp/inbound/logs", {"tenant_id": tenant.tenant_key, "until": "2000-01-01T00:00:00"})
+    assert r.status_code == 200 and r.json()["items"] == []
@@ -0,0 +1,49 @@
+from datetime import date
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+from whatsapp_inbound.models import Message, MessageDedupe
+from whatsapp_inbound.management.commands.manage_message_partitions import (
+    add_months,
+    month_from_partition,
+    partition_name,
+)
+
+
+def test_partition_naming_roundtrip():
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    name = partition_name(date(2026, 2, 1))
+    assert name == "whatsapp_inbound_message_202602"
+    assert month_from_partition(name) == date(2026, 2, 1)
+    assert month_from_partition("whatsapp_inbound_message_default") is None
+
+
+@pytest.mark.django_db
+def test_command_is_noop_without_postgres():
+    out = StringIO()
+    call_command("manage_message_partitions", stdout=out)
+    assert "nada que hacer" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_duplicate_wamid_rejected_by_dedupe_table():
+    payload = {
+        "tenant_id": "part_tenant",
+        "trace_id": "trace",
+        "received_at": "2026-02-17T12:00:00Z",
+        "metadata": {},
+        "contact": {"wa_id": "1", "contact_key": "wa:1"},
+        "message": {"wamid": "wamid.dup", "timestamp": "2026-02-17T12:00:01Z", "type": "text", "raw": {}},
+        "raw": {},
+    }
+    c = Client()
+    first = c.post("/v1/whatsapp/inbound", data=[payload], content_type="application/json").json()
+    second = c.post("/v1/whatsapp/inbound", data=[payload], content_type="application/json").json()
+
+    assert first["deduped"] is False
+    assert second["deduped"] is True
+    assert MessageDedupe.objects.filter(wamid="wamid.dup").count() == 1
+    assert Message.objects.filter(wamid="wamid.dup").count() == 1
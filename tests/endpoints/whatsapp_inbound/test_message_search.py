@@ -0,0 +1,60 @@
+import pytest
+from django.contrib.admin.sites import site
+from django.test import Client
+from django.utils import timezone
+from whatsapp_inbound.models import Conversation, Message, Tenant
+from whatsapp_inbound.search import search_messages
+
+
+@pytest.fixture
+def messages(tenant, contact):
+    conv = Conversation.objects.create(tenant=tenant, contact=contact)
+    texts = ["Precio del Corolla 2022", "Hola, cuotas del corolla?", "Quiero turno para test drive"]
+    for i, text in enumerate(texts):
+        Message.objects.create(
+            tenant=tenant, conversation=conv, contact=contact, direction=Message.DIR_IN,
+            wamid=f"wamid.s.{i}", timestamp=timezone.now(), type="text", text_body=text,
+        )
+    other = Tenant.objects.create(tenant_key="other_search")
+    other_contact = contact.__class__.objects.create(tenant=other, contact_key="wa:other")
+    Message.objects.create(
+        tenant=other, conversation=Conversation.objects.create(tenant=other, contact=other_contact),
+        contact=other_contact, direction=Message.DIR_IN, wamid="wamid.other",
+        timestamp=timezone.now(), type="text", text_body="corolla de otro tenant",
+    )
+
+
+@pytest.mark.django_db
+def test_search_endpoint_is_tenant_scoped(tenant, messages):
+    body = Client().get("/v1/whatsapp/inbound/search", {"tenant_id": tenant.tenant_key, "q": "corolla"}).json()
+    assert {i["wamid"] for i in body["items"]} == {"wamid.s.0", "wamid.s.1"}
+
+
+@pytest.mark.django_db
+def test_search_short_query_returns_nothing(tenant, messages):
+    body = Client().get("/v1/whatsapp/inbound/search", {"tenant_id": tenant.tenant_key, "q": "co"}).json()
+    assert body["items"] == []
+
+
+@pytest.mark.django_db
+def test_admin_search_uses_exact_match_for_ids(tenant, contact, messages):
+    admin = site._registry[Message]
+    qs, dupes = admin.get_search_results(None, Message.objects.all(), "wamid.s.2")
+    assert [m.wamid for m in qs] == ["wamid.s.2"]
+    assert dupes is False
+
+    qs, _ = admin.get_search_results(None, Message.objects.all(), "test drive")
+    assert [m.wamid for m in qs] == ["wamid.s.2"]
+
+
+def test_search_compiles_to_ilike_on_postgres():
+    # el índice gin_trgm_ops de la migración 0014 sirve ILIKE, no el UPPER(...) LIKE de icontains
+    pytest.importorskip("psycopg2")
+    from django.db import connection
+    from django.db.backends.postgresql.base import DatabaseWrapper
+
+    pg = DatabaseWrapper({**connection.settings_dict, "ENGINE": "django.db.backends.postgresql"})
+    sql, params = search_messages(Message.objects.all(), "100%_ok").query.get_compiler(connection=pg).as_sql()
+    assert sql.endswith('WHERE "whatsapp_inbound_message"."text_body" ILIKE %s')
+    assert "UPPER" not in sql
+    assert params == ("%100\\%\\_ok%",)
@@ -0,0 +1,64 @@
+import json
+import zlib
+
+import pytest
+from django.test import Client
+from whatsapp_inbound.models import Message, RawWebhook
+from whatsapp_inbound.raw_json import RawJSON, canonical_dumps
+from whatsapp_inbound.raw_store import encode_envelope
+from whatsapp_inbound.schemas import WANormalizedInbound
+
+# Orden de claves y espacios "no canónicos" a propósito: deben conservarse byte a byte
+ENVELOPE_TEXT = '{"messages": [{"id": "wamid.txt"}], "metadata": {"phone_number_id": "1"}, "contacts": []}'
+
+
+def _inbound(wamid, raw):
+    return {
+        "tenant_id": "passthrough_tenant",
+        "trace_id": "trace",
+        "received_at": "2026-02-17T12:00:00Z",
+        "metadata": {},
+        "contact": {"wa_id": "1", "contact_key": "wa:1"},
+        "message": {"wamid": wamid, "timestamp": "2026-02-17T12:00:01Z", "type": "text", "raw": {"id": wamid}},
+        "raw": raw,
+    }
+
+
+@pytest.mark.django_db
+def test_text_envelope_is_stored_without_reencoding():
+    c = Client()
+    r = c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.txt", ENVELOPE_TEXT)], content_type="application/json")
+    assert r.status_code == 200
+
+    rw = RawWebhook.objects.get()
+    assert zlib.decompress(bytes(rw.body)).decode() == ENVELOPE_TEXT
+    assert Message.objects.get(wamid="wamid.txt").get_value_raw() == json.loads(ENVELOPE_TEXT)
+
+
+@pytest.mark.django_db
+def test_malformed_text_envelope_is_rejected():
+    c = Client()
+    for bad in ('{"messages": [', '[1, 2]'):
+        r = c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.bad", bad)], content_type="application/json")
+        assert r.status_code == 422
+    assert not Message.objects.exists()
+
+
+def test_object_envelope_keeps_canonical_hash():
+    envelope = json.loads(ENVELOPE_TEXT)
+    payload = WANormalizedInbound.model_validate(_inbound("wamid.obj", envelope))
+
+    assert payload.raw == envelope
+    assert encode_envelope(payload.raw) == encode_envelope(envelope)
+    assert payload.raw.text == canonical_dumps(envelope)
+
+
+def test_json_dump_carries_text_and_trusted_load_skips_parsing():
+    payload = WANormalizedInbound.model_validate(_inbound("wamid.q", ENVELOPE_TEXT))
+    item = payload.model_dump(mode="json")
+    assert item["raw"] == ENVELOPE_TEXT
+
+    loaded = WANormalizedInbound.model_validate(item, context={"raw_json_trusted": True})
+    assert isinstance(loaded.raw, RawJSON)
+    assert loaded.raw.text == ENVELOPE_TEXT
+    assert loaded.raw == json.loads(ENVELOPE_TEXT)
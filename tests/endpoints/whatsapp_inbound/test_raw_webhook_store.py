@@ -0,0 +1,50 @@
+import pytest
+from django.test import Client
+from whatsapp_inbound.models import Message, RawWebhook
+
+ENVELOPE = {
+    "metadata": {"display_phone_number": "+5493510000000", "phone_number_id": "123456"},
+    "contacts": [{"wa_id": "5493511111111", "profile": {"name": "Juan"}}],
+    "messages": [{"id": "wamid.a"}, {"id": "wamid.b"}],
+}
+
+
+def _inbound(wamid):
+    return {
+        "tenant_id": "raw_tenant",
+        "trace_id": "trace",
+        "received_at": "2026-02-17T12:00:00Z",
+        "metadata": {"phone_number_id": "123456"},
+        "contact": {"wa_id": "5493511111111", "contact_key": "wa:5493511111111"},
+        "message": {"wamid": wamid, "timestamp": "2026-02-17T12:00:01Z", "type": "text", "text": {"body": "Hola"}, "raw": {"id": wamid}},
+        "raw": ENVELOPE,
+    }
+
+
+@pytest.mark.django_db
+def test_envelope_stored_once_and_decoded_lazily():
+    c = Client()
+    for wamid in ("wamid.a", "wamid.b"):
+        r = c.post("/v1/whatsapp/inbound", data=[_inbound(wamid)], content_type="application/json")
+        assert r.status_code == 200
+
+    assert RawWebhook.objects.count() == 1
+    msgs = list(Message.objects.order_by("wamid"))
+    assert msgs[0].raw_webhook_id == msgs[1].raw_webhook_id
+    assert "value_raw" not in msgs[0].payload_json
+    assert msgs[0].payload_json["message_raw"] == {"id": "wamid.a"}
+    assert msgs[0].get_value_raw() == ENVELOPE
+
+
+@pytest.mark.django_db
+def test_legacy_payload_value_raw_still_readable(tenant, contact):
+    from whatsapp_inbound.models import Conversation
+    from django.utils import timezone
+
+    conv = Conversation.objects.create(tenant=tenant, contact=contact)
+    m = Message.objects.create(
+        tenant=tenant, conversation=conv, contact=contact, direction=Message.DIR_IN,
+        wamid="wamid.legacy", timestamp=timezone.now(), type="text",
+        payload_json={"value_raw": {"legacy": True}},
+    )
+    assert m.get_value_raw() == {"legacy": True}
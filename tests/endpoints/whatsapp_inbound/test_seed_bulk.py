@@ -0,0 +1,38 @@
+import pytest
+from django.test import Client
+from whatsapp_inbound.models import TenantEvent, Template
+
+
+def _event(name, points=10):
+    return {"name": name, "max_points": points, "triggers": [{"type": "kw", "value": name.lower(), "points": 5}], "freeform_reply": "ok"}
+
+
+@pytest.mark.django_db
+def test_seed_events_bulk_counts(tenant):
+    c = Client()
+    TenantEvent.objects.create(tenant=tenant, name="PRECIO", max_points=1)
+
+    payload = {"tenant_id": tenant.tenant_key, "events": [_event("PRECIO", 15), _event("SALUDO")]}
+    r = c.post("/v1/tenants/events/seed", data=payload, content_type="application/json")
+
+    assert r.status_code == 200
+    body = r.json()
+    assert (body["created"], body["updated"], body["total"]) == (1, 1, 2)
+    assert TenantEvent.objects.get(tenant=tenant, name="PRECIO").max_points == 15
+
+
+@pytest.mark.django_db
+def test_seed_templates_full_sync_deactivates_missing(tenant, template):
+    c = Client()
+    payload = {
+        "tenant_id": tenant.tenant_key,
+        "full_sync": True,
+        "templates": [{"name": "reopen_24h"}, {"name": "reopen_24h", "language": "es"}],
+    }
+    r = c.post("/v1/tenants/templates/seed", data=payload, content_type="application/json")
+
+    body = r.json()
+    assert (body["created"], body["updated"], body["deactivated"]) == (1, 0, 1)
+    assert Template.objects.get(tenant=tenant, name="reopen_24h").language == "es"
+    template.refresh_from_db()
+    assert template.active is False
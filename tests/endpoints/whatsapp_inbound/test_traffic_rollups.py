@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import pytest
+from django.test import Client
+from django.utils import timezone
+from whatsapp_inbound.models import (
+    Attribution,
+    AttributionDaily,
+    Contact,
+    Conversation,
+    Message,
+    TrafficDaily,
+    TrafficHourly,
+)
+from whatsapp_inbound.rollups import LAG_SEC, contiguous_runs, refresh_rollups
+
+UTC = dt_timezone.utc
+DAY = datetime(2026, 3, 10, tzinfo=UTC)
+
+
+def _msg(tenant, conv, contact, wamid, ts, direction=Message.DIR_IN, type="text"):
+    return Message.objects.create(
+        tenant=tenant, conversation=conv, contact=contact, direction=direction,
+        wamid=wamid, timestamp=ts, type=type, text_body="hola",
+    )
+
+
+@pytest.fixture
+def traffic(tenant, contact):
+    other = Contact.objects.create(tenant=tenant, contact_key="wa:987654321", wa_id="987654321")
+    conv = Conversation.objects.create(tenant=tenant, contact=contact)
+    conv2 = Conversation.objects.create(tenant=tenant, contact=other)
+    _msg(tenant, conv, contact, "wamid.r.1", DAY + timedelta(hours=9, minutes=5))
+    _msg(tenant, conv, contact, "wamid.r.2", DAY + timedelta(hours=9, minutes=40))
+    _msg(tenant, conv2, other, "wamid.r.3", DAY + timedelta(hours=9, minutes=50))
+    _msg(tenant, conv, contact, "wamid.r.4", DAY + timedelta(hours=9, minutes=55), direction=Message.DIR_OUT)
+    _msg(tenant, conv2, other, "wamid.r.5", DAY + timedelta(hours=14), type="image")
+    _msg(tenant, conv, contact, "wamid.r.6", DAY + timedelta(days=1, hours=1))
+    for i, c in enumerate([contact, contact, other]):
+        Attribution.objects.create(
+            tenant=tenant, contact=c, message_wamid=f"wamid.r.{i + 1}", source_type="ad", source_id="ad-1",
+            ctwa_clid=f"clid-{i % 2}", captured_at=DAY + timedelta(hours=9 + i),
+        )
+    Attribution.objects.create(tenant=tenant, contact=other, message_wamid="wamid.r.5", source_type="post",
+                               captured_at=DAY + timedelta(hours=14))
+    return conv
+
+
+def _run():
+    # watermark = now - LAG_SEC: queda en "ahora", todo lo ya insertado entra
+    return refresh_rollups(now=timezone.now() + timedelta(seconds=LAG_SEC + 1))
+
+
+def test_contiguous_runs():
+    h = DAY
+    step = timedelta(hours=1)
+    assert contiguous_runs([h + 6 * step, h, h + step, h + step], step) == [(h, h + 2 * step), (h + 6 * step, h + 7 * step)]
+
+
+@pytest.mark.django_db
+def test_rollups_aggregate_and_are_idempotent(tenant, traffic):
+    _run()
+    nine = TrafficHourly.objects.get(tenant=tenant, bucket=DAY + timedelta(hours=9), direction="in", type="text")
+    assert (nine.messages, nine.contacts) == (3, 2)
+    assert TrafficHourly.objects.get(bucket=DAY + timedelta(hours=9), direction="out").messages == 1
+    assert TrafficHourly.objects.get(bucket=DAY + timedelta(hours=14)).type == "image"
+
+    day = TrafficDaily.objects.get(tenant=tenant, day=DAY.date())
+    assert (day.messages_in, day.messages_out, day.unique_contacts) == (4, 1, 2)
+    assert TrafficDaily.objects.get(day=(DAY + timedelta(days=1)).date()).messages_in == 1
+
+    ad = AttributionDaily.objects.get(tenant=tenant, day=DAY.date(), source_type="ad", source_id="ad-1")
+    assert (ad.attributions, ad.clicks, ad.contacts) == (3, 2, 2)
+    assert AttributionDaily.objects.get(source_type="post").source_id == ""
+
+    # Re-correr (incremental o full) no duplica conteos
+    _run()
+    refresh_rollups(full=True, now=timezone.now() + timedelta(seconds=LAG_SEC + 1))
+    assert TrafficHourly.objects.get(bucket=DAY + timedelta(hours=9), direction="in").messages == 3
+    assert TrafficDaily.objects.get(day=DAY.date()).messages_in == 4
+
+
+@pytest.mark.django_db
+def test_late_message_updates_only_its_bucket(tenant, contact, traffic):
+    _run()
+    other_day = TrafficDaily.objects.get(day=(DAY + timedelta(days=1)).date())
+
+    # Llega tarde (inserción ahora) con timestamp viejo: se recalcula sólo su hora y su día
+    late = _msg(tenant, traffic, contact, "wamid.r.late", DAY + timedelta(hours=9, minutes=59))
+    Message.objects.filter(pk=late.pk).update(created_at=timezone.now() + timedelta(seconds=5))
+    stats = refresh_rollups(now=timezone.now() + timedelta(minutes=10))
+    assert stats == {"hourly": 2, "daily": 1, "attribution_daily": 0}
+
+    assert TrafficHourly.objects.get(bucket=DAY + timedelta(hours=9), direction="in").messages == 4
+    assert TrafficDaily.objects.get(day=DAY.date()).messages_in == 5
+    other_day.refresh_from_db()
+    assert other_day.messages_in == 1
+
+
+@pytest.mark.django_db
+def test_analytics_endpoints(tenant, traffic):
+    _run()
+    c = Client()
+    rng = {"tenant_id": tenant.tenant_key, "since": DAY.isoformat(), "until": (DAY + timedelta(days=2)).isoformat()}
+
+    r = c.get("/v1/analytics/traffic/hourly", {**rng, "direction": "in"})
+    assert r.status_code == 200
+    assert [(i["type"], i["messages"]) for i in r.json()] == [("text", 3), ("image", 1), ("text", 1)]
+
+    r = c.get("/v1/analytics/traffic/daily", rng)
+    assert [(i["day"], i["messages_in"], i["unique_contacts"]) for i in r.json()] == [
+        ("2026-03-10", 4, 2), ("2026-03-11", 1, 1),
+    ]
+
+    r = c.get("/v1/analytics/attributions/daily", {**rng, "source_id": "ad-1"})
+    assert [(i["source_type"], i["attributions"], i["clicks"]) for i in r.json()] == [("ad", 3, 2)]
+
+    # Default: últimos 7 días (los datos de prueba son viejos)
+    assert c.get("/v1/analytics/traffic/daily", {"tenant_id": tenant.tenant_key}).json() == []
+
+    assert c.get("/v1/analytics/traffic/daily", {**rng, "since": "ayer"}).status_code == 400
+    assert c.get("/v1/analytics/traffic/daily", {**rng, "since": "2020-01-01T00:00:00"}).status_code == 400
+    assert c.get("/v1/analytics/traffic/hourly", {**rng, "tenant_id": "missing"}).status_code == 404
+
+
+@pytest.mark.django_db
+def test_analytics_range_is_half_open_and_bucket_aligned(tenant, traffic):
+    _run()
+    c = Client()
+
+    def get(kind, since, until):
+        rows = c.get(f"/v1/analytics/traffic/{kind}", {"tenant_id": tenant.tenant_key, "since": since, "until": until}).json()
+        return sorted({i["bucket" if kind == "hourly" else "day"][:13 if kind == "hourly" else 10] for i in rows})
+
+    # until a medianoche: ni la hora ni el día del 11 entran, en los dos endpoints
+    midnight = (DAY + timedelta(days=1)).isoformat()
+    assert get("hourly", DAY.isoformat(), midnight) == ["2026-03-10T09", "2026-03-10T14"]
+    assert get("daily", DAY.isoformat(), midnight) == ["2026-03-10"]
+    # until a mitad de bucket: la hora 01 y el día 11 se solapan con el rango
+    partial = (DAY + timedelta(days=1, hours=1, minutes=30)).isoformat()
+    assert get("hourly", DAY.isoformat(), partial)[-1] == "2026-03-11T01"
+    assert get("daily", DAY.isoformat(), partial) == ["2026-03-10", "2026-03-11"]
+    # los buckets son UTC: 09:30-03:00 = 12:30Z
+    assert get("hourly", "2026-03-10T09:30:00-03:00", partial) == ["2026-03-10T14", "2026-03-11T01"]
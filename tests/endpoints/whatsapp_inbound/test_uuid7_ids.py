@@ -0,0 +1,20 @@
+import pytest
+from whatsapp_inbound.ids import uuid7
+from whatsapp_inbound.models import Contact
+
+
+def test_uuid7_version_variant_and_order():
+    ids = [uuid7() for _ in range(5000)]
+    assert all(u.version == 7 for u in ids)
+    assert all(u.variant == "specified in RFC 4122" for u in ids)
+    # monótonos dentro del proceso, incluso dentro del mismo ms
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+
+@pytest.mark.django_db
+def test_new_contacts_get_time_ordered_ids(tenant):
+    a = Contact.objects.create(tenant=tenant, contact_key="wa:a")
+    b = Contact.objects.create(tenant=tenant, contact_key="wa:b")
+    assert a.id.version == 7
+    assert a.id < b.id
@@ -0,0 +1,67 @@
+import pytest
+from django.test import Client
+from django.core.management import call_command
+from whatsapp_inbound.counters import counter_shard, get_tenant_totals
+from whatsapp_inbound.models import OutboxEvent, Tenant, TenantCounterShard
+
+
+def _inbound(wamid, contact_key="wa:5493511111111"):
+    return {
+        "tenant_id": "verify_tenant",
+        "trace_id": "trace",
+        "received_at": "2026-02-17T12:00:00Z",
+        "metadata": {"phone_number_id": "123456"},
+        "contact": {"wa_id": contact_key[3:], "contact_key": contact_key, "profile_name": "Juan"},
+        "message": {"wamid": wamid, "timestamp": "2026-02-17T12:00:01Z", "type": "text", "text": {"body": "Hola"}, "raw": {}},
+        "raw": {},
+    }
+
+
+@pytest.mark.django_db
+def test_inbound_maintains_tenant_counters():
+    c = Client()
+    for i, ck in enumerate(["wa:1", "wa:1", "wa:2"]):
+        c.post("/v1/whatsapp/inbound", data=[_inbound(f"wamid.v.{i}", ck)], content_type="application/json")
+    # duplicado: no debe contar
+    c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.v.0", "wa:1")], content_type="application/json")
+
+    tenant = Tenant.objects.get(tenant_key="verify_tenant")
+    assert get_tenant_totals(tenant) == {"contacts_total": 2, "messages_total": 3}
+    # el primer inbound inicializa la base (shard 0); los siguientes suman en el shard de su wamid
+    shards = set(TenantCounterShard.objects.filter(tenant=tenant).values_list("shard", flat=True))
+    assert shards == {0} | {counter_shard(f"wamid.v.{i}") for i in (1, 2)}
+
+    body = c.get("/v1/whatsapp/inbound/verify", {"tenant_id": "verify_tenant", "contact_key": "wa:1"}).json()
+    assert body["totals"] == {"contacts": 2, "messages": 3}
+    assert body["contact"]["messages_count"] == 2
+    assert body["contact"]["active_conversation_id"] is not None
+    assert body["last_message"]["has_attribution"] is False
+
+
+@pytest.mark.django_db
+def test_verify_outbox_lookup_is_tenant_scoped():
+    c = Client()
+    c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.shared")], content_type="application/json")
+    OutboxEvent.objects.all().delete()
+    OutboxEvent.objects.create(
+        topic=OutboxEvent.TOPIC_INBOUND_SAVED, tenant_id="other_tenant", contact_key="wa:5493511111111",
+        turn_wamid="wamid.shared", dedupe_key="other::wamid.shared",
+    )
+
+    body = c.get("/v1/whatsapp/inbound/verify", {"tenant_id": "verify_tenant", "contact_key": "wa:5493511111111"}).json()
+    assert body["outbox_status"] == {"exists": False}
+
+
+@pytest.mark.django_db
+def test_rollup_consolidates_shards():
+    c = Client()
+    for i in range(4):
+        c.post("/v1/whatsapp/inbound", data=[_inbound(f"wamid.r.{i}", f"wa:{i}")], content_type="application/json")
+    tenant = Tenant.objects.get(tenant_key="verify_tenant")
+    TenantCounterShard.objects.filter(tenant=tenant, shard=0).update(messages_total=100)  # drift
+
+    call_command("rollup_tenant_counters", tenant="verify_tenant")
+
+    assert get_tenant_totals(tenant) == {"contacts_total": 4, "messages_total": 4}
+    rows = TenantCounterShard.objects.filter(tenant=tenant)
+    assert all(r.messages_total == 0 for r in rows if r.shard)
@@ -0,0 +1,198 @@
+import pytest
+from django.test import Client
+from whatsapp_inbound import api as inbound_api
+from whatsapp_inbound.api import process_inbound_batch
+from whatsapp_inbound.models import Message, OutboxEvent
+
+
+def _inbound(wamid, timestamp="2026-02-17T12:00:01Z"):
+    return {
+        "tenant_id": "wb_tenant",
+        "trace_id": "trace",
+        "received_at": "2026-02-17T12:00:00Z",
+        "metadata": {},
+        "contact": {"wa_id": "1", "contact_key": "wa:1"},
+        "message": {"wamid": wamid, "timestamp": timestamp, "type": "text", "raw": {}},
+        "raw": {},
+    }
+
+
+class ListQueue:
+    def __init__(self):
+        self.items = []
+
+    async def apush(self, item):
+        self.items.append(item)
+
+
+@pytest.mark.django_db
+def test_write_behind_acks_without_touching_db(monkeypatch, django_assert_num_queries):
+    queue = ListQueue()
+    monkeypatch.setattr(inbound_api, "WRITE_BEHIND", True)
+    monkeypatch.setattr(inbound_api, "get_queue", lambda: queue)
+
+    c = Client()
+    with django_assert_num_queries(0):
+        r = c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.wb1")], content_type="application/json")
+    assert r.status_code == 200
+    assert r.json()["queued"] is True
+    assert [i["message"]["wamid"] for i in queue.items] == ["wamid.wb1"]
+    assert not Message.objects.exists()
+
+    bad = c.post("/v1/whatsapp/inbound", data=[_inbound("wamid.wb2", timestamp="nope")], content_type="application/json")
+    assert bad.status_code == 400
+    assert len(queue.items) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_batch_is_one_transaction_and_dedupes():
+    items = [_inbound("wamid.b1"), _inbound("wamid.b2"), _inbound("wamid.b1"), _inbound("wamid.b3", timestamp="nope")]
+
+    result = process_inbound_batch(items)
+
+    assert result["saved"] == 2
+    assert result["deduped"] == 1
+    assert [i["message"]["wamid"] for i in result["failed"]] == ["wamid.b3"]
+    assert set(Message.objects.values_list("wamid", flat=True)) == {"wamid.b1", "wamid.b2"}
+    # on_commit del lote: un OutboxEvent por mensaje guardado
+    assert OutboxEvent.objects.count() == 2
+
+    # Replay del mismo lote (flusher murió antes del ack): todo deduplicado
+    replay = process_inbound_batch(items[:3])
+    assert replay["saved"] == 0
+    assert replay["deduped"] == 3
+
+
+@pytest.fixture
+def redis_queue():
+    fakeredis = pytest.importorskip("fakeredis")
+    from whatsapp_inbound.ingest_queue import RedisIngestQueue
+
+    queue = RedisIngestQueue("redis://unused", key="test:inbound")
+    queue._client = fakeredis.FakeRedis()
+    return queue
+
+
+def test_ack_only_confirms_what_the_owner_claimed(redis_queue):
+    for i in range(5):
+        redis_queue.push(_inbound(f"wamid.q{i}"))
+
+    # A reclama y se cuelga más que el TTL del lock; B toma el lock y recupera el lote de A
+    a = redis_queue.claim("a", 3)
+    assert [i["message"]["wamid"] for i in a] == ["wamid.q0", "wamid.q1", "wamid.q2"]
+    assert redis_queue.recover("b") == 3
+    b = redis_queue.claim("b", 10)
+    assert [i["message"]["wamid"] for i in b] == [f"wamid.q{i}" for i in range(5)]
+
+    redis_queue.push(_inbound("wamid.q5"))
+    redis_queue.ack("a")  # A termina tarde: no descarta nada que no sea suyo
+    assert len(redis_queue) == 1
+    redis_queue.ack("b")
+    assert [i["message"]["wamid"] for i in redis_queue.claim("b", 10)] == ["wamid.q5"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_flusher_command_persists_and_requeues_orphans(redis_queue, monkeypatch):
+    from io import StringIO
+
+    from django.core.management import call_command
+    from whatsapp_inbound.management.commands import run_inbound_flusher
+
+    for i in range(3):
+        redis_queue.push(_inbound(f"wamid.f{i}"))
+    redis_queue.claim("dead-flusher", 2)
+    monkeypatch.setattr(run_inbound_flusher, "get_queue", lambda: redis_queue)
+
+    out = StringIO()
+    call_command("run_inbound_flusher", "--once", stdout=out)
+
+    assert "Requeued 2" in out.getvalue()
+    assert set(Message.objects.values_list("wamid", flat=True)) == {"wamid.f0", "wamid.f1", "wamid.f2"}
+    assert len(redis_queue) == 0
+    assert redis_queue.client.keys("test:inbound:processing:*") == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_transient_db_error_is_retried_not_dead_lettered(redis_queue, monkeypatch):
+    from io import StringIO
+
+    from django.core.management import call_command
+    from django.db import OperationalError
+    from whatsapp_inbound.management.commands import run_inbound_flusher
+
+    real = inbound_api._process_inbound_db_sync
+
+    def flaky(payload, tenant_id):
+        if payload.message.wamid == "wamid.t1":
+            raise OperationalError("deadlock detected")
+        return real(payload, tenant_id)
+
+    for wamid in ("wamid.t0", "wamid.t1", "wamid.t2"):
+        redis_queue.push(_inbound(wamid))
+    redis_queue.push(_inbound("wamid.t3", timestamp="nope"))
+    monkeypatch.setattr(run_inbound_flusher, "get_queue", lambda: redis_queue)
+    monkeypatch.setattr(inbound_api, "_process_inbound_db_sync", flaky)
+
+    out = StringIO()
+    call_command("run_inbound_flusher", "--once", stdout=out)
+    assert "saved=2 deduped=0 retry=1 failed=1" in out.getvalue()
+    # el transitorio vuelve al frente con su contador; el inválido queda en :dead con el motivo
+    (queued,) = redis_queue.claim("x", 10)
+    assert (queued["message"]["wamid"], queued["flush_attempts"]) == ("wamid.t1", 1)
+    (dead,) = redis_queue.dead()
+    assert dead["message"]["wamid"] == "wamid.t3" and "timestamp" in dead["flush_error"]
+    redis_queue.release("x")
+
+    monkeypatch.setattr(inbound_api, "_process_inbound_db_sync", real)
+    redis_queue.client.delete("test:inbound:flusher")  # el flusher anterior terminó
+    call_command("run_inbound_flusher", "--once", stdout=StringIO())
+    assert set(Message.objects.values_list("wamid", flat=True)) == {"wamid.t0", "wamid.t1", "wamid.t2"}
+    assert len(redis_queue) == 0
+
+
+def test_exhausted_retries_go_dead_and_can_be_requeued(redis_queue, monkeypatch):
+    from io import StringIO
+
+    from django.core.management import call_command
+    from whatsapp_inbound import ingest_queue
+    from whatsapp_inbound.management.commands import requeue_dead_inbounds
+
+    monkeypatch.setattr(ingest_queue, "MAX_FLUSH_ATTEMPTS", 2)
+    redis_queue.push(_inbound("wamid.r0"))
+    redis_queue.push(_inbound("wamid.r1"))
+    for attempt in (1, 2):
+        items = redis_queue.claim("f", 10)
+        redis_queue.ack("f", retry=items[:1])
+    assert redis_queue.dead_count() == 1 and len(redis_queue) == 0
+
+    monkeypatch.setattr(requeue_dead_inbounds, "get_queue", lambda: redis_queue)
+    out = StringIO()
+    call_command("requeue_dead_inbounds", "--dry-run", stdout=out)
+    assert "1 dead inbounds" in out.getvalue() and "wamid.r0 attempts=2" in out.getvalue()
+    call_command("requeue_dead_inbounds", stdout=out)
+    (item,) = redis_queue.claim("f", 10)
+    assert item["message"]["wamid"] == "wamid.r0" and "flush_attempts" not in item
+    assert redis_queue.dead_count() == 0
+
+
+@pytest.mark.django_db
+def test_failed_batch_commit_requeues_the_whole_batch(redis_queue, monkeypatch):
+    from io import StringIO
+
+    from django.core.management import call_command
+    from django.db import OperationalError
+    from whatsapp_inbound.management.commands import run_inbound_flusher
+
+    def down(items):
+        raise OperationalError("server closed the connection unexpectedly")
+
+    for i in range(3):
+        redis_queue.push(_inbound(f"wamid.d{i}"))
+    monkeypatch.setattr(run_inbound_flusher, "get_queue", lambda: redis_queue)
+    monkeypatch.setattr(run_inbound_flusher, "process_inbound_batch", down)
+
+    err = StringIO()
+    call_command("run_inbound_flusher", "--once", stdout=StringIO(), stderr=err)
+    assert "requeued 3" in err.getvalue()
+    assert [i["message"]["wamid"] for i in redis_queue.claim("f", 10)] == ["wamid.d0", "wamid.d1", "wamid.d2"]
+    assert redis_queue.dead_count() == 0
@@ -0,0 +1,124 @@
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+from django.utils import timezone
+from motor_response import deadline
+from motor_response.api import motor_respond
+from motor_response.deadline import DeadlineExceeded, call_llm, deadline_scope
+from motor_response.schemas import MotorRespondIn
+
+REQ = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def _status_error(cls, code):
+    return cls(f"HTTP {code}", response=httpx.Response(code, request=REQ), body=None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_latencies():
+    deadline.latencies.reset()
+    yield
+    deadline.latencies.reset()
+
+
+def test_retries_429_and_5xx_then_succeeds(mocker):
+    sleep = mocker.patch("motor_response.deadline.time.sleep")
+    errors = [_status_error(openai.RateLimitError, 429), _status_error(openai.InternalServerError, 503)]
+
+    def fn(timeout):
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert call_llm("classifier", fn) == "ok"
+    assert sleep.call_count == 2
+
+
+def test_does_not_retry_client_errors():
+    calls = []
+
+    def fn(timeout):
+        calls.append(timeout)
+        raise _status_error(openai.BadRequestError, 400)
+
+    with pytest.raises(openai.BadRequestError):
+        call_llm("classifier", fn)
+    assert len(calls) == 1
+
+
+def test_timeout_respects_stage_cap_and_reserve():
+    seen = []
+    with deadline_scope(5.0):
+        call_llm("extractor", lambda timeout: seen.append(timeout))
+        # el clasificador usa lo que quede del turno
+        call_llm("classifier", lambda timeout: seen.append(timeout))
+    assert seen[0] <= 1.0 + 1e-3  # 5s de turno - 4s reservados para lo que sigue
+    assert 4.5 < seen[1] <= 5.0
+
+    # Sin turno: sólo el tope de la etapa
+    call_llm("extractor", lambda timeout: seen.append(timeout))
+    assert 2.0 < seen[2] <= deadline.STAGES["extractor"][0]
+
+
+def test_expired_budget_skips_call_and_records_stage():
+    with deadline_scope(0.2) as dl:
+        with pytest.raises(DeadlineExceeded):
+            call_llm("classifier", lambda timeout: pytest.fail("should not call"))
+
+        def times_out(timeout):
+            raise openai.APITimeoutError(request=REQ)
+
+        dl.at = time.monotonic() + 5
+        with pytest.raises(DeadlineExceeded):
+            call_llm("classifier", times_out)
+    assert dl.expired_stages == ["classifier", "classifier"]
+
+
+def test_hedged_request_wins_over_slow_first(mocker):
+    mocker.patch.object(deadline, "HEDGE_ENABLED", True)
+    for _ in range(deadline.HEDGE_MIN_SAMPLES):
+        deadline.latencies.record("classifier", 0.05)
+
+    calls = []
+
+    def fn(timeout):
+        calls.append(timeout)
+        if len(calls) == 1:
+            time.sleep(1.0)
+            return "slow"
+        return "fast"
+
+    t0 = time.monotonic()
+    assert call_llm("classifier", fn) == "fast"
+    assert time.monotonic() - t0 < 0.5
+    assert len(calls) == 2
+
+
+@pytest.mark.django_db
+def test_turn_falls_back_when_budget_expires(mocker, monkeypatch, tenant, contact, tenant_event):
+    monkeypatch.setenv("LLM_CLASSIFIER_PROMPT_ID", "pmpt_test")
+
+    def create(**kwargs):
+        raise openai.APITimeoutError(request=REQ)
+
+    fake = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create)),
+        responses=SimpleNamespace(create=create),
+    )
+    mocker.patch("motor_response.llm_classifier._client", return_value=fake)
+
+    out = motor_respond(None, MotorRespondIn(
+        tenant_id=tenant.tenant_key, contact_key=contact.contact_key, wa_id=contact.wa_id,
+        phone_number_id="1001", turn_wamid="wamid.deadline.1", text="Hola, precio?",
+        timestamp_in=timezone.now().isoformat(),
+    ))
+
+    assert out["decision"]["primary_event"] == "FALLBACK"
+    assert out["telemetry"]["llm_error"] == "LLM_DEADLINE_EXCEEDED"
+    expired = out["telemetry"]["deadline"]["expired"]
+    assert expired[-1] == "classifier"
+    assert "extractor" not in expired  # "precio?" se resuelve con el extractor local
+    assert out["telemetry"]["deadline"]["elapsed_ms"] < 8000
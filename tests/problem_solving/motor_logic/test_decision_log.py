@@ -0,0 +1,91 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+from motor_response import decision_log
+from motor_response.api import motor_respond
+from motor_response.deadline import call_llm, deadline_scope
+from motor_response.decision_log import DecisionWriter, build_record, record_decision
+from motor_response.schemas import MotorRespondIn
+from whatsapp_inbound.models import MotorDecision
+
+
+def _payload(tenant, contact, text, wamid):
+    return MotorRespondIn(
+        tenant_id=tenant.tenant_key, contact_key=contact.contact_key, wa_id=contact.wa_id,
+        phone_number_id="1001", turn_wamid=wamid, text=text,
+    )
+
+
+def _writer(**kw):
+    w = DecisionWriter(**kw)
+    w._pid = os.getpid()  # sin hilo de fondo: el test vacía a mano en su propia conexión
+    return w
+
+
+@pytest.mark.django_db
+def test_turn_is_logged_with_router_signals_and_policy(mocker, tenant, contact, tenant_event):
+    mocker.patch("motor_response.api.classify_with_openai", return_value={
+        "decision": {"primary_event": "TEST_EVENT", "secondary_events": [], "confidence": 0.9},
+        "policy": {"response_mode": "FREEFORM"},
+        "next_actions": [],
+        "telemetry": {"model_used": "gpt-4o"},
+    })
+    motor_respond(None, _payload(tenant, contact, "cuánto sale el Corolla XEI 0km?", "wamid.log.1"))
+    # reintento de n8n: sale de la cache, no se loguea dos veces
+    motor_respond(None, _payload(tenant, contact, "cuánto sale el Corolla XEI 0km?", "wamid.log.1"))
+
+    (d,) = MotorDecision.objects.all()
+    assert (d.tenant_id, d.turn_wamid, d.primary_event) == (tenant.tenant_key, "wamid.log.1", "TEST_EVENT")
+    assert d.classifier == "llm" and d.extractor == "local" and d.window_open is True
+    assert d.playbook_key == "PRICE_QUOTE_MIN"
+    assert d.signals_json["entities"]["vehicle"]["model"] == "Corolla"
+    assert d.policy_json["response_mode"] == "FREEFORM"
+    assert d.next_actions_json[0]["type"] == "CALL_TEXT_AI"
+    assert "elapsed_ms" in d.timings_json
+
+
+def test_call_llm_records_stage_time_and_tokens():
+    responses = SimpleNamespace(usage=SimpleNamespace(input_tokens=120, output_tokens=30))
+    chat = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=50, completion_tokens=10))
+    with deadline_scope(5) as dl:
+        call_llm("classifier", lambda timeout: responses)
+        call_llm("drafter", lambda timeout: chat)
+        call_llm("drafter", lambda timeout: chat)
+
+    t = dl.telemetry()
+    assert set(t["stages_ms"]) == {"classifier", "drafter"}
+    assert t["usage"] == {
+        "classifier": {"input": 120, "output": 30, "total": 150},
+        "drafter": {"input": 100, "output": 20, "total": 120},
+    }
+    record = build_record({"decision": {"primary_event": "X"}, "telemetry": {"deadline": t}})
+    assert record.total_tokens == 270
+    assert "usage" not in record.timings_json
+
+
+@pytest.mark.django_db
+def test_async_mode_buffers_without_db_and_flushes_in_bulk(monkeypatch, django_assert_num_queries):
+    writer = _writer(batch_size=3, flush_ms=60_000, max_buffer=5)
+    monkeypatch.setattr(decision_log, "MODE", "async")
+    monkeypatch.setattr(decision_log, "writer", writer)
+
+    out = {"tenant_id": "t", "contact_key": "wa:1", "decision": {"primary_event": "E"}, "telemetry": {}}
+    with django_assert_num_queries(0):
+        for i in range(7):
+            record_decision({**out, "turn": {"turn_wamid": f"w{i}"}})
+    assert writer.dropped == 2  # buffer acotado: se descartan los más viejos
+
+    with django_assert_num_queries(2):  # bulk_create en lotes de batch_size
+        assert writer.flush() == 5
+    assert sorted(MotorDecision.objects.values_list("turn_wamid", flat=True)) == ["w2", "w3", "w4", "w5", "w6"]
+    assert writer.flush() == 0
+
+
+@pytest.mark.django_db
+def test_full_batch_wakes_the_flusher():
+    writer = _writer(batch_size=2, flush_ms=60_000)
+    writer.submit(MotorDecision(tenant_id="t", contact_key="k", primary_event="E"))
+    assert not writer._wake.is_set()
+    writer.submit(MotorDecision(tenant_id="t", contact_key="k", primary_event="E"))
+    assert writer._wake.is_set()
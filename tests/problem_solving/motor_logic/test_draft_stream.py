@@ -0,0 +1,78 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from django.test import Client
+from motor_response.llm_classifier import DRAFT_FALLBACK, SentenceChunker, stream_draft
+
+TOKENS = ["Hola Ana", "! Gracias por", " escribirnos. ", "El Corolla 2022", " está disponible.\n", "¿Cuándo", " querés verlo?"]
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+@pytest.fixture
+def openai_stream(mocker):
+    create = mocker.Mock(return_value=iter([_chunk(t) for t in TOKENS] + [_chunk(None)]))
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    mocker.patch("motor_response.llm_classifier._client", return_value=client)
+    return create
+
+
+def _events(response):
+    body = b"".join(response.streaming_content).decode()
+    out = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        out.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return out
+
+
+def test_sentence_chunker_merges_short_sentences():
+    c = SentenceChunker(min_chars=20)
+    out = []
+    for t in TOKENS:
+        out += c.feed(t)
+    assert out == ["Hola Ana! Gracias por escribirnos.", "El Corolla 2022 está disponible."]
+    assert c.flush() == "¿Cuándo querés verlo?"
+    assert c.flush() is None
+
+
+def test_stream_draft_falls_back_before_first_token(mocker):
+    mocker.patch("motor_response.llm_classifier._client", side_effect=RuntimeError("down"))
+    assert list(stream_draft(input_json={})) == [DRAFT_FALLBACK]
+
+
+@pytest.mark.django_db
+def test_sse_token_mode(openai_stream):
+    r = Client().post("/v1/motor/draft/stream", {"input_json": {"objective": "x"}}, content_type="application/json")
+    assert r.status_code == 200
+    assert r["Content-Type"] == "text/event-stream"
+
+    events = _events(r)
+    assert openai_stream.call_args.kwargs["stream"] is True
+    assert [e for e, _ in events] == ["token"] * len(TOKENS) + ["done"]
+    assert events[-1][1]["text"] == "".join(TOKENS).strip()
+
+
+@pytest.mark.django_db
+def test_sse_sentence_mode(openai_stream):
+    r = Client().post(
+        "/v1/motor/draft/stream",
+        {"input_json": {}, "chunking": "sentences"},
+        content_type="application/json",
+    )
+    events = _events(r)
+    assert [d["text"] for e, d in events if e == "sentence"] == [
+        "Hola Ana! Gracias por escribirnos.",
+        "El Corolla 2022 está disponible.",
+        "¿Cuándo querés verlo?",
+    ]
+    assert events[-1] == ("done", {"text": "".join(TOKENS).strip(), "chunks": 3})
+
+
+@pytest.mark.django_db
+def test_sse_rejects_unknown_chunking():
+    r = Client().post("/v1/motor/draft/stream", {"input_json": {}, "chunking": "words"}, content_type="application/json")
+    assert r.status_code == 400
@@ -0,0 +1,129 @@
+import random
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from motor_response import intent_model
+from motor_response.api import motor_respond
+from motor_response.intent_model import IntentModel, features, model_path, train
+from motor_response.schemas import MotorRespondIn
+from whatsapp_inbound.models import MotorDecision, TenantEvent
+
+PHRASES = {
+    "PRECIO": ["cuánto sale el {m}", "precio del {m}?", "qué valor tiene el {m} 0km", "me pasás el precio del {m}"],
+    "TEST_DRIVE": ["puedo probar el {m}?", "quiero hacer un test drive del {m}", "se puede manejar el {m} antes"],
+    "FINANCIACION": ["tienen financiación para el {m}?", "cuotas para el {m}", "financian el {m} en 48 cuotas?"],
+}
+MODELS = ["Corolla", "Hilux", "Onix", "Amarok", "Ranger", "Cronos", "208", "Tracker"]
+
+
+FREEFORM = {"response_mode": "FREEFORM", "template_key": None, "handoff": False, "block": False, "block_reason": None}
+
+
+def _pairs(n, seed=0):
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        label = rnd.choice(sorted(PHRASES))
+        out.append((rnd.choice(PHRASES[label]).format(m=rnd.choice(MODELS)), label))
+    return out
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(intent_model, "MODEL_DIR", tmp_path)
+    intent_model._loaded.clear()
+    yield tmp_path
+    intent_model._loaded.clear()
+
+
+def test_features_are_stable_and_normalized():
+    idx, val = features("Cuánto sale el Corolla?")
+    idx2, val2 = features("cuanto  SALE el corolla?")
+    assert (idx == idx2).all() and (val == val2).all()
+    assert abs(float((val ** 2).sum()) - 1.0) < 1e-5
+    assert len(features("")[0]) == 0
+
+
+def test_train_calibrate_and_roundtrip(tmp_path):
+    texts, labels = zip(*_pairs(300))
+    model, metrics = train(texts, labels)
+    assert metrics["accuracy"] >= 0.95
+    assert metrics["coverage"] > 0.5
+
+    size = model.save(tmp_path / "m.npz")
+    assert size < 200_000
+    loaded = IntentModel.load(tmp_path / "m.npz")
+    label, conf = loaded.predict("che, cuánto sale la Hilux?")
+    assert label == "PRECIO"
+    assert abs(conf - model.predict("che, cuánto sale la Hilux?")[1]) < 1e-2
+    # texto sin nada conocido: distribución casi uniforme, por debajo del umbral
+    assert loaded.predict("zzz")[1] < intent_model.MIN_CONFIDENCE
+
+
+@pytest.mark.django_db
+def test_command_trains_from_decision_log_and_motor_skips_llm(mocker, tenant, contact, model_dir):
+    MotorDecision.objects.bulk_create(
+        MotorDecision(
+            tenant_id=tenant.tenant_key,
+            contact_key=contact.contact_key,
+            turn_wamid=f"wamid.train.{i}",
+            text_in=text,
+            primary_event=label,
+            classifier="llm" if i % 10 else "local",
+            window_open=True,
+            policy_json=FREEFORM,
+        )
+        for i, (text, label) in enumerate(_pairs(240))
+    )
+    assert len(intent_model.training_pairs(tenant)) == 216  # sin las predicciones locales
+    call_command("train_intent_model", tenant_id=tenant.tenant_key)
+    assert model_path(tenant.tenant_key).exists()
+
+    for name in PHRASES:
+        TenantEvent.objects.create(tenant=tenant, name=name)
+    llm = mocker.patch("motor_response.api.classify_with_openai", return_value={
+        "decision": {"primary_event": "PRECIO", "confidence": 0.9}, "policy": {"response_mode": "FREEFORM"}, "next_actions": [],
+    })
+
+    def respond(text, wamid):
+        return motor_respond(None, MotorRespondIn(
+            tenant_id=tenant.tenant_key, contact_key=contact.contact_key, wa_id=contact.wa_id,
+            phone_number_id="1001", turn_wamid=wamid, text=text,
+        ))
+
+    out = respond("quiero hacer un test drive de la Amarok", "wamid.local.1")
+    assert out["decision"]["primary_event"] == "TEST_DRIVE"
+    assert out["telemetry"]["classifier"] == "local"
+    assert out["next_actions"][0]["type"] == "CALL_TEXT_AI"
+    llm.assert_not_called()
+
+    respond("mi cuñado dice que vaya el sábado", "wamid.local.2")
+    llm.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_training_skips_escalated_labels_closed_window_and_local_turns(tenant, contact):
+    handoff = {**FREEFORM, "response_mode": "TEMPLATE", "template_key": "HANDOFF_GENERIC", "handoff": True}
+    rows = [
+        ("cuánto sale el corolla", "PRECIO", "llm", True, FREEFORM),
+        ("precio de la hilux", "PRECIO", "llm", None, FREEFORM),  # logueado antes de window_open
+        ("precio del onix", "PRECIO", "llm", False, {**FREEFORM, "response_mode": "TEMPLATE", "template_key": "REOPEN_24H"}),
+        ("precio del cronos", "PRECIO", "local", True, FREEFORM),
+        ("quiero hablar con alguien", "HUMANO", "llm", True, FREEFORM),
+        ("pásame con un vendedor", "HUMANO", "llm", True, handoff),
+    ]
+    MotorDecision.objects.bulk_create(
+        MotorDecision(tenant_id=tenant.tenant_key, contact_key=contact.contact_key, text_in=text, primary_event=label,
+                      classifier=classifier, window_open=window_open, policy_json=policy)
+        for text, label, classifier, window_open, policy in rows
+    )
+    # HUMANO: el fast path local lo respondería FREEFORM y perdería el handoff -> queda para el LLM
+    assert sorted(intent_model.training_pairs(tenant)) == [("cuánto sale el corolla", "PRECIO"), ("precio de la hilux", "PRECIO")]
+
+
+@pytest.mark.django_db
+def test_command_refuses_without_enough_data(tenant, model_dir):
+    with pytest.raises(CommandError):
+        call_command("train_intent_model", tenant_id=tenant.tenant_key)
+    assert not model_path(tenant.tenant_key).exists()
@@ -0,0 +1,110 @@
+import pytest
+from django.test import Client
+from motor_response.local_extractor import MIN_CONFIDENCE, extract_local, gazetteer_for, resolve_signals
+
+
+@pytest.mark.parametrize("text, vehicle, commercial", [
+    (
+        "Hola, cuánto sale el Corolla XEI 2022 0km? Soy de Rosario",
+        {"make": "Toyota", "model": "Corolla", "trim": "XEI", "year": "2022", "new_or_used": "new"},
+        {"city": "Rosario"},
+    ),
+    (
+        "Tenés la Hilux SRV usada? tengo 15 palos",
+        {"make": "Toyota", "model": "Hilux", "trim": "SRV", "new_or_used": "used"},
+        {"budget": "ARS 15000000"},
+    ),
+    (
+        "busco una t-cross highline, presupuesto USD 20k, pago contado",
+        {"make": "Volkswagen", "model": "T-Cross", "trim": "Highline"},
+        {"budget": "USD 20000", "payment_type": "cash"},
+    ),
+    (
+        "quiero financiar un Onix, puedo poner $12.000.000 de anticipo",
+        {"make": "Chevrolet", "model": "Onix"},
+        {"budget": "ARS 12000000", "payment_type": "finance"},
+    ),
+    (
+        "corolla cross seg en córdoba, 40 mil dólares",
+        {"make": "Toyota", "model": "Corolla Cross", "trim": "SEG"},
+        {"budget": "USD 40000", "city": "Córdoba"},
+    ),
+])
+def test_entities(text, vehicle, commercial):
+    signals, _ = extract_local(text)
+    got_vehicle = signals["entities"]["vehicle"]
+    got_commercial = signals["entities"]["commercial"]
+    assert {k: got_vehicle[k] for k in vehicle} == vehicle
+    assert {k: got_commercial[k] for k in commercial} == commercial
+
+
+def test_year_and_km_are_not_budgets():
+    signals, _ = extract_local("ranger 2019 con 80000 km")
+    assert signals["entities"]["vehicle"]["year"] == "2019"
+    assert signals["entities"]["commercial"]["budget"] is None
+
+
+@pytest.mark.parametrize("text, year", [
+    ("tienen hilux 2019, usada?", "2019"),
+    ("Quiero un Corolla 2020.", "2020"),
+    ("presupuesto 2.019.000", None),
+    ("tengo 2019,50 ahorrado", None),
+])
+def test_year_accepts_trailing_punctuation_but_not_thousands(text, year):
+    signals, _ = extract_local(text)
+    assert signals["entities"]["vehicle"]["year"] == year
+
+
+def test_bare_hay_is_not_availability():
+    signals, confidence = extract_local("no hay problema, quiero un etios")
+    assert not (signals["intent"] == "ASK_AVAILABILITY" and confidence >= MIN_CONFIDENCE)
+    for text in ("hay hilux?", "hay alguna amarok 0km?", "hay stock de corolla?"):
+        assert extract_local(text)[0]["intent"] == "ASK_AVAILABILITY", text
+
+
+def test_confidence_separates_clear_from_vague_turns():
+    clear = extract_local("Hola, cuánto sale el Corolla XEI 2022 0km?")
+    vague = extract_local("el otro día mi primo me comentó que ustedes tenían algo interesante pero no recuerdo bien")
+    objection = extract_local("me parece muy caro, en otra concesionaria me ofrecieron mejor precio")
+
+    assert clear[0]["intent"] == "ASK_PRICE" and clear[1] >= MIN_CONFIDENCE
+    assert vague[0]["intent"] == "OTHER" and vague[1] < MIN_CONFIDENCE
+    assert objection[0]["objection"] == "PRICE_TOO_HIGH" and objection[1] < MIN_CONFIDENCE
+
+
+@pytest.mark.django_db
+def test_tenant_gazetteer_from_seed(tenant, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        r = Client().post("/v1/tenants/vehicles/seed", {
+            "tenant_id": tenant.tenant_key,
+            "vehicles": [{"make": "BYD", "model": "Dolphin Mini", "trims": ["GL", "GS"], "aliases": ["dolphin"]}],
+        }, content_type="application/json")
+    assert r.json()["created"] == 1
+
+    gz = gazetteer_for(tenant)
+    assert gazetteer_for(tenant) is gz  # compilado una vez por versión del catálogo
+    signals, _ = extract_local("precio del dolphin gs?", gz)
+    assert signals["entities"]["vehicle"] == {
+        "make": "BYD", "model": "Dolphin Mini", "trim": "GS", "year": None, "new_or_used": None,
+    }
+    # el gazetteer base sigue disponible
+    assert extract_local("y el onix?", gz)[0]["entities"]["vehicle"]["model"] == "Onix"
+
+
+@pytest.mark.django_db
+def test_resolve_uses_llm_only_below_threshold(mocker, tenant):
+    llm = mocker.patch("motor_response.llm_classifier.extract_signals", return_value={
+        "intent": "OTHER", "objection": None, "risk": False,
+        "entities": {"vehicle": {"make": None, "model": None}, "commercial": {"budget": None}},
+    })
+
+    signals, telemetry = resolve_signals("cuánto sale el Onix LTZ 0km?", tenant)
+    assert telemetry["extractor"] == "local"
+    assert signals["entities"]["vehicle"]["trim"] == "LTZ"
+    llm.assert_not_called()
+
+    signals, telemetry = resolve_signals("mi primo tiene un onix y me dijo que lo vea, no sé bien qué hacer", tenant)
+    assert telemetry["extractor"] == "llm"
+    llm.assert_called_once()
+    # lo que el LLM dejó en null lo completa la extracción local
+    assert signals["entities"]["vehicle"]["model"] == "Onix"
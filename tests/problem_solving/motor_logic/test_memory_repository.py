@@ -0,0 +1,67 @@
+import pytest
+from whatsapp_inbound.models import MemoryRecord
+from motor_response.memory_repository import MemoryRepository
+
+
+@pytest.mark.django_db
+def test_flush_writes_all_changes_in_one_update(tenant, contact, memory_record, django_assert_num_queries):
+    memory = MemoryRepository.load(tenant, contact)
+    memory.set_events("PRICE", ["FINANCING"])
+    memory.append_recent_event({"ts": "2024-01-01T00:00:00+00:00", "event": "PRICE", "confidence": 0.9})
+    memory.set_summary("Asked for price.")
+    memory.set_facts([{"key": "model", "value": "Corolla"}])
+    memory.set_scores({"lead_score": 5})
+    memory.set_sales_state({"stage": "qualify"})
+
+    with django_assert_num_queries(1):
+        assert memory.flush() is True
+
+    mem = MemoryRecord.objects.get(pk=memory_record.pk)
+    assert mem.active_primary_event == "PRICE"
+    assert mem.active_secondary_events == ["FINANCING"]
+    assert mem.recent_events[-1]["event"] == "PRICE"
+    assert mem.summary == "Asked for price."
+    assert mem.facts_json == [{"key": "model", "value": "Corolla"}]
+    assert mem.scores_json == {"lead_score": 5}
+    assert mem.sales_state_json == {"stage": "qualify"}
+    assert mem.version == memory_record.version + 1
+
+
+@pytest.mark.django_db
+def test_flush_retries_on_concurrent_turn(tenant, contact, memory_record):
+    first = MemoryRepository.load(tenant, contact)
+    second = MemoryRepository.load(tenant, contact)
+
+    first.append_recent_event({"event": "A"})
+    first.set_summary("first")
+    assert first.flush() is True
+
+    # second leyó la versión anterior: debe releer y no pisar el evento de first
+    second.append_recent_event({"event": "B"})
+    assert second.flush() is True
+
+    mem = MemoryRecord.objects.get(pk=memory_record.pk)
+    assert [e["event"] for e in mem.recent_events] == ["A", "B"]
+    assert mem.summary == "first"
+    assert mem.version == memory_record.version + 2
+
+
+@pytest.mark.django_db
+def test_flush_creates_missing_record(tenant, contact):
+    memory = MemoryRepository.load(tenant, contact)
+    assert memory.record is None
+
+    memory.set_events("FALLBACK", None)
+    assert memory.flush() is True
+
+    mem = MemoryRecord.objects.get(tenant=tenant, contact=contact)
+    assert mem.active_primary_event == "FALLBACK"
+    assert mem.active_secondary_events == []
+
+
+@pytest.mark.django_db
+def test_flush_without_contact_is_noop(tenant):
+    memory = MemoryRepository.load(tenant, None)
+    memory.set_summary("ignored")
+    assert memory.flush() is False
+    assert not MemoryRecord.objects.exists()
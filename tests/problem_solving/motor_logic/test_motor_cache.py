@@ -1,10 +1,11 @@
 import pytest
 from django.core.cache import cache
-from whatsapp_inbound.models import Tenant, TenantEvent
-from motor_response.api import _load_tenant_events
+from whatsapp_inbound.models import Tenant, TenantEvent, Template
+from whatsapp_inbound.catalog_cache import bump_catalog_version
+from motor_response.api import _load_tenant_events, _load_available_templates
 
 @pytest.mark.django_db
-def test_tenant_events_cache():
+def test_tenant_events_cache(django_capture_on_commit_callbacks):
     # Setup
     tenant = Tenant.objects.create(tenant_key="cache_test", name="Cache Test")
     event = TenantEvent.objects.create(
@@ -22,12 +23,13 @@ def test_tenant_events_cache():
 
     # Modify DB directly
     event.name = "CHANGED_EVENT"
-    event.save()
+    with django_capture_on_commit_callbacks(execute=True):
+        event.save()
 
-    # Second load - should hit cache and return OLD name
+    # Second load - save() bumps the catalog version, so the NEW name is served
     events2 = _load_tenant_events(tenant)
     assert len(events2) == 1
-    assert events2[0]["name"] == "TEST_EVENT"  # Should be stale
+    assert events2[0]["name"] == "CHANGED_EVENT"
 
     # Clear cache
     cache.clear()
@@ -36,3 +38,30 @@ def test_tenant_events_cache():
     events3 = _load_tenant_events(tenant)
     assert len(events3) == 1
     assert events3[0]["name"] == "CHANGED_EVENT"
+
+
+@pytest.mark.django_db
+def test_catalog_cache_hit_skips_db(tenant, template, django_assert_num_queries):
+    _load_available_templates(tenant)
+
+    with django_assert_num_queries(0):
+        templates = _load_available_templates(tenant)
+    assert [t["name"] for t in templates] == ["test_template"]
+
+
+@pytest.mark.django_db
+def test_catalog_invalidated_on_delete(tenant, template, django_capture_on_commit_callbacks):
+    assert len(_load_available_templates(tenant)) == 1
+    with django_capture_on_commit_callbacks(execute=True):
+        template.delete()
+    assert _load_available_templates(tenant) == []
+
+
+@pytest.mark.django_db
+def test_catalog_invalidated_by_bulk_update(tenant, tenant_event, django_capture_on_commit_callbacks):
+    assert len(_load_tenant_events(tenant)) == 1
+    # .update() no dispara signals: el camino bulk invalida explícitamente
+    with django_capture_on_commit_callbacks(execute=True):
+        TenantEvent.objects.filter(tenant=tenant).update(is_active=False)
+        bump_catalog_version(tenant.pk)
+    assert _load_tenant_events(tenant) == []
@@ -0,0 +1,76 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client
+from django.utils import timezone
+from motor_response.jobs import MAX_ATTEMPTS, claim_jobs, response_cache_key, run_motor_job
+from whatsapp_inbound.models import MotorJob, OutboxEvent
+
+
+def _body(tenant, contact, text="sos un idiota", wamid="wamid.job.1"):
+    return {
+        "tenant_id": tenant.tenant_key,
+        "contact_key": contact.contact_key,
+        "wa_id": contact.wa_id,
+        "phone_number_id": "1001",
+        "turn_wamid": wamid,
+        "text": text,
+    }
+
+
+def _post(client, body):
+    return client.post("/v1/motor/respond?mode=async", body, content_type="application/json")
+
+
+@pytest.mark.django_db
+def test_async_mode_enqueues_and_worker_publishes_motor_decided(tenant, contact):
+    c = Client()
+    r = _post(c, _body(tenant, contact))
+    assert r.status_code == 202
+    job_id = r.json()["job_id"]
+    assert r.json()["status"] == "pending"
+
+    # Reintento de n8n: mismo job, nada nuevo encolado
+    assert _post(c, _body(tenant, contact)).json()["job_id"] == job_id
+    assert MotorJob.objects.count() == 1
+    assert not OutboxEvent.objects.exists()
+
+    call_command("run_motor_worker", once=True)
+
+    evt = OutboxEvent.objects.get(topic=OutboxEvent.TOPIC_MOTOR_DECIDED)
+    assert evt.turn_wamid == "wamid.job.1"
+    assert evt.payload_json["job_id"] == job_id
+    assert evt.payload_json["decision"]["primary_event"] == "SAFETY_BLOCK"
+
+    status = c.get(f"/v1/motor/jobs/{job_id}").json()
+    assert status["status"] == "done"
+    assert status["result"]["policy"]["block"] is True
+    # El modo sync devuelve el mismo resultado sin re-ejecutar el turno
+    assert cache.get(response_cache_key(tenant.tenant_key, "wamid.job.1"))["decision"]["primary_event"] == "SAFETY_BLOCK"
+
+
+@pytest.mark.django_db
+def test_failed_job_retries_then_publishes_error(mocker, tenant, contact):
+    mocker.patch("motor_response.api._motor_respond_impl", side_effect=RuntimeError("boom"))
+    _post(Client(), _body(tenant, contact, wamid="wamid.job.2"))
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        MotorJob.objects.update(next_retry_at=timezone.now())  # saltear el backoff
+        (job,) = claim_jobs(1, "test")
+        assert job.attempts == attempt
+        assert run_motor_job(job) is False
+
+    job.refresh_from_db()
+    assert job.status == MotorJob.STATUS_FAILED
+    assert job.error == "boom"
+    evt = OutboxEvent.objects.get(topic=OutboxEvent.TOPIC_MOTOR_DECIDED)
+    assert evt.payload_json["ok"] is False
+    assert claim_jobs(1, "test") == []
+
+
+@pytest.mark.django_db
+def test_job_status_and_mode_validation(tenant, contact):
+    c = Client()
+    assert c.get("/v1/motor/jobs/not-a-uuid").status_code == 404
+    r = c.post("/v1/motor/respond?mode=later", _body(tenant, contact), content_type="application/json")
+    assert r.status_code == 400
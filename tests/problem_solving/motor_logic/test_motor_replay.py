@@ -0,0 +1,73 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from motor_response import replay
+from motor_response.schemas import RouterDecision
+from whatsapp_inbound.models import Contact, Conversation, Message
+
+TURNS = [
+    (0, "hola, busco un auto"),
+    (1, "cuánto sale el Corolla XEI 0km?"),
+    (2, "soy de Rosario, tengo USD 30k"),
+    (60 * 30, "sigue disponible?"),  # 30h después: ventana cerrada
+]
+
+
+@pytest.fixture
+def history(tenant, contact):
+    other = Contact.objects.create(tenant=tenant, contact_key="wa:999", wa_id="999")
+    start = timezone.now() - timedelta(days=3)
+    for c in (contact, other):
+        conv = Conversation.objects.create(tenant=tenant, contact=c)
+        for i, (minutes, text) in enumerate(TURNS):
+            Message.objects.create(
+                tenant=tenant, conversation=conv, contact=c, direction=Message.DIR_IN,
+                wamid=f"wamid.{c.wa_id}.{i}", timestamp=start + timedelta(minutes=minutes), type="text", text_body=text,
+            )
+        Message.objects.create(
+            tenant=tenant, conversation=conv, contact=c, direction=Message.DIR_OUT,
+            wamid=f"wamid.{c.wa_id}.out", timestamp=start, type="text", text_body="respuesta",
+        )
+    return contact
+
+
+@pytest.mark.django_db
+def test_replay_contacts_follows_state_and_window(tenant, history):
+    decisions = replay.replay_contacts(tenant.pk, [history.pk])
+    assert [d[0] for d in decisions] == [f"wamid.123456789.{i}" for i in range(4)]
+    playbooks = [d[1] for d in decisions]
+    assert playbooks[1] == "PRICE_QUOTE_MIN"
+    assert playbooks[3] == "REOPEN_24H"
+    assert decisions[3][4] == ("SEND_TEMPLATE",)
+    # el estado se acumula entre turnos: modelo + ciudad + presupuesto ya conocidos
+    assert decisions[2][2] in ("qualify", "offer") and decisions[2][3] != "ask_model"
+
+    stub = replay.replay_contacts(tenant.pk, [history.pk], signals_mode="stub")
+    assert [d[1] for d in stub] == ["DEFAULT_ASSIST"] * 3 + ["REOPEN_24H"]
+
+
+@pytest.mark.django_db
+def test_command_writes_baseline_and_reports_diff(mocker, tenant, history, tmp_path, capsys):
+    base = tmp_path / "base.jsonl"
+    call_command("replay_motor", tenant_id=tenant.tenant_key, workers=1, batch_contacts=1, out=str(base))
+    lines = [json.loads(line) for line in base.read_text().splitlines()]
+    assert len(lines) == 8
+    assert "Replayed 8 turns / 2 contacts" in capsys.readouterr().out
+
+    # Cambio de router: la intención de precio va a otro playbook
+    original = replay.decide_playbook
+
+    def changed(signals, state, window_open, table=None):
+        d = original(signals, state, window_open, table)
+        if d.playbook_key == "PRICE_QUOTE_MIN":
+            return RouterDecision(playbook_key="HANDOFF", reason="test", priority_level=4)
+        return d
+
+    mocker.patch("motor_response.replay.decide_playbook", side_effect=changed)
+    call_command("replay_motor", tenant_id=tenant.tenant_key, workers=1, baseline=str(base))
+    out = capsys.readouterr().out
+    assert "Diff vs baseline: 2/8 changed, 0 turns not in baseline." in out
+    assert "PRICE_QUOTE_MIN[CALL_TEXT_AI] -> HANDOFF[HANDOFF_TO_HUMAN,SEND_TEMPLATE]" in out
@@ -0,0 +1,112 @@
+import itertools
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.test import Client
+from motor_response.router_rules import DEFAULT_TABLE, RuleTable, merge_rules, table_for
+from motor_response.schemas import SalesState, Signals
+from whatsapp_inbound.models import TenantRouterRule
+
+
+def _grid():
+    """Combinaciones de señales/estado que recorren todas las ramas de la tabla default."""
+    intents = ["GENERAL", "HANDOFF_REQUEST", "ASK_PRICE", "ASK_FINANCING", "ASK_AVAILABILITY", "BOOK_TEST_DRIVE", "SCHEDULE_VISIT"]
+    objections = [None, "PRICE_TOO_HIGH", "TRUST"]
+    missing = [[], ["model"], ["budget"], ["vehicle.model", "budget"]]
+    for intent, objection, miss, risk, window in itertools.product(intents, objections, missing, [False, True], [True, False]):
+        yield Signals(intent=intent, objection=objection, risk=risk), SalesState(missing=miss), window
+
+
+def _seed(tenant, rules, **extra):
+    return Client().post(
+        "/v1/tenants/router/rules/seed",
+        data={"tenant_id": tenant.tenant_key, "rules": rules, **extra},
+        content_type="application/json",
+    )
+
+
+def test_default_table_matches_documented_pyramid():
+    sig = Signals(intent="ASK_PRICE", objection="PRICE_TOO_HIGH")
+    d = DEFAULT_TABLE.decide(sig, SalesState(), True)
+    assert (d.playbook_key, d.priority_level, d.reason) == ("OBJECTION_PRICE", 3, "Handling price objection: PRICE_TOO_HIGH")
+    # memo: misma combinación de features -> misma instancia, sin reevaluar
+    assert DEFAULT_TABLE.decide(Signals(intent="ASK_PRICE", objection="PRICE_TOO_HIGH"), SalesState(), True) is d
+
+
+def test_decide_batch_matches_decide():
+    signals, states, windows = zip(*_grid())
+    batch = DEFAULT_TABLE.decide_batch(signals, states, windows)
+    single = [DEFAULT_TABLE.decide(s, st, w) for s, st, w in zip(signals, states, windows)]
+    assert [b.model_dump() for b in batch] == [s.model_dump() for s in single]
+    assert {b.playbook_key for b in batch} >= {"SAFE_BOUNDARY", "REOPEN_24H", "HANDOFF", "BOOK_VISIT", "DISCOVERY_MIN", "DEFAULT_ASSIST"}
+
+
+def test_merge_override_and_disable():
+    table = RuleTable(merge_rules([
+        {"name": "missing_model", "priority": 60, "when": {"missing": {"any": ["model", "vehicle.model"]}},
+         "playbook_key": "DISCOVERY_MIN", "reason": "Missing model."},
+        {"name": "objection_other", "priority": 49, "playbook_key": "HANDOFF", "is_active": False},
+    ]))
+    assert table.decide(Signals(intent="GENERAL"), SalesState(missing=["vehicle.model"]), True).reason == "Missing model."
+    assert table.decide(Signals(intent="GENERAL", objection="TRUST"), SalesState(), True).playbook_key == "DEFAULT_ASSIST"
+
+
+@pytest.mark.django_db
+def test_seeded_rules_route_the_tenant_and_reseed_invalidates(tenant, django_capture_on_commit_callbacks):
+    sig, st = Signals(intent="GENERAL"), SalesState(stage="QUALIFYING", temperature="HOT")
+    assert table_for(tenant) is DEFAULT_TABLE
+
+    hot = {"name": "hot_lead_visit", "priority": 45, "when": {"temperature": "HOT", "window_open": True},
+           "playbook_key": "BOOK_VISIT", "reason": "Hot lead at stage {stage}.", "level": 4}
+    with django_capture_on_commit_callbacks(execute=True):
+        r = _seed(tenant, [hot])
+    assert r.status_code == 200 and r.json()["created"] == 1
+    table = table_for(tenant)
+    assert table_for(tenant) is table  # compilada una vez por versión del catálogo
+    d = table.decide(sig, st, True)
+    assert (d.playbook_key, d.reason) == ("BOOK_VISIT", "Hot lead at stage QUALIFYING.")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        r = _seed(tenant, [{**hot, "is_active": False}])
+    assert r.json()["updated"] == 1
+    assert table_for(tenant).decide(sig, st, True).playbook_key == "DEFAULT_ASSIST"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("rule, error", [
+    ({"when": {"mood": "HAPPY"}}, "unknown feature"),
+    ({"playbook_key": "NOPE"}, "unknown playbook_key"),
+    ({"when": {"missing": {"has": ["model"]}}}, "expected one operator"),
+    ({"reason": "Bad {nope}"}, "unknown reason placeholder"),
+    ({"when": {"intent": {"in": [{"x": 1}]}}}, "expected a list of scalars"),
+    ({"when": {"missing": {"any": [["model"]]}}}, "expected a list of scalars"),
+])
+def test_seed_rejects_invalid_rules(tenant, rule, error):
+    base = {"name": "r", "priority": 5, "when": {}, "playbook_key": "HANDOFF"}
+    r = _seed(tenant, [{**base, **rule}])
+    assert r.status_code == 400
+    assert error in r.json()["error"]
+    assert not TenantRouterRule.objects.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("when", [["intent", "ASK_PRICE"], {"intent": {"in": [{"x": 1}]}}, {"intent": {"not_in": "ASK_PRICE"}}])
+def test_invalid_rule_in_db_falls_back_to_defaults_and_admin_rejects_it(tenant, when, django_capture_on_commit_callbacks):
+    rule = TenantRouterRule(tenant=tenant, name="bad", priority=5, when_json=when, playbook_key="HANDOFF")
+    with pytest.raises(ValidationError):
+        rule.full_clean()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        rule.save()  # lo que pase por fuera del admin/seed
+    assert table_for(tenant).decide(Signals(intent="ASK_PRICE"), SalesState(), True).playbook_key == "PRICE_QUOTE_MIN"
+
+
+@pytest.mark.django_db
+def test_clean_compiles_with_the_tenant_rules(tenant):
+    TenantRouterRule.objects.create(tenant=tenant, name="hot", priority=45, when_json={"temperature": "HOT"},
+                                    playbook_key="BOOK_VISIT")
+    edited = TenantRouterRule.objects.get(name="hot")
+    edited.full_clean()
+    edited.reason = "Hot lead {mood}"
+    with pytest.raises(ValidationError, match="unknown reason placeholder"):
+        edited.full_clean()